@@ -0,0 +1,501 @@
+# End-to-end pipeline benchmark: process_worker against the mock API with a fake LLM
+"""
+Drive the real worker path (claim, raw save, LLM stages, processed save, batched submit) over
+synthetic transcripts and report throughput and latency percentiles as JSON.
+
+The mock API runs as a separate uvicorn process, so HTTP costs are real; the LLM is replaced by a
+fake model whose latency, error and 429 rates follow the given distributions. Limits and batching
+come from the usual env vars (GEMINI_RPM, SUBMIT_RATE_LIMIT, SUBMIT_BATCH_SIZE, ...); unless set,
+they default here to values that never bind, so export the production values to model them.
+
+Example:
+    python -m scripts.benchmark --transcripts 500 --workers 5,10,20 --storage json,memory \\
+        --llm-latency lognormal:0.8,0.4 --llm-429-rate 0.02 --turns uniform:2,40 --output bench.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+# Ensure project root is on PYTHONPATH so we can import src modules
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+logger = logging.getLogger("benchmark")
+
+# Limits loose enough that only the fake LLM, storage and HTTP shape the numbers, unless overridden
+BENCHMARK_ENV_DEFAULTS = {
+    "CALLLIVE_API_KEY": "benchmark",
+    "CALLLIVE_BASE_URL": "http://127.0.0.1:8000/api",
+    "GEMINI_RPM": "1000000",
+    "GEMINI_TPM": "1000000000",
+    "SUBMIT_RATE_LIMIT": "1000000",
+    "SUBMIT_BURST": "1000",
+    "QUEUE_REPORT_SECONDS": "3600",
+    "METRICS_PORT": "0",
+}
+
+
+def benchmark_limits() -> dict:
+    """
+    Gemini and submit limits for the runs, read from the environment with BENCHMARK_ENV_DEFAULTS as fallback.
+    """
+    def env(name: str) -> float:
+        return float(os.getenv(name, BENCHMARK_ENV_DEFAULTS[name]))
+
+    return {
+        "gemini_rpm": env("GEMINI_RPM"),
+        "gemini_tpm": env("GEMINI_TPM"),
+        "submit_rate_limit": env("SUBMIT_RATE_LIMIT"),
+        "submit_rate_period": float(os.getenv("SUBMIT_RATE_PERIOD", "60")),
+        "submit_burst": int(env("SUBMIT_BURST")),
+    }
+
+
+VOCABULARY = (
+    "mount doom tour hike permit gear boots water ash lava guide eagle ring ranger trail summit "
+    "weather booking group family price discount safety helmet map route shire journey question"
+).split()
+INTEREST_LEVELS = ["low", "medium", "high"]
+PERMIT_STATUSES = ["none", "pending", "approved"]
+HAZARD_KNOWLEDGE = ["none", "limited", "basic", "advanced"]
+EXTRACTED_PERMIT_STATUSES = ["pending", "approved", "denied"]
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a distribution spec into a sampler taking a Random instance. Samples are never negative.
+
+    Specs: "const:V", "uniform:A,B", "normal:MEAN,STDDEV", "lognormal:MEDIAN,SIGMA", "exp:MEAN".
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        params = [float(x) for x in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"Bad distribution parameters in {spec!r}")
+    expected = {"const": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+    if kind not in expected:
+        raise ValueError(f"Unknown distribution {kind!r}; expected one of {sorted(expected)}")
+    if len(params) != expected[kind]:
+        raise ValueError(f"{kind} takes {expected[kind]} parameter(s), got {spec!r}")
+
+    if kind == "const":
+        return lambda rng: max(0.0, params[0])
+    if kind == "uniform":
+        return lambda rng: max(0.0, rng.uniform(params[0], params[1]))
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal":
+        mu = math.log(params[0]) if params[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, params[1])
+    return lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile (q in 0..100) of an already sorted list; 0.0 when empty.
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize_samples(samples: List[float]) -> dict:
+    """
+    Count, mean, p50/p95/p99 and max of a list of latencies in seconds.
+    """
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+def make_transcripts(count: int, turns: Callable[[random.Random], float], rng: random.Random,
+                     prefix: str = "bench") -> List[dict]:
+    """
+    Synthetic transcripts in the API's stream format, with a sampled number of turns each.
+    """
+    transcripts = []
+    for i in range(count):
+        n_turns = max(1, int(round(turns(rng))))
+        transcript_text = [
+            {
+                "speaker": "agent" if t % 2 == 0 else "customer",
+                "text": " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(5, 25))),
+            }
+            for t in range(n_turns)
+        ]
+        transcripts.append({
+            "transcript_id": f"{prefix}-{i}",
+            "session_id": f"{prefix}-sess-{i % max(1, count // 4)}",
+            "duration_seconds": 30 * n_turns,
+            "transcript_text": transcript_text,
+            "metadata": {
+                "questionnaire": {"purpose_of_visit_asked": rng.random() < 0.5},
+                "visitor_interest_level": rng.choice(INTEREST_LEVELS),
+                "mount_doom_permit_status": rng.choice(PERMIT_STATUSES),
+                "language": "en",
+            },
+        })
+    return transcripts
+
+
+class FakeQuotaError(Exception):
+    """
+    Stands in for Gemini's ResourceExhausted, so the limiter's drain-and-retry path runs.
+    """
+
+    code = 429
+
+
+class FakeModel:
+    """
+    Async generative model with sampled latency that fails at the configured rates.
+    """
+
+    def __init__(self, stage: str, latency: Callable[[random.Random], float], rng: random.Random,
+                 error_rate: float = 0.0, quota_rate: float = 0.0):
+        self.model_name = f"fake-{stage}"
+        self.stage = stage
+        self.latency = latency
+        self.rng = rng
+        self.error_rate = error_rate
+        self.quota_rate = quota_rate
+        self.calls = 0
+        self.errors = 0
+        self.quota_errors = 0
+
+    async def generate_content_async(self, prompt: str):
+        self.calls += 1
+        await asyncio.sleep(self.latency(self.rng))
+        roll = self.rng.random()
+        if roll < self.quota_rate:
+            self.quota_errors += 1
+            raise FakeQuotaError("429 Resource has been exhausted (fake)")
+        if roll < self.quota_rate + self.error_rate:
+            self.errors += 1
+            raise RuntimeError("fake LLM failure")
+        return SimpleNamespace(text=self._response(prompt))
+
+    def _response(self, prompt: str) -> str:
+        if self.stage == "summarize":
+            return "Visitor asked about a Mount Doom hike; agent explained permits and gear."
+        if self.stage == "extract":
+            # Same schema the extractor prompt asks for, with the questionnaire copied from the prompt
+            questionnaire = prompt.partition("as-is with boolean values:")[2].partition("Conversation:")[0]
+            return json.dumps({
+                "visitor_details": {
+                    "ring_bearer": self.rng.random() < 0.01,
+                    "gear_prepared": self.rng.random() < 0.5,
+                    "hazard_knowledge": self.rng.choice(HAZARD_KNOWLEDGE),
+                    "fitness_level": self.rng.choice(INTEREST_LEVELS),
+                    "permit_status": self.rng.choice(EXTRACTED_PERMIT_STATUSES),
+                },
+                "questionnaire_completion": json.loads(questionnaire or "{}"),
+            })
+        return json.dumps({
+            "sentiment": round(self.rng.random(), 3),
+            "interest_level": self.rng.choice(INTEREST_LEVELS),
+            "preparedness_level": self.rng.choice(INTEREST_LEVELS),
+            "action_items": ["send permit form"],
+        })
+
+
+@contextmanager
+def fake_llm(latency: Callable[[random.Random], float], rng: random.Random,
+             error_rate: float = 0.0, quota_rate: float = 0.0, cache: bool = False,
+             limits: Optional[dict] = None):
+    """
+    Swap the processing modules' Gemini models for FakeModels (and turn mock mode off) for the block.
+    The shared Gemini limiter is replaced by a fresh one, so every run starts with a full bucket.
+    """
+    from src.processing import summarizer, extractor, analyzer, fused, llm
+    from src.ratelimit import TokenBucketLimiter
+
+    limits = limits or benchmark_limits()
+
+    models = {
+        stage: FakeModel(stage, latency, rng, error_rate, quota_rate)
+        for stage in ("summarize", "extract", "analyze")
+    }
+    patches = [
+        (summarizer, "genai_model", models["summarize"]),
+        (extractor, "model", models["extract"]),
+        (analyzer, "model", models["analyze"]),
+        (summarizer, "USE_MOCK_LLM", False),
+        (extractor, "USE_MOCK_LLM", False),
+        (analyzer, "USE_MOCK_LLM", False),
+        (fused, "USE_FUSED_LLM", False),
+        (llm.llm_cache, "enabled", cache),
+        (llm, "llm_limiter", TokenBucketLimiter(limits["gemini_rpm"], limits["gemini_tpm"])),
+    ]
+    saved = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+    for obj, name, value in patches:
+        setattr(obj, name, value)
+    try:
+        yield models
+    finally:
+        for obj, name, value in saved:
+            setattr(obj, name, value)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def mock_api_server(port: Optional[int] = None, timeout: float = 15.0):
+    """
+    Run scripts/mock_api.py under uvicorn in a child process; yields its base URL.
+    """
+    port = port or _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "scripts.mock_api:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=project_root
+    )
+    base_url = f"http://127.0.0.1:{port}/api"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with urllib.request.urlopen(f"{base_url}/v1/health", timeout=1):
+                    break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("Mock API did not start")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def run_once(client, transcripts: List[dict], workers: int, storage: str, workdir: str,
+                   limits: Optional[dict] = None) -> dict:
+    """
+    Push `transcripts` through a fresh Pipeline with `workers` workers and the given storage
+    ("json" or "memory"), and measure per-transcript latency from enqueue to ack.
+    """
+    from src import app
+    from src.ratelimit import GCRALimiter
+    from src.storage import db
+    from src.storage.backends import JSONBackend, MemoryBackend
+
+    limits = limits or benchmark_limits()
+    os.makedirs(workdir, exist_ok=True)
+    if storage == "json":
+        backend = JSONBackend(
+            os.path.join(workdir, "raw.jsonl"),
+            os.path.join(workdir, "processed.jsonl"),
+            os.path.join(workdir, "errors.jsonl"),
+        )
+    elif storage == "memory":
+        backend = MemoryBackend()
+    else:
+        raise ValueError(f"Unknown storage {storage!r}; expected json or memory")
+    enqueued: Dict[str, float] = {}
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+
+    def record(stage: str, seconds: float) -> None:
+        stages.setdefault(stage, []).append(seconds)
+
+    def timed(fn, stage: str):
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - start)
+        return wrapper
+
+    original = {name: getattr(app, name) for name in ("process_transcript", "save_raw_transcript", "save_processed_result")}
+
+    async def process_transcript(transcript, timeouts=None):
+        result, timings = await original["process_transcript"](transcript, timeouts)
+        for stage, seconds in timings.items():
+            record(stage, seconds)
+        return result, timings
+
+    seen_path = db.get_seen_path()
+    try:
+        db.set_backend(backend)
+        db.set_seen_path(os.path.join(workdir, os.path.basename(seen_path)))
+        app.process_transcript = process_transcript
+        app.save_raw_transcript = timed(original["save_raw_transcript"], "store")
+        app.save_processed_result = timed(original["save_processed_result"], "store")
+        pipeline = app.Pipeline(client, worker_count=workers, durable_path="",
+                                checkpoint_path=os.path.join(workdir, "checkpoint.jsonl"))
+        pipeline.submitter._rate_limiter = GCRALimiter(
+            limits["submit_rate_limit"], limits["submit_rate_period"], burst=limits["submit_burst"]
+        )
+        pipeline.submitter.submit = timed(pipeline.submitter.submit, "submit")
+        queue_ack = pipeline.queue.ack
+
+        async def ack(item):
+            start = enqueued.pop(item.get("transcript_id"), None)
+            if start is not None:
+                latencies.append(time.perf_counter() - start)
+            await queue_ack(item)
+
+        pipeline.queue.ack = ack
+        await pipeline.start()
+        start = time.perf_counter()
+        for transcript in transcripts:
+            enqueued[transcript["transcript_id"]] = time.perf_counter()
+            await pipeline.put(transcript)
+        await pipeline.queue.join()
+        elapsed = time.perf_counter() - start
+        await pipeline.finish()
+    finally:
+        for name, fn in original.items():
+            setattr(app, name, fn)
+        db.set_seen_path(seen_path)
+        db.set_backend(None)
+
+    return {
+        "storage": storage,
+        "workers": workers,
+        "transcripts": len(transcripts),
+        "succeeded": len(latencies),
+        "failed": len(transcripts) - len(latencies),
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "latency_seconds": summarize_samples(latencies),
+        "stages": {stage: summarize_samples(samples) for stage, samples in sorted(stages.items())},
+    }
+
+
+async def run_benchmark(base_url: str, transcripts: int, workers: List[int], storages: List[str],
+                        llm_latency: str, turns: str, error_rate: float = 0.0, quota_rate: float = 0.0,
+                        seed: int = 1, llm_cache: bool = False, workdir: Optional[str] = None) -> dict:
+    """
+    Run every storage x worker-count combination and return the report.
+
+    Each run gets its own transcripts (same seed, so the same shapes) and its own output directory,
+    so runs are independent and repeatable.
+    """
+    from src.api.client import MordorAPIClient
+
+    workdir = workdir or tempfile.mkdtemp(prefix="benchmark-")
+    limits = benchmark_limits()
+    runs = []
+    async with MordorAPIClient(os.environ["CALLLIVE_API_KEY"], base_url) as client:
+        if not await client.authenticate():
+            raise RuntimeError(f"Could not authenticate against {base_url}")
+        for storage in storages:
+            for worker_count in workers:
+                label = f"{storage}-w{worker_count}"
+                # Same seed per run: identical transcript shapes and LLM behaviour across the sweep
+                rng = random.Random(seed)
+                batch = make_transcripts(transcripts, parse_distribution(turns), rng, prefix=label)
+                with fake_llm(parse_distribution(llm_latency), rng, error_rate, quota_rate, llm_cache, limits) as models:
+                    run = await run_once(client, batch, worker_count, storage, os.path.join(workdir, label), limits)
+                run["llm"] = {
+                    "calls": sum(m.calls for m in models.values()),
+                    "errors": sum(m.errors for m in models.values()),
+                    "quota_errors": sum(m.quota_errors for m in models.values()),
+                }
+                logger.info(
+                    f"[benchmark] {label}: {run['throughput_per_second']:.1f}/s "
+                    f"p50={run['latency_seconds']['p50']:.3f}s p99={run['latency_seconds']['p99']:.3f}s"
+                )
+                runs.append(run)
+
+    return {
+        "config": {
+            "transcripts": transcripts,
+            "workers": workers,
+            "storage": storages,
+            "llm_latency": llm_latency,
+            "llm_error_rate": error_rate,
+            "llm_429_rate": quota_rate,
+            "turns": turns,
+            "seed": seed,
+            "llm_cache": llm_cache,
+            "limits": limits,
+        },
+        "runs": runs,
+    }
+
+
+def _csv(value: str, cast=str) -> list:
+    return [cast(v) for v in value.split(",") if v]
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transcripts", type=int, default=200, help="transcripts per run")
+    parser.add_argument("--workers", type=lambda v: _csv(v, int), default=[1, 5, 10, 20], help="worker counts to sweep, comma separated")
+    parser.add_argument("--storage", type=_csv, default=["json", "memory"], help="storage backends: json, memory")
+    parser.add_argument("--llm-latency", default="lognormal:0.5,0.5", help="per-call LLM latency distribution, seconds")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of LLM calls that fail outright")
+    parser.add_argument("--llm-429-rate", type=float, default=0.0, help="fraction of LLM calls rejected for quota")
+    parser.add_argument("--turns", default="uniform:2,30", help="turns per transcript distribution")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--llm-cache", action="store_true", help="leave the LLM response cache on")
+    parser.add_argument("--base-url", help="use an already running API instead of starting scripts/mock_api.py")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--log-level", default="critical", help="pipeline log level; injected LLM failures log at error")
+    args = parser.parse_args(argv)
+
+    for name, value in BENCHMARK_ENV_DEFAULTS.items():
+        os.environ.setdefault(name, value)
+    # Import the processing modules without Gemini setup; fake_llm() turns mock mode back off
+    os.environ["USE_MOCK_LLM"] = "true"
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    # Per-transcript INFO logs would dominate the profile; keep only the benchmark's own progress
+    logging.getLogger().setLevel(args.log_level.upper())
+    logger.setLevel(logging.INFO)
+
+    for spec in (args.llm_latency, args.turns):
+        parse_distribution(spec)
+
+    def run(base_url):
+        return asyncio.run(run_benchmark(
+            base_url, args.transcripts, args.workers, args.storage, args.llm_latency, args.turns,
+            args.llm_error_rate, args.llm_429_rate, args.seed, args.llm_cache
+        ))
+
+    if args.base_url:
+        report = run(args.base_url)
+    else:
+        with mock_api_server() as base_url:
+            report = run(base_url)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,40 @@ from fastapi.responses import StreamingResponse, JSONResponse
 import uvicorn
 import asyncio
 import json
+import os
+import random
+import time
+from collections import deque
 from datetime import datetime, timezone
 
 app = FastAPI(title="Mock Mount Doom API")
 
+# Load-generator mode: MOCK_TRANSCRIPTS > 0 streams that many synthetic transcripts instead of the two samples,
+# at MOCK_RATE per second, with MIN,MAX turn counts and words per turn and weighted metadata mixes
+MOCK_TRANSCRIPTS = int(os.getenv("MOCK_TRANSCRIPTS", "0"))
+MOCK_RATE = float(os.getenv("MOCK_RATE", "5"))
+MOCK_TURNS = os.getenv("MOCK_TURNS", "2,20")
+MOCK_WORDS_PER_TURN = os.getenv("MOCK_WORDS_PER_TURN", "5,30")
+MOCK_DUPLICATE_RATIO = float(os.getenv("MOCK_DUPLICATE_RATIO", "0"))
+MOCK_INTEREST_MIX = os.getenv("MOCK_INTEREST_MIX", "low:1,medium:1,high:1")
+MOCK_PERMIT_MIX = os.getenv("MOCK_PERMIT_MIX", "none:1,pending:1,approved:1")
+MOCK_SEED = int(os.getenv("MOCK_SEED", "1"))
+# Fault injection, as probabilities per streamed record (disconnects) or per request (the rest)
+MOCK_DISCONNECT_RATE = float(os.getenv("MOCK_DISCONNECT_RATE", "0"))
+MOCK_401_RATE = float(os.getenv("MOCK_401_RATE", "0"))
+MOCK_429_RATE = float(os.getenv("MOCK_429_RATE", "0"))
+MOCK_RETRY_AFTER = float(os.getenv("MOCK_RETRY_AFTER", "0.1"))
+MOCK_SLOW_RATE = float(os.getenv("MOCK_SLOW_RATE", "0"))
+MOCK_SLOW_SECONDS = float(os.getenv("MOCK_SLOW_SECONDS", "2"))
+
+# Latency samples kept for /api/v1/stats percentiles
+_MAX_SAMPLES = 100_000
+
+VOCABULARY = (
+    "mount doom tour hike permit gear boots water ash lava guide eagle ring ranger trail summit "
+    "weather booking group family price discount safety helmet map route shire journey question"
+).split()
+
 # In-memory store for processed results and stats
 processed_count = 0
 
@@ -41,6 +71,185 @@ sample_transcripts = [
     for i in range(1, 3)  # Only 2 transcripts for quota-safe testing
 ]
 
+
+class InjectedDisconnect(Exception):
+    """
+    Raised inside the stream to drop the connection mid-response.
+    """
+
+
+def _parse_range(spec: str) -> tuple:
+    low, _, high = spec.partition(",")
+    low = int(low)
+    return low, int(high) if high else low
+
+
+def _parse_mix(spec: str) -> tuple:
+    values, weights = [], []
+    for part in spec.split(","):
+        value, _, weight = part.partition(":")
+        values.append(value)
+        weights.append(float(weight) if weight else 1.0)
+    return values, weights
+
+
+def configure(**overrides) -> dict:
+    """
+    Apply settings (lower-case names of the MOCK_* variables, e.g. transcripts=1000, rate=200) on top
+    of the environment defaults, and reset the stream plan and stats. Returns the active settings.
+    """
+    settings = {
+        "transcripts": MOCK_TRANSCRIPTS,
+        "rate": MOCK_RATE,
+        "turns": MOCK_TURNS,
+        "words_per_turn": MOCK_WORDS_PER_TURN,
+        "duplicate_ratio": MOCK_DUPLICATE_RATIO,
+        "interest_mix": MOCK_INTEREST_MIX,
+        "permit_mix": MOCK_PERMIT_MIX,
+        "seed": MOCK_SEED,
+        "disconnect_rate": MOCK_DISCONNECT_RATE,
+        "401_rate": MOCK_401_RATE,
+        "429_rate": MOCK_429_RATE,
+        "retry_after": MOCK_RETRY_AFTER,
+        "slow_rate": MOCK_SLOW_RATE,
+        "slow_seconds": MOCK_SLOW_SECONDS,
+    }
+    unknown = set(overrides) - set(settings)
+    if unknown:
+        raise ValueError(f"Unknown mock settings: {sorted(unknown)}")
+    settings.update(overrides)
+    settings["_turns"] = _parse_range(str(settings["turns"]))
+    settings["_words"] = _parse_range(str(settings["words_per_turn"]))
+    settings["_interest"] = _parse_mix(settings["interest_mix"])
+    settings["_permit"] = _parse_mix(settings["permit_mix"])
+
+    # Stream plan: transcript index per streamed slot, with duplicates of earlier ones mixed in
+    rng = random.Random(settings["seed"])
+    count = settings["transcripts"] or len(sample_transcripts)
+    plan, emitted = [], 0
+    while emitted < count:
+        if emitted and rng.random() < settings["duplicate_ratio"]:
+            plan.append(rng.randrange(emitted))
+        else:
+            plan.append(emitted)
+            emitted += 1
+    settings["_plan"] = plan
+
+    global config, _fault_rng
+    config = settings
+    _fault_rng = random.Random(settings["seed"] + 1)
+    reset_stats()
+    return config
+
+
+def reset_stats() -> None:
+    global processed_count, stats, submitted_ids, first_streamed, submit_latencies, request_latencies
+    processed_count = 0
+    stats = {"submit_requests": 0, "batch_requests": 0, "streamed": 0, "stream_connections": 0, "duplicate_submissions": 0,
+             "injected": {"disconnect": 0, "401": 0, "429": 0, "slow": 0}}
+    submitted_ids = set()
+    first_streamed = {}
+    submit_latencies = deque(maxlen=_MAX_SAMPLES)
+    request_latencies = deque(maxlen=_MAX_SAMPLES)
+
+
+def make_transcript(index: int) -> dict:
+    """
+    Transcript number `index`: a sample in default mode, otherwise synthesized deterministically from the seed.
+    """
+    if not config["transcripts"]:
+        return sample_transcripts[index]
+    rng = random.Random(config["seed"] * 1_000_003 + index)
+    now = datetime.now(timezone.utc).isoformat()
+    n_turns = rng.randint(*config["_turns"])
+    turns = [
+        {
+            "speaker": "agent" if t % 2 == 0 else "customer",
+            "text": " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(*config["_words"]))),
+            "timestamp": now
+        }
+        for t in range(n_turns)
+    ]
+    return {
+        "transcript_id": f"t-load-{index}",
+        "session_id": f"sess-load-{rng.randrange(max(1, config['transcripts'] // 4))}",
+        "timestamp": now,
+        "agent_type": "customer_service",
+        "duration_seconds": 20 * n_turns + rng.randint(0, 60),
+        "participants": {"agent": "Doom Services AI", "customer": f"User{index}"},
+        "transcript_text": turns,
+        "metadata": {
+            "questionnaire": {
+                "purpose_of_visit_asked": rng.random() < 0.7,
+                "gear_discussed": rng.random() < 0.5
+            },
+            "visitor_interest_level": rng.choices(*config["_interest"])[0],
+            "mount_doom_permit_status": rng.choices(*config["_permit"])[0],
+            "language": "en"
+        }
+    }
+
+
+def _percentiles(samples) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    def at(q):
+        return ordered[min(len(ordered), max(1, -(-len(ordered) * q // 100))) - 1]
+
+    return {"count": len(ordered), "p50": at(50), "p95": at(95), "p99": at(99), "max": ordered[-1]}
+
+
+async def _inject_request_faults():
+    """
+    Roll for a slow response, a 401 and a 429; returns an error response to send, or None.
+    """
+    if _fault_rng.random() < config["slow_rate"]:
+        stats["injected"]["slow"] += 1
+        await asyncio.sleep(config["slow_seconds"])
+    if _fault_rng.random() < config["401_rate"]:
+        stats["injected"]["401"] += 1
+        return JSONResponse({"detail": "token expired"}, status_code=401)
+    if _fault_rng.random() < config["429_rate"]:
+        stats["injected"]["429"] += 1
+        return JSONResponse(
+            {"detail": "rate limited"}, status_code=429, headers={"Retry-After": str(config["retry_after"])}
+        )
+    return None
+
+
+def _record_submission(transcript_id) -> None:
+    global processed_count
+    processed_count += 1
+    if transcript_id in submitted_ids:
+        stats["duplicate_submissions"] += 1
+        return
+    submitted_ids.add(transcript_id)
+    streamed_at = first_streamed.get(transcript_id)
+    if streamed_at is not None:
+        submit_latencies.append(time.monotonic() - streamed_at)
+
+
+def _resume_slot(after) -> int:
+    # First stream slot after the one that first carried transcript `after`; 0 if unknown
+    if not after:
+        return 0
+    if config["transcripts"]:
+        prefix, _, number = after.rpartition("-")
+        index = int(number) if prefix == "t-load" and number.isdigit() else None
+    else:
+        ids = [t["transcript_id"] for t in sample_transcripts]
+        index = ids.index(after) if after in ids else None
+    if index is None or index not in config["_plan"]:
+        return 0
+    return config["_plan"].index(index) + 1
+
+
+config = {}
+_fault_rng = random.Random()
+configure()
+
 @app.post("/api/auth")
 async def auth(body: dict):
     api_key = body.get("api_key")
@@ -49,24 +258,76 @@ async def auth(body: dict):
     return {"token": "mock-token"}
 
 @app.get("/api/v1/transcripts/stream")
-async def stream_transcripts(request: Request):
+async def stream_transcripts(request: Request, after: str | None = None):
+    stats["stream_connections"] += 1
+    fault = await _inject_request_faults()
+    if fault is not None:
+        return fault
+    # Resume after the given transcript_id when a client reconnects
+    start = _resume_slot(after)
+    plan = config["_plan"]
+    interval = 1.0 / config["rate"] if config["rate"] > 0 else 0.0
+
     async def event_generator():
-        for transcript in sample_transcripts:
+        for slot in range(start, len(plan)):
             if await request.is_disconnected():
                 break
+            if _fault_rng.random() < config["disconnect_rate"]:
+                stats["injected"]["disconnect"] += 1
+                raise InjectedDisconnect(f"dropping stream at slot {slot}")
+            transcript = make_transcript(plan[slot])
+            first_streamed.setdefault(transcript["transcript_id"], time.monotonic())
+            stats["streamed"] += 1
             yield json.dumps(transcript).encode('utf-8') + b"\n"
-            await asyncio.sleep(0.2)
+            await asyncio.sleep(interval)
     return StreamingResponse(event_generator(), media_type="application/json")
 
 @app.post("/api/v1/transcripts/process")
 async def process_transcript(body: dict):
-    global processed_count
-    processed_count += 1
-    return {"status": "ok", "transcript_id": body.get("transcript_id")}
+    start = time.monotonic()
+    stats["submit_requests"] += 1
+    try:
+        fault = await _inject_request_faults()
+        if fault is not None:
+            return fault
+        _record_submission(body.get("transcript_id"))
+        return {"status": "ok", "transcript_id": body.get("transcript_id")}
+    finally:
+        request_latencies.append(time.monotonic() - start)
+
+@app.post("/api/v1/transcripts/process/batch")
+async def process_transcript_batch(body: dict):
+    start = time.monotonic()
+    results = body.get("results")
+    if not isinstance(results, list):
+        raise HTTPException(status_code=400, detail="results list required")
+    stats["submit_requests"] += 1
+    stats["batch_requests"] += 1
+    try:
+        fault = await _inject_request_faults()
+        if fault is not None:
+            return fault
+        for result in results:
+            _record_submission(result.get("transcript_id"))
+        return {
+            "results": [
+                {"status": "ok", "transcript_id": result.get("transcript_id")}
+                for result in results
+            ]
+        }
+    finally:
+        request_latencies.append(time.monotonic() - start)
 
 @app.get("/api/v1/stats")
 async def get_stats():
-    return {"processed_count": processed_count}
+    return {
+        "processed_count": processed_count,
+        "unique_processed": len(submitted_ids),
+        **stats,
+        # Time from a transcript first being streamed to its first submission reaching us
+        "stream_to_submit_seconds": _percentiles(submit_latencies),
+        "submit_request_seconds": _percentiles(request_latencies),
+    }
 
 @app.get("/api/v1/health")
 async def health():
@@ -0,0 +1,170 @@
+# Batching front-end for result submission
+import os
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from src.api.client import MordorAPIClient
+from src.metrics import LIMITER_WAIT
+
+logger = logging.getLogger("batcher")
+
+# Flush a batch once it holds SUBMIT_BATCH_SIZE results or SUBMIT_BATCH_MS have passed since its first result
+SUBMIT_BATCH_SIZE = int(os.getenv("SUBMIT_BATCH_SIZE", "20"))
+SUBMIT_BATCH_MS = float(os.getenv("SUBMIT_BATCH_MS", "50"))
+
+
+class BatchSubmitter:
+    """
+    Collects results from concurrent workers and submits them in batches.
+
+    Each caller awaits submit() and receives the response for its own result. Batches go to the
+    batch endpoint; if the server does not have one, they are sent as pipelined single POSTs.
+    The batch size adapts: it grows by one while batches fill up and succeed, and halves when a
+    batch request fails.
+
+    A caller cancelled while its result waits for a batch has the result dropped; one cancelled
+    while its batch is already in flight gets the response passed to `on_abandoned` instead, so
+    the submission is still accounted for.
+    """
+
+    def __init__(
+        self,
+        client: MordorAPIClient,
+        rate_limiter: Optional[Any] = None,
+        max_batch_size: int = SUBMIT_BATCH_SIZE,
+        max_delay_ms: float = SUBMIT_BATCH_MS,
+        min_batch_size: int = 1,
+        on_abandoned: Optional[Callable[[dict, dict], Awaitable[None]]] = None
+    ):
+        """
+        Args:
+            client: API client used for the actual requests.
+            rate_limiter: optional limiter with an async acquire(); one permit is taken per HTTP request.
+            max_batch_size: upper bound on results per batch request.
+            max_delay_ms: longest a result waits for its batch to fill before being sent.
+            min_batch_size: lower bound the adaptive batch size can shrink to.
+            on_abandoned: coroutine function called with (result, response) for results sent after
+                their caller was cancelled.
+        """
+        self._client = client
+        self._rate_limiter = rate_limiter
+        self._max_batch_size = max(1, max_batch_size)
+        self._min_batch_size = max(1, min(min_batch_size, self._max_batch_size))
+        self._on_abandoned = on_abandoned
+        self._max_delay = max_delay_ms / 1000.0
+        self.batch_size = self._max_batch_size
+        self.batch_supported: Optional[bool] = None
+        self._pending: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._flusher: Optional[asyncio.Task] = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    async def submit(self, result: dict) -> dict:
+        """
+        Queue a result for submission and wait for its own API response.
+        """
+        if self._max_batch_size == 1:
+            return await self._submit_single(result)
+        if self._flusher is None or self._flusher.done():
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((result, future))
+        self._wakeup.set()
+        return await future
+
+    async def close(self) -> None:
+        """
+        Send anything still queued, wait for in-flight batches, and stop the flusher.
+        """
+        if self._flusher is not None and not self._flusher.done():
+            self._closing = True
+            self._wakeup.set()
+            await self._flusher
+        self._flusher = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def _wait(self, timeout: Optional[float] = None) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            while not self._pending:
+                if self._closing:
+                    return
+                await self._wait()
+            # Give the batch until the first item's deadline to fill up
+            deadline = time.monotonic() + self._max_delay
+            while len(self._pending) < self.batch_size and not self._closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                await self._wait(remaining)
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            # Callers cancelled while waiting (e.g. a shutdown drain) no longer want their result sent
+            batch = [(result, future) for result, future in batch if not future.cancelled()]
+            task = asyncio.create_task(self._send(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch: list) -> None:
+        if not batch:
+            return
+        results = [result for result, _ in batch]
+        full = len(batch) >= self.batch_size
+        try:
+            responses = None
+            if self.batch_supported is not False and len(batch) > 1:
+                await self._acquire()
+                responses = await self._client.submit_processed_results_batch(results)
+                if responses is None:
+                    logger.info("[batcher] Server has no batch endpoint; using pipelined single submits.")
+                    self.batch_supported = False
+                else:
+                    self.batch_supported = True
+                    self._adapt(full, failed=all("error" in r for r in responses if isinstance(r, dict)))
+            if responses is None:
+                responses = await asyncio.gather(*(self._submit_single(r) for r in results))
+        except Exception as e:
+            logger.error(f"[batcher] Batch submit failed: {e}")
+            responses = [{"error": str(e)} for _ in batch]
+        for (result, future), response in zip(batch, responses):
+            if future.cancelled():
+                await self._abandoned(result, response)
+            elif not future.done():
+                future.set_result(response)
+
+    async def _abandoned(self, result: dict, response: dict) -> None:
+        if self._on_abandoned is None:
+            return
+        try:
+            await self._on_abandoned(result, response)
+        except Exception as e:
+            logger.error(f"[batcher] Failed to record abandoned submit of {result.get('transcript_id')}: {e}")
+
+    async def _acquire(self) -> None:
+        if self._rate_limiter is not None:
+            start = time.perf_counter()
+            await self._rate_limiter.acquire()
+            LIMITER_WAIT.observe(time.perf_counter() - start, limiter="submit")
+
+    async def _submit_single(self, result: dict) -> dict:
+        await self._acquire()
+        return await self._client.submit_processed_result(result)
+
+    def _adapt(self, full: bool, failed: bool) -> None:
+        # AIMD: additive increase while batches fill and succeed, multiplicative decrease on failure
+        if failed:
+            self.batch_size = max(self._min_batch_size, self.batch_size // 2)
+        elif full:
+            self.batch_size = min(self._max_batch_size, self.batch_size + 1)
@@ -1,17 +1,99 @@
 # API client skeleton
+import os
 import aiohttp
 import asyncio
-import json
 import logging
+import random
+from collections import OrderedDict
+
+from src.api.ndjson import iter_ndjson
+from src.metrics import API_RESPONSES, THROTTLED
 
 logger = logging.getLogger("mordor-api")
 
+# Connection pool tuning for the long-lived client session
+API_CONNECTION_LIMIT = int(os.getenv("API_CONNECTION_LIMIT", "20"))
+API_KEEPALIVE_SECONDS = float(os.getenv("API_KEEPALIVE_SECONDS", "30"))
+API_DNS_CACHE_SECONDS = int(os.getenv("API_DNS_CACHE_SECONDS", "300"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "10"))
+API_REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "30"))
+
+# Stream reconnect policy: consecutive failures allowed and backoff bounds in seconds
+STREAM_MAX_RETRIES = int(os.getenv("STREAM_MAX_RETRIES", "10"))
+STREAM_BACKOFF_BASE = float(os.getenv("STREAM_BACKOFF_BASE", "0.5"))
+STREAM_BACKOFF_MAX = float(os.getenv("STREAM_BACKOFF_MAX", "30"))
+# Seconds the stream may stay silent before the connection is treated as stalled (0 waits forever)
+STREAM_READ_TIMEOUT = float(os.getenv("STREAM_READ_TIMEOUT", "60"))
+# Number of recent transcript ids remembered to drop replays after a reconnect
+STREAM_DEDUP_WINDOW = int(os.getenv("STREAM_DEDUP_WINDOW", "10000"))
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+AUTH_FAILURE_STATUSES = {401, 403}
+
+# Retry policy for 429/5xx on regular requests
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))
+API_BACKOFF_BASE = float(os.getenv("API_BACKOFF_BASE", "0.5"))
+API_BACKOFF_MAX = float(os.getenv("API_BACKOFF_MAX", "30"))
+
 class MordorAPIClient:
-    def __init__(self, api_key: str, base_url: str = "https://relaxing-needed-vulture.ngrok-free.app/api"):
+    """
+    Client for the Mount Doom API. Owns one pooled aiohttp session for its whole lifetime;
+    use it as an async context manager or call close() when done.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://relaxing-needed-vulture.ngrok-free.app/api",
+        connection_limit: int = API_CONNECTION_LIMIT,
+        keepalive_timeout: float = API_KEEPALIVE_SECONDS,
+        dns_cache_ttl: int = API_DNS_CACHE_SECONDS
+    ):
         self.api_key = api_key
         self.base_url = base_url.rstrip('/')
         self.token = None
         self.headers = {"Content-Type": "application/json"}
+        self._connection_limit = connection_limit
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._session = None
+        # Resume point for the transcript stream and recently streamed ids
+        self.stream_cursor = {"transcript_id": None, "timestamp": None}
+        self._streamed_ids = OrderedDict()
+        # Serializes token refreshes so concurrent 401s trigger a single /auth call
+        self._auth_lock = asyncio.Lock()
+        self._request_timeout = aiohttp.ClientTimeout(total=API_REQUEST_TIMEOUT, connect=API_CONNECT_TIMEOUT)
+
+    async def __aenter__(self) -> "MordorAPIClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared session, creating it (and its connector) on first use inside the running loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._connection_limit,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=self._dns_cache_ttl,
+                use_dns_cache=True
+            )
+            # No total timeout at session level: the transcript stream is long-lived
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=None, connect=API_CONNECT_TIMEOUT)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Close the pooled session and its connections.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def authenticate(self) -> bool:
         """
@@ -20,45 +102,160 @@ class MordorAPIClient:
         url = f"{self.base_url}/auth"
         payload = {"api_key": self.api_key}
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers={"Content-Type": "application/json"}) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        self.token = data.get("token")
-                        self.headers["Authorization"] = f"Bearer {self.token}"
-                        logger.info("Authentication successful.")
-                        return True
-                    text = await resp.text()
-                    logger.error(f"Auth failed {resp.status}: {text}")
-                    return False
-        except aiohttp.ClientError as e:
+            session = self._get_session()
+            async with session.post(url, json=payload, headers={"Content-Type": "application/json"}, timeout=self._request_timeout) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    self.token = data.get("token")
+                    self.headers["Authorization"] = f"Bearer {self.token}"
+                    logger.info("Authentication successful.")
+                    return True
+                text = await resp.text()
+                logger.error(f"Auth failed {resp.status}: {text}")
+                return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"Auth request error: {e}")
             return False
 
-    async def receive_transcripts(self):
+    async def receive_transcripts(
+        self,
+        max_retries: int = STREAM_MAX_RETRIES,
+        backoff_base: float = STREAM_BACKOFF_BASE,
+        backoff_max: float = STREAM_BACKOFF_MAX,
+        read_timeout: float = STREAM_READ_TIMEOUT
+    ):
         """
         Stream transcripts from the API as an async generator.
+
+        Dropped connections, stalls longer than `read_timeout` and retryable errors reconnect with
+        jittered exponential backoff, resuming after the last transcript seen (see stream_cursor).
+        Only a connection that delivers a new transcript counts as a success, so a server that keeps
+        accepting and dropping the stream still runs out of retries. Transcripts already yielded
+        are skipped if the server replays them. A clean end of stream ends the generator.
         """
         if not self.token:
             logger.error("Not authenticated. Call authenticate() first.")
             return
         url = f"{self.base_url}/v1/transcripts/stream"
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers) as resp:
+        timeout = aiohttp.ClientTimeout(total=None, connect=API_CONNECT_TIMEOUT, sock_read=read_timeout or None)
+        failures = 0
+        while True:
+            token = self.token
+            try:
+                session = self._get_session()
+                async with session.get(url, headers=self.headers, params=self._stream_params(), timeout=timeout) as resp:
                     if resp.status != 200:
                         text = await resp.text()
                         logger.error(f"Stream failed {resp.status}: {text}")
+                        if resp.status in AUTH_FAILURE_STATUSES:
+                            if not await self._refresh_token(token):
+                                return
+                        elif resp.status not in RETRYABLE_STATUSES:
+                            return
+                    else:
+                        async for transcript in iter_ndjson(resp.content):
+                            if not isinstance(transcript, dict):
+                                logger.error(f"Unexpected stream record: {transcript!r}")
+                                continue
+                            if self._already_streamed(transcript):
+                                logger.info(f"Skipping duplicate transcript {transcript.get('transcript_id')}")
+                                continue
+                            failures = 0
+                            yield transcript
+                        logger.info("Transcript stream ended.")
                         return
-                    async for line in resp.content:
-                        if not line:
-                            continue
-                        try:
-                            yield json.loads(line.decode('utf-8'))
-                        except json.JSONDecodeError as je:
-                            logger.error(f"JSON parse error: {je}")
-        except aiohttp.ClientError as e:
-            logger.error(f"Stream connection error: {e}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Stream connection error: {e}")
+
+            failures += 1
+            if failures > max_retries:
+                logger.error(f"Stream failed {failures} times in a row; giving up.")
+                return
+            # Full jitter keeps many clients from reconnecting in lockstep
+            delay = random.uniform(0, min(backoff_max, backoff_base * 2 ** failures))
+            logger.info(f"Reconnecting stream in {delay:.2f}s (attempt {failures}/{max_retries}) from {self.stream_cursor}")
+            await asyncio.sleep(delay)
+
+    def _stream_params(self) -> dict:
+        params = {}
+        if self.stream_cursor["transcript_id"]:
+            params["after"] = self.stream_cursor["transcript_id"]
+        if self.stream_cursor["timestamp"]:
+            params["since"] = self.stream_cursor["timestamp"]
+        return params
+
+    def _already_streamed(self, transcript: dict) -> bool:
+        """
+        Record a streamed transcript in the cursor and the bounded seen-set; True if it was seen before.
+        """
+        transcript_id = transcript.get("transcript_id")
+        if transcript_id is None:
+            return False
+        if transcript_id in self._streamed_ids:
+            return True
+        self._streamed_ids[transcript_id] = None
+        if len(self._streamed_ids) > STREAM_DEDUP_WINDOW:
+            self._streamed_ids.popitem(last=False)
+        self.stream_cursor = {
+            "transcript_id": transcript_id,
+            "timestamp": transcript.get("timestamp") or self.stream_cursor["timestamp"]
+        }
+        return False
+
+    async def _refresh_token(self, stale_token: str | None) -> bool:
+        """
+        Re-authenticate after the server rejected `stale_token`. Concurrent callers share one refresh:
+        whoever gets the lock second sees the token already changed and reuses it.
+        """
+        async with self._auth_lock:
+            if self.token != stale_token:
+                return True
+            logger.info("Token rejected; re-authenticating.")
+            return await self.authenticate()
+
+    def _retry_delay(self, resp: aiohttp.ClientResponse, attempt: int) -> float:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(API_BACKOFF_MAX, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt))
+
+    async def _request(self, method: str, path: str, payload: dict | None = None) -> tuple[int, object]:
+        """
+        Send an authenticated request and return (status, body), where body is the decoded JSON on 200
+        and the response text otherwise.
+
+        A 401/403 triggers one re-authentication and a transparent replay; 429 and 5xx responses are
+        retried up to API_MAX_RETRIES times with backoff, honouring Retry-After.
+        """
+        url = f"{self.base_url}{path}"
+        reauthenticated = False
+        attempt = 0
+        while True:
+            token = self.token
+            session = self._get_session()
+            async with session.request(method, url, headers=self.headers, json=payload, timeout=self._request_timeout) as resp:
+                API_RESPONSES.inc(path=path, status=resp.status)
+                if resp.status == 429:
+                    THROTTLED.inc(source="api")
+                if resp.status == 200:
+                    return resp.status, await resp.json()
+                text = await resp.text()
+                status = resp.status
+                delay = self._retry_delay(resp, attempt) if status in RETRYABLE_STATUSES else None
+
+            if status in AUTH_FAILURE_STATUSES and not reauthenticated:
+                reauthenticated = True
+                if await self._refresh_token(token):
+                    continue
+            elif delay is not None and attempt < API_MAX_RETRIES:
+                attempt += 1
+                logger.warning(f"{method} {path} returned {status}; retry {attempt}/{API_MAX_RETRIES} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            return status, text
 
     async def submit_processed_result(self, result: dict) -> dict:
         """
@@ -67,19 +264,41 @@ class MordorAPIClient:
         if not self.token:
             logger.error("Not authenticated. Call authenticate() first.")
             return {"error": "Not authenticated"}
-        url = f"{self.base_url}/v1/transcripts/process"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=self.headers, json=result) as resp:
-                    if resp.status != 200:
-                        text = await resp.text()
-                        logger.error(f"Submit failed {resp.status}: {text}")
-                        return {"error": text}
-                    return await resp.json()
-        except aiohttp.ClientError as e:
+            status, body = await self._request("POST", "/v1/transcripts/process", result)
+            if status != 200:
+                logger.error(f"Submit failed {status}: {body}")
+                return {"error": body, "status": status}
+            return body
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"Submit request error: {e}")
             return {"error": str(e)}
 
+    async def submit_processed_results_batch(self, results: list[dict]) -> list[dict] | None:
+        """
+        Submit several processed results in one request to the batch endpoint.
+        Returns one response per result, in order, or None if the server has no batch endpoint.
+        """
+        if not self.token:
+            logger.error("Not authenticated. Call authenticate() first.")
+            return [{"error": "Not authenticated"} for _ in results]
+        try:
+            status, body = await self._request("POST", "/v1/transcripts/process/batch", {"results": results})
+            if status in (404, 405):
+                logger.info(f"Batch endpoint not available ({status}).")
+                return None
+            if status != 200:
+                logger.error(f"Batch submit failed {status}: {body}")
+                return [{"error": body, "status": status} for _ in results]
+            responses = body.get("results") if isinstance(body, dict) else None
+            if not isinstance(responses, list) or len(responses) != len(results):
+                logger.error(f"Batch submit returned malformed response: {body}")
+                return [{"error": "Malformed batch response"} for _ in results]
+            return responses
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Batch submit request error: {e}")
+            return [{"error": str(e)} for _ in results]
+
     async def get_stats(self) -> dict:
         """
         Retrieve processing statistics from the API.
@@ -87,15 +306,12 @@ class MordorAPIClient:
         if not self.token:
             logger.error("Not authenticated. Call authenticate() first.")
             return {"error": "Not authenticated"}
-        url = f"{self.base_url}/v1/stats"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers) as resp:
-                    if resp.status != 200:
-                        text = await resp.text()
-                        logger.error(f"Stats failed {resp.status}: {text}")
-                        return {"error": text}
-                    return await resp.json()
-        except aiohttp.ClientError as e:
+            status, body = await self._request("GET", "/v1/stats")
+            if status != 200:
+                logger.error(f"Stats failed {status}: {body}")
+                return {"error": body, "status": status}
+            return body
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"Stats request error: {e}")
             return {"error": str(e)}
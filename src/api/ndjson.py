@@ -0,0 +1,113 @@
+# Incremental newline-delimited JSON decoder for the transcript stream
+import os
+import json
+import logging
+from typing import Any, AsyncIterator, List
+
+# Use orjson when installed: it parses bytes directly and is several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("ndjson")
+
+# Bytes read from the socket per chunk, and the largest single record accepted
+NDJSON_CHUNK_SIZE = int(os.getenv("NDJSON_CHUNK_SIZE", str(64 * 1024)))
+NDJSON_MAX_RECORD_BYTES = int(os.getenv("NDJSON_MAX_RECORD_BYTES", str(64 * 1024 * 1024)))
+
+
+def loads(data) -> Any:
+    """
+    Parse a JSON document from bytes (or a memoryview, with orjson) with the fastest available backend.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize a JSON document to bytes with the fastest available backend.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+class NDJSONDecoder:
+    """
+    Splits a byte stream into newline-delimited JSON records.
+
+    Chunks are appended to one reusable buffer and records are parsed straight from memoryview
+    slices of it, so lines are never decoded to str and records may span any number of chunks.
+    Malformed records are logged and skipped.
+    """
+
+    def __init__(self, max_record_bytes: int = NDJSON_MAX_RECORD_BYTES):
+        self._buffer = bytearray()
+        self._max_record_bytes = max_record_bytes
+        self._skipping = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Add a chunk and return every record completed by it.
+        """
+        records = []
+        search_from = len(self._buffer)
+        self._buffer += chunk
+        start = 0
+        view = memoryview(self._buffer)
+        try:
+            while True:
+                end = self._buffer.find(b"\n", max(start, search_from))
+                if end == -1:
+                    break
+                if self._skipping:
+                    # Tail of an oversized record that was already rejected
+                    self._skipping = False
+                else:
+                    self._parse(view[start:end], records)
+                start = end + 1
+        finally:
+            view.release()
+        del self._buffer[:start]
+
+        if len(self._buffer) > self._max_record_bytes:
+            logger.error(f"Dropping NDJSON record larger than {self._max_record_bytes} bytes")
+            self._buffer.clear()
+            self._skipping = True
+        return records
+
+    def flush(self) -> List[Any]:
+        """
+        Parse a final record that was not newline-terminated.
+        """
+        records = []
+        if self._buffer and not self._skipping:
+            with memoryview(self._buffer) as view:
+                self._parse(view, records)
+        self._buffer.clear()
+        self._skipping = False
+        return records
+
+    def _parse(self, line: memoryview, records: List[Any]) -> None:
+        # Blank keep-alive lines carry no record; only short lines need the (copying) check
+        if len(line) <= 2 and not bytes(line).strip():
+            return
+        try:
+            records.append(loads(line if orjson is not None else bytes(line)))
+        except ValueError as e:
+            logger.error(f"JSON parse error: {e}")
+
+
+async def iter_ndjson(content, chunk_size: int = NDJSON_CHUNK_SIZE) -> AsyncIterator[Any]:
+    """
+    Yield records from an aiohttp StreamReader (or anything with iter_chunked) without its line-length limit.
+    """
+    decoder = NDJSONDecoder()
+    async for chunk in content.iter_chunked(chunk_size):
+        for record in decoder.feed(chunk):
+            yield record
+    for record in decoder.flush():
+        yield record
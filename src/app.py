@@ -1,14 +1,32 @@
 import os
+import time
+import signal
 import asyncio
 import logging
 from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
 
 from src.api.client import MordorAPIClient
-from src.processing.summarizer import get_summary_from_transcript
-from src.processing.extractor import get_structured_data
-from src.processing.analyzer import analyze_insights
-from src.storage.db import save_raw_transcript, save_processed_result, save_error
+from src.api.batcher import BatchSubmitter
+from src.ratelimit import GCRALimiter
+from src.queue.queue import BackpressureQueue, create_queue
+from src.queue.autoscale import (
+    RETIRED, RetireSignal, WorkerPool, AUTOSCALE, AUTOSCALE_MIN_WORKERS, AUTOSCALE_MAX_WORKERS
+)
+from src.queue.durable import (
+    DurableQueue, DURABLE_QUEUE_PATH, create_durable_queue, save_checkpoint, load_checkpoint
+)
+from src.processing.pipeline import process_transcript
+from src.processing.llm import llm_cache
+from src.metrics import (
+    METRICS_PORT, QUEUE_DEPTH, QUEUE_BLOCKED_SECONDS, WORKERS_BUSY, TRANSCRIPTS, TRANSCRIPT_LATENCY, STAGE_LATENCY,
+    start_metrics_server
+)
+from src.storage.db import (
+    save_raw_transcript, save_processed_result, save_error, close_storage,
+    claim_transcript, complete_transcript, release_transcript
+)
 
 # Load environment
 load_dotenv()
@@ -22,57 +40,115 @@ if not CALLLIVE_API_KEY or not CALLLIVE_BASE_URL:
 tlogging = logging.getLogger()
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# Rate limiter for submissions
-class RateLimiter:
-    def __init__(self, max_calls: int, period: int):
-        self._semaphore = asyncio.Semaphore(max_calls)
-        self._max = max_calls
-        self._period = period
-        asyncio.create_task(self._refill())
-
-    async def _refill(self):
-        while True:
-            await asyncio.sleep(self._period)
-            to_release = self._max - self._semaphore._value
-            for _ in range(to_release):
-                self._semaphore.release()
-
-    async def acquire(self):
-        await self._semaphore.acquire()
-
-async def process_worker(client: MordorAPIClient, rate_limiter: RateLimiter, queue: asyncio.Queue):
+# Submission rate limit: SUBMIT_RATE_LIMIT permits per SUBMIT_RATE_PERIOD seconds, spaced evenly
+SUBMIT_RATE_LIMIT = int(os.getenv("SUBMIT_RATE_LIMIT", "100"))
+SUBMIT_RATE_PERIOD = float(os.getenv("SUBMIT_RATE_PERIOD", "60"))
+SUBMIT_BURST = int(os.getenv("SUBMIT_BURST", "10"))
+# Concurrent worker tasks per pipeline (the starting count when AUTOSCALE is on)
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "10"))
+# On SIGTERM/SIGINT: seconds to let in-flight work finish, and where unfinished transcripts are checkpointed
+SHUTDOWN_DEADLINE_SECONDS = float(os.getenv("SHUTDOWN_DEADLINE_SECONDS", "30"))
+CHECKPOINT_FILE = os.getenv("CHECKPOINT_FILE", "checkpoint.jsonl")
+# Seconds between queue depth / backpressure reports
+QUEUE_REPORT_SECONDS = float(os.getenv("QUEUE_REPORT_SECONDS", "30"))
+
+async def report_queue(queue: BackpressureQueue, interval: float = QUEUE_REPORT_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        m = queue.metrics()
+        logging.info(
+            f"[queue] depth={m['depth']} max_depth={m['max_depth']} paused={m['paused']} "
+            f"blocked_puts={m['blocked_puts']} blocked_put_seconds={m['blocked_put_seconds']:.3f} "
+            f"max_blocked_put_seconds={m['max_blocked_put_seconds']:.3f}"
+        )
+        for band, stats in m.get("bands", {}).items():
+            logging.info(
+                f"[queue] priority={band} completed={stats['completed']} "
+                f"avg_wait={stats['avg_wait_seconds']:.3f}s avg_latency={stats['avg_latency_seconds']:.3f}s "
+                f"max_latency={stats['max_latency_seconds']:.3f}s"
+            )
+
+def install_signal_handlers(stop: asyncio.Event, signals=(signal.SIGTERM, signal.SIGINT)) -> None:
+    """
+    Set `stop` when one of `signals` arrives, instead of dying mid-call.
+    """
+    loop = asyncio.get_running_loop()
+
+    def on_signal(sig):
+        logging.info(f"[shutdown] Received {signal.Signals(sig).name}; stopping intake")
+        stop.set()
+
+    for sig in signals:
+        try:
+            loop.add_signal_handler(sig, on_signal, sig)
+        except (NotImplementedError, RuntimeError):
+            # Windows, or not the main thread: fall back to the default handlers
+            pass
+
+async def process_worker(submitter: BatchSubmitter, queue: BackpressureQueue, interrupted: Optional[list] = None,
+                         retire: Optional[RetireSignal] = None):
     while True:
-        transcript = await queue.get()
+        # Shrinking pools retire idle workers, or busy ones once their transcript is done
+        transcript = await (queue.get() if retire is None else retire.get(queue))
+        if transcript is RETIRED:
+            return
         transcript_id = transcript.get("transcript_id")
-        logging.info(f"[worker] Processing transcript {transcript_id}")
+        claimed = False
+        finished = False
+        acked = False
+        handed_back = False
+        started = time.perf_counter()
+        WORKERS_BUSY.inc()
         try:
-            # 1. Save raw transcript
-            await save_raw_transcript(transcript)
+            # 0. Drop replays and duplicates before spending any LLM quota
+            if transcript_id is not None:
+                claimed = await claim_transcript(transcript_id)
+                if not claimed:
+                    logging.info(f"[worker] Skipping duplicate transcript {transcript_id}")
+                    TRANSCRIPTS.inc(outcome="duplicate")
+                    await queue.ack(transcript)
+                    acked = finished = True
+                    continue
+            logging.info(f"[worker] Processing transcript {transcript_id}")
 
-            # 2. Summarize, extract, analyze
-            turns = [turn["text"] for turn in transcript.get("transcript_text", [])]
-            summary = get_summary_from_transcript(turns)
-            structured = get_structured_data(turns, transcript.get("metadata", {}))
-            analysis = analyze_insights(turns, structured)
+            # 1. Save raw transcript
+            with STAGE_LATENCY.time(stage="store"):
+                await save_raw_transcript(transcript)
 
-            # 3. Build result payload
-            result = {
-                "transcript_id": transcript_id,
-                "summary": summary,
-                "structured_data": structured,
-                "analysis": {
-                    **analysis,
-                    "processing_timestamp": datetime.utcnow().isoformat() + "Z"
-                }
-            }
+            # 2. Summarize || extract -> analyze, and 3. build result payload
+            result, timings = await process_transcript(transcript)
+            logging.info(
+                f"[worker] Stage latency for {transcript_id}: "
+                + ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in timings.items())
+            )
 
             # 4. Save processed result
-            await save_processed_result(result)
+            with STAGE_LATENCY.time(stage="store"):
+                await save_processed_result(result)
 
-            # 5. Throttle and submit to API
-            await rate_limiter.acquire()
-            response = await client.submit_processed_result(result)
+            # 5. Submit to API (batched and throttled by the submitter)
+            with STAGE_LATENCY.time(stage="submit"):
+                response = await submitter.submit(result)
             logging.info(f"[worker] Submitted {transcript_id}: {response}")
+            # A failed submit leaves the claim to be released and the item unacked, so a replay can retry it
+            if not (isinstance(response, dict) and "error" in response):
+                if claimed:
+                    await complete_transcript(transcript_id)
+                    claimed = False
+                await queue.ack(transcript)
+                acked = True
+                TRANSCRIPTS.inc(outcome="processed")
+                TRANSCRIPT_LATENCY.observe(time.perf_counter() - started)
+            else:
+                TRANSCRIPTS.inc(outcome="submit_failed")
+            finished = True
+        except asyncio.CancelledError:
+            # Shutdown, not a pipeline error: hand the transcript back so it can be checkpointed;
+            # the queue keeps tracking it until the checkpoint releases it
+            if interrupted is not None and not finished:
+                interrupted.append(transcript)
+                handed_back = True
+            raise
         except Exception as e:
             # Log and record the error
             error_entry = {
@@ -81,34 +157,188 @@ async def process_worker(client: MordorAPIClient, rate_limiter: RateLimiter, que
                 "error": str(e)
             }
             await save_error(error_entry)
+            TRANSCRIPTS.inc(outcome="error")
             logging.error(f"[worker] Error processing {transcript_id}: {e}")
         finally:
+            WORKERS_BUSY.dec()
+            if claimed:
+                release_transcript(transcript_id)
+            if not acked and not handed_back:
+                queue.release(transcript)
             queue.task_done()
 
+async def complete_abandoned(result: dict, response: dict) -> None:
+    """
+    Record a transcript whose worker was cancelled while its batch was in flight, once the
+    submit succeeded, so a checkpointed or replayed copy is skipped instead of resubmitted.
+    """
+    transcript_id = result.get("transcript_id")
+    if transcript_id is not None and not (isinstance(response, dict) and "error" in response):
+        logging.info(f"[worker] Recording {transcript_id}, submitted after its worker was cancelled")
+        await complete_transcript(transcript_id)
+
+class Pipeline:
+    """
+    Queue, batching submitter and worker tasks running on one event loop. main() runs a single
+    pipeline; the supervisor runs one per shard process.
+    """
+
+    def __init__(self, client: MordorAPIClient, worker_count: int = WORKER_COUNT,
+                 durable_path: str = DURABLE_QUEUE_PATH, checkpoint_path: str = CHECKPOINT_FILE,
+                 min_workers: Optional[int] = None, max_workers: Optional[int] = None):
+        """
+        Args:
+            client: authenticated API client used for submissions.
+            worker_count: number of concurrent worker tasks (the starting count when autoscaling).
+            durable_path: SQLite work log for the queue; empty for an in-memory queue.
+            checkpoint_path: JSONL file unfinished transcripts are saved to on shutdown and restored from on start.
+            min_workers, max_workers: autoscaling bounds; by default AUTOSCALE_MIN/MAX_WORKERS when
+                AUTOSCALE is on, otherwise both are worker_count (a fixed pool).
+        """
+        self.checkpoint_path = checkpoint_path
+        self.interrupted = []
+        self.queue = create_durable_queue(durable_path) if durable_path else create_queue()
+        rate_limiter = GCRALimiter(SUBMIT_RATE_LIMIT, SUBMIT_RATE_PERIOD, burst=SUBMIT_BURST)
+        self.submitter = BatchSubmitter(client, rate_limiter, on_abandoned=complete_abandoned)
+        if min_workers is None:
+            min_workers = AUTOSCALE_MIN_WORKERS if AUTOSCALE else worker_count
+        if max_workers is None:
+            max_workers = AUTOSCALE_MAX_WORKERS if AUTOSCALE else worker_count
+        self.pool = WorkerPool(
+            self.queue,
+            lambda queue, retire: process_worker(self.submitter, queue, self.interrupted, retire),
+            min_workers, max_workers, initial_workers=worker_count
+        )
+        self.received = 0
+        self._reporter = None
+
+    async def start(self) -> None:
+        """
+        Launch the workers, then re-queue whatever a previous run received but never finished.
+        """
+        await self.pool.start()
+        QUEUE_DEPTH.set_function(self.queue.qsize)
+        QUEUE_BLOCKED_SECONDS.set_function(lambda: self.queue.blocked_put_seconds)
+        self._reporter = asyncio.create_task(report_queue(self.queue))
+        if isinstance(self.queue, DurableQueue):
+            await self.queue.recover()
+        restored = await asyncio.to_thread(load_checkpoint, self.checkpoint_path)
+        for transcript in restored:
+            await self.put(transcript)
+        if restored and isinstance(self.queue, DurableQueue):
+            # Now in the work log; otherwise the file stays until the shutdown checkpoint replaces it
+            await asyncio.to_thread(save_checkpoint, self.checkpoint_path, [])
+
+    async def put(self, transcript: dict) -> None:
+        """
+        Enqueue a transcript, blocking while the workers are behind.
+        """
+        self.received += 1
+        await self.queue.put(transcript)
+
+    async def finish(self, stop: Optional[asyncio.Event] = None,
+                     deadline: float = SHUTDOWN_DEADLINE_SECONDS) -> None:
+        """
+        Wait for every queued transcript, then stop the workers and close submitter and storage.
+
+        Once `stop` is set, work still queued or in flight gets at most `deadline` more seconds;
+        whatever is unfinished then is cancelled and checkpointed for the next start.
+        """
+        joiner = asyncio.create_task(self.queue.join())
+        waiters = {joiner}
+        if stop is not None:
+            waiters.add(asyncio.create_task(stop.wait()))
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        if not joiner.done():
+            logging.info(f"[shutdown] Draining in-flight work for up to {deadline}s")
+            try:
+                await asyncio.wait_for(asyncio.shield(joiner), deadline)
+            except asyncio.TimeoutError:
+                logging.warning("[shutdown] Drain deadline reached; cancelling unfinished work")
+        for waiter in waiters:
+            waiter.cancel()
+
+        await self.pool.close()
+        self._reporter.cancel()
+        await self._checkpoint()
+        logging.info(f"[queue] Final queue metrics: {self.queue.metrics()}")
+        logging.info(f"[llm] Response cache: {llm_cache.stats()}")
+        await self.submitter.close()
+        await close_storage()
+        if isinstance(self.queue, DurableQueue):
+            await self.queue.close()
+
+    async def _checkpoint(self) -> None:
+        interrupted = list(self.interrupted)
+        self.interrupted.clear()
+        if isinstance(self.queue, DurableQueue):
+            # Logged items are still unacked in the work log, which replays them on the next start;
+            # queued items are left in place, since taking them out would count as a processing attempt.
+            # Transcripts set aside before they reached the log go to the checkpoint file instead.
+            unlogged = [transcript for transcript in interrupted if not self.queue.logged(transcript)]
+            for transcript in interrupted:
+                self.queue.release(transcript)
+            logged = len(interrupted) - len(unlogged) + self.queue.qsize()
+            if logged:
+                logging.info(f"[shutdown] {logged} unfinished transcripts remain in the work log")
+            await asyncio.to_thread(save_checkpoint, self.checkpoint_path, unlogged)
+            return
+        for transcript in interrupted:
+            self.queue.release(transcript)
+        unfinished = interrupted
+        while not self.queue.empty():
+            transcript = self.queue.get_nowait()
+            self.queue.release(transcript)
+            unfinished.append(transcript)
+            self.queue.task_done()
+        # Replaces the checkpoint this run started from, or removes it when everything finished
+        await asyncio.to_thread(save_checkpoint, self.checkpoint_path, unfinished)
+
+    def metrics(self) -> dict:
+        return {
+            "received": self.received,
+            "workers": self.pool.running(),
+            "pool": self.pool.metrics(),
+            "queue": self.queue.metrics(),
+            "llm_cache": llm_cache.stats(),
+        }
+
 async def main():
-    # Initialize API client and authenticate
-    client = MordorAPIClient(CALLLIVE_API_KEY, CALLLIVE_BASE_URL)
-    if not await client.authenticate():
-        logging.error("Authentication failed. Exiting.")
-        return
-
-    # Setup queue and rate limiter
-    queue = asyncio.Queue()
-    rate_limiter = RateLimiter(100, 60)  # 100 submits per 60 seconds
-
-    # Launch worker tasks
-    workers = [asyncio.create_task(process_worker(client, rate_limiter, queue)) for _ in range(10)]
-
-    # Stream and enqueue transcripts
-    async for transcript in client.receive_transcripts():
-        tid = transcript.get("transcript_id")
-        logging.info(f"[main] Enqueuing transcript {tid}")
-        await queue.put(transcript)
-
-    # Wait for all tasks to finish
-    await queue.join()
-    for w in workers:
-        w.cancel()
+    # Initialize API client and authenticate; the client owns one pooled HTTP session
+    async with MordorAPIClient(CALLLIVE_API_KEY, CALLLIVE_BASE_URL) as client:
+        if not await client.authenticate():
+            logging.error("Authentication failed. Exiting.")
+            return
+
+        # Setup queue, rate limiter, batching submitter and workers
+        pipeline = Pipeline(client)
+        await pipeline.start()
+        metrics_server = await start_metrics_server(METRICS_PORT)
+        stop = asyncio.Event()
+        install_signal_handlers(stop)
+
+        # Stream and enqueue transcripts; put() blocks while the workers are behind, so
+        # the stream stops being read and the server sees TCP backpressure
+        async def intake():
+            async for transcript in client.receive_transcripts():
+                tid = transcript.get("transcript_id")
+                logging.info(f"[main] Enqueuing transcript {tid}")
+                await pipeline.put(transcript)
+
+        reader = asyncio.create_task(intake())
+        stopper = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait({reader, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            reader.cancel()
+            stopper.cancel()
+            await asyncio.gather(reader, stopper, return_exceptions=True)
+            # Wait for all tasks to finish, or for the drain deadline after a signal
+            await pipeline.finish(stop)
+            if metrics_server is not None:
+                await metrics_server.cleanup()
+        if not reader.cancelled() and reader.exception() is not None:
+            logging.error(f"[main] Transcript stream failed: {reader.exception()}")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,283 @@
+# In-process metrics registry with Prometheus text exposition
+import os
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("metrics")
+
+# Port for the pipeline's /metrics endpoint (0 disables it); supervisor shards serve on the following ports
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+# Latency buckets in seconds, from sub-millisecond storage writes up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base for labelled metrics. Values are kept per label-value tuple; updates are thread-safe.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, fn: Optional[Callable[[], float]]) -> None:
+        """
+        Read the (unlabelled) value from `fn` at scrape time instead of storing it.
+        """
+        self._function = fn
+
+    def value(self, **labels) -> float:
+        if self._function is not None and not labels:
+            return self._function()
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def total(self) -> float:
+        """
+        Sum of the value over every label combination.
+        """
+        if self._function is not None:
+            return self._function()
+        with self._lock:
+            return sum(self._values.values())
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float, str]]:
+        if self._function is not None:
+            try:
+                return [(self.name, (), float(self._function()), "")]
+            except Exception as e:
+                logger.error(f"[metrics] Failed to read {self.name}: {e}")
+                return []
+        with self._lock:
+            return [(self.name, key, value, "") for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, value, extra in self.samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down.
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observations over fixed buckets, with their sum and count.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the wall time spent in the with-block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> dict:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return {"count": 0, "sum": 0.0, "buckets": {}}
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + (float("inf"),), series[0]):
+                cumulative += count
+                buckets[bound] = cumulative
+            return {"count": series[2], "sum": series[1], "buckets": buckets}
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float, str]]:
+        samples = []
+        with self._lock:
+            items = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", key, cumulative, f'le="{_format_value(bound)}"'))
+            samples.append((f"{self.name}_sum", key, total, ""))
+            samples.append((f"{self.name}_count", key, count, ""))
+        return samples
+
+
+class Registry:
+    """
+    Named collection of metrics rendered together in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Pipeline metrics
+QUEUE_DEPTH = REGISTRY.gauge("pipeline_queue_depth", "Transcripts waiting in the work queue.")
+QUEUE_BLOCKED_SECONDS = REGISTRY.counter(
+    "pipeline_queue_blocked_put_seconds_total", "Total time the stream reader spent blocked on a full queue."
+)
+WORKERS = REGISTRY.gauge("pipeline_workers", "Worker tasks running.")
+WORKERS_BUSY = REGISTRY.gauge("pipeline_workers_busy", "Worker tasks currently handling a transcript.")
+TRANSCRIPTS = REGISTRY.counter("pipeline_transcripts_total", "Transcripts handled, by outcome.", ["outcome"])
+TRANSCRIPT_LATENCY = REGISTRY.histogram(
+    "pipeline_transcript_seconds", "Time a worker spends on one transcript, from pickup to submit."
+)
+WORKERS_TARGET = REGISTRY.gauge("pipeline_workers_target", "Worker count the autoscaler is steering towards.")
+SCALING_DECISIONS = REGISTRY.counter(
+    "pipeline_scaling_decisions_total", "Autoscaler decisions, by direction and reason.", ["direction", "reason"]
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "pipeline_stage_latency_seconds",
+    "Latency of each pipeline stage (summarize, extract, analyze, fused, store, submit).",
+    ["stage"]
+)
+LLM_FALLBACKS = REGISTRY.counter(
+    "pipeline_llm_fallbacks_total", "Stage results replaced by a fallback, by stage and reason.", ["stage", "reason"]
+)
+API_RESPONSES = REGISTRY.counter("api_responses_total", "Mordor API responses by path and HTTP status.", ["path", "status"])
+THROTTLED = REGISTRY.counter("throttled_responses_total", "429 / quota-exceeded responses, by source.", ["source"])
+LLM_CACHE_HITS = REGISTRY.counter("llm_cache_hits_total", "LLM responses served from the response cache.")
+LLM_CACHE_MISSES = REGISTRY.counter("llm_cache_misses_total", "LLM cache lookups that had to call the model.")
+LIMITER_WAIT = REGISTRY.histogram(
+    "rate_limiter_wait_seconds", "Time callers waited for a rate limiter permit.", ["limiter"]
+)
+
+
+async def start_metrics_server(port: int = METRICS_PORT, registry: Registry = REGISTRY, host: str = "0.0.0.0"):
+    """
+    Serve GET /metrics on `port` from the running event loop. Returns the aiohttp AppRunner (call
+    cleanup() on it to stop), or None when port is 0 or the server cannot bind.
+    """
+    if not port:
+        return None
+    from aiohttp import web
+
+    async def metrics(request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.error(f"[metrics] Could not serve /metrics on port {port}: {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"[metrics] Serving /metrics on port {port}")
+    return runner
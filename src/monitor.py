@@ -1,41 +1,37 @@
-import os
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 
-from src.storage.db import RAW_JSON_FILE, PROCESSED_JSON_FILE, ERRORS_FILE
+from src.storage.backends import create_backend
 
 app = FastAPI(title="Mount Doom Pipeline Monitor")
 
+# Same backend selection as the pipeline; counts are incremental (JSON) or cached estimates (Mongo),
+# so a scrape never re-reads the whole history
+backend = create_backend()
 
-def count_lines(path: str) -> int:
-    try:
-        with open(path, 'r') as f:
-            return sum(1 for _ in f)
-    except FileNotFoundError:
-        return 0
 
 @app.get("/monitor/raw_count")
 async def raw_count():
     """Number of raw transcripts saved so far."""
-    return JSONResponse({"raw_count": count_lines(RAW_JSON_FILE)})
+    return JSONResponse({"raw_count": await backend.count("raw")})
 
 @app.get("/monitor/processed_count")
 async def processed_count():
     """Number of processed results saved so far."""
-    return JSONResponse({"processed_count": count_lines(PROCESSED_JSON_FILE)})
+    return JSONResponse({"processed_count": await backend.count("processed")})
 
 @app.get("/monitor/pending")
 async def pending_count():
     """Approximate queue size: raw_count - processed_count."""
-    raw = count_lines(RAW_JSON_FILE)
-    processed = count_lines(PROCESSED_JSON_FILE)
+    raw = await backend.count("raw")
+    processed = await backend.count("processed")
     pending = max(0, raw - processed)
     return JSONResponse({"pending_count": pending})
 
 @app.get("/monitor/errors")
 async def error_count():
     """Number of pipeline errors logged so far."""
-    count = count_lines(ERRORS_FILE)
+    count = await backend.count("errors")
     return JSONResponse({"error_count": count})
 
 # To run:
@@ -11,6 +11,9 @@ try:
 except ImportError:
     genai = None
 
+from src.processing.llm import generate_text, generate_text_async
+from src.metrics import LLM_FALLBACKS
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("analyzer")
@@ -36,24 +39,26 @@ else:
     model = None
 
 
-def analyze_insights(transcript_turns: list[str], structured_data: dict) -> dict:
+def fallback_insights() -> dict:
     """
-    Analyze conversation insights: sentiment, interest level, preparedness, and action items.
+    Neutral analysis returned in mock mode and when the LLM call fails.
     """
-    # Mock fallback
-    if USE_MOCK_LLM:
-        logger.info("[analyzer] Mock analysis mode enabled; returning placeholder.")
-        return {
-            "sentiment": 0.5,
-            "interest_level": "medium",
-            "preparedness_level": "medium",
-            "action_items": []
-        }
+    return {
+        "sentiment": 0.5,
+        "interest_level": "medium",
+        "preparedness_level": "medium",
+        "action_items": []
+    }
+
+
+PROMPT_VERSION = "1"
 
+
+def _build_prompt(transcript_turns: list[str], structured_data: dict) -> str:
     conversation_text = "\n".join(transcript_turns)
     structured_json = json.dumps(structured_data)
 
-    prompt = f"""
+    return f"""
 You are an assistant that analyzes visitor conversations for a volcanic tourism bureau.
 Based on the conversation and structured visitor details, return ONLY a valid JSON object with:
 
@@ -71,21 +76,56 @@ Structured Visitor Details:
 Return just the JSON object with these keys, no additional text.
 """.strip()
 
+
+def _parse_response(response_text: str) -> dict:
+    cleaned = re.sub(r"^```json\s*|\s*```$", "", response_text.strip(), flags=re.MULTILINE).strip()
+    return json.loads(cleaned)
+
+
+def analyze_insights(transcript_turns: list[str], structured_data: dict) -> dict:
+    """
+    Analyze conversation insights: sentiment, interest level, preparedness, and action items.
+    """
+    # Mock fallback
+    if USE_MOCK_LLM:
+        logger.info("[analyzer] Mock analysis mode enabled; returning placeholder.")
+        return fallback_insights()
+
+    prompt = _build_prompt(transcript_turns, structured_data)
+
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        cleaned = re.sub(r"^```json\s*|\s*```$", "", response_text, flags=re.MULTILINE).strip()
-        return json.loads(cleaned)
+        response_text = generate_text(
+            model, prompt, "analyzer", template_version=PROMPT_VERSION, validate=_parse_response
+        )
+        return _parse_response(response_text)
 
     except Exception as e:
         logger.error(f"[analyzer] Analysis failed: {e}")
+        LLM_FALLBACKS.inc(stage="analyze", reason="error")
         # Safe fallback
-        return {
-            "sentiment": 0.5,
-            "interest_level": "medium",
-            "preparedness_level": "medium",
-            "action_items": []
-        }
+        return fallback_insights()
+
+
+async def analyze_insights_async(transcript_turns: list[str], structured_data: dict) -> dict:
+    """
+    Async variant of analyze_insights that does not block the event loop.
+    """
+    if USE_MOCK_LLM:
+        logger.info("[analyzer] Mock analysis mode enabled; returning placeholder.")
+        return fallback_insights()
+
+    prompt = _build_prompt(transcript_turns, structured_data)
+
+    try:
+        response_text = await generate_text_async(
+            model, prompt, "analyzer", template_version=PROMPT_VERSION, validate=_parse_response
+        )
+        return _parse_response(response_text)
+
+    except Exception as e:
+        logger.error(f"[analyzer] Analysis failed: {e}")
+        LLM_FALLBACKS.inc(stage="analyze", reason="error")
+        return fallback_insights()
 
 
 # Example usage
@@ -0,0 +1,218 @@
+# Content-addressed cache of LLM responses: in-memory LRU with an optional SQLite tier
+import os
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger("llm_cache")
+
+# Memory tier size and entry lifetime; LLM_CACHE_PATH enables the on-disk tier (SQLite) with its own size cap
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+LLM_CACHE_MAX_DISK_ENTRIES = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "100000"))
+
+# Disk-tier pruning (expired rows, then least recently used over the cap) runs every this many sets
+_PRUNE_EVERY = 100
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Collapse whitespace so prompts differing only in spacing or line endings share an entry.
+    """
+    return " ".join(prompt.split())
+
+
+def cache_key(model_name: str, stage: str, template_version: str, prompt: str) -> str:
+    """
+    Hash of everything that determines a response: model, stage, prompt template version and
+    the normalized prompt (which embeds the conversation text).
+    """
+    material = "\x1f".join((model_name, stage, template_version, normalize_prompt(prompt)))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier response cache keyed by cache_key().
+
+    The memory tier is an LRU of at most max_entries; the optional disk tier is a SQLite table
+    that survives restarts and is pruned to max_disk_entries. Both honour ttl_seconds, and disk
+    hits are promoted to memory. Thread-safe, so the blocking and async call paths share it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        path: str = LLM_CACHE_PATH,
+        max_disk_entries: int = LLM_CACHE_MAX_DISK_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            max_entries: entries kept in memory.
+            ttl_seconds: lifetime of an entry in either tier.
+            path: SQLite file for the disk tier; empty for memory only.
+            max_disk_entries: rows kept in the disk tier.
+            enabled: False turns every lookup into a miss and every store into a no-op.
+            clock: wall-clock source (entries on disk outlive the process).
+        """
+        self.enabled = enabled
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl_seconds
+        self._path = path
+        self._max_disk_entries = max_disk_entries
+        self._clock = clock
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._sets_since_prune = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        if not self._path:
+            return None
+        if self._conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the cached response for key, or None on a miss. Blocking when the disk tier is on.
+        """
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+                self.expirations += 1
+
+            conn = self._disk()
+            if conn is not None:
+                try:
+                    row = conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                    if row is not None and row[1] > now:
+                        conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        conn.commit()
+                        self._remember(key, row[0], row[1])
+                        self.disk_hits += 1
+                        return row[0]
+                    if row is not None:
+                        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        conn.commit()
+                        self.expirations += 1
+                except sqlite3.Error as e:
+                    logger.error(f"[llm_cache] Disk cache read failed: {e}")
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response in memory and, when enabled, on disk. Blocking when the disk tier is on.
+        """
+        if not self.enabled:
+            return
+        now = self._clock()
+        expires_at = now + self._ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.sets += 1
+            conn = self._disk()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now)
+                )
+                self._sets_since_prune += 1
+                if self._sets_since_prune >= _PRUNE_EVERY:
+                    self._prune(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"[llm_cache] Disk cache write failed: {e}")
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        self._sets_since_prune = 0
+        conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_disk_entries,)
+        )
+
+    async def get_async(self, key: str) -> Optional[str]:
+        if self._path:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def set_async(self, key: str, value: str) -> None:
+        if self._path:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def clear(self) -> None:
+        """
+        Drop every entry from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+            conn = self._disk()
+            if conn is not None:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters and current memory-tier size.
+        """
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._memory),
+        }
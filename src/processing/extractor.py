@@ -12,6 +12,9 @@ except ImportError:
 
 from typing import List, Dict, Any
 
+from src.processing.llm import generate_text, generate_text_async
+from src.metrics import LLM_FALLBACKS
+
 # Load environment variables
 load_dotenv()
 
@@ -36,32 +39,43 @@ else:
     model = None
 
 
-def get_structured_data(transcript_turns: List[str], metadata: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Extract structured visitor details and questionnaire completion status.
+def _mock_structured_data(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "visitor_details": {
+            "ring_bearer": False,
+            "gear_prepared": False,
+            "hazard_knowledge": "none",
+            "fitness_level": "medium",
+            "permit_status": metadata.get("mount_doom_permit_status", "pending")
+        },
+        "questionnaire_completion": metadata.get("questionnaire", {})
+    }
 
-    Returns keys:
-    - visitor_details
-    - questionnaire_completion
+
+def fallback_structured_data(metadata: Dict[str, Any]) -> Dict[str, Any]:
     """
-    # Mock fallback
-    if USE_MOCK_LLM:
-        logger.info("[extractor] Mock extractor mode enabled; returning placeholder.")
-        return {
-            "visitor_details": {
-                "ring_bearer": False,
-                "gear_prepared": False,
-                "hazard_knowledge": "none",
-                "fitness_level": "medium",
-                "permit_status": metadata.get("mount_doom_permit_status", "pending")
-            },
-            "questionnaire_completion": metadata.get("questionnaire", {})
-        }
+    Structured data returned when the LLM call fails: unknown details, metadata echoed back.
+    """
+    return {
+        "visitor_details": {
+            "ring_bearer": None,
+            "gear_prepared": None,
+            "hazard_knowledge": None,
+            "fitness_level": None,
+            "permit_status": metadata.get("mount_doom_permit_status", "pending")
+        },
+        "questionnaire_completion": metadata.get("questionnaire", {})
+    }
+
 
+PROMPT_VERSION = "1"
+
+
+def _build_prompt(transcript_turns: List[str], metadata: Dict[str, Any]) -> str:
     full_text = "\n".join(transcript_turns)
     questionnaire_json = json.dumps(metadata.get("questionnaire", {}), indent=2)
 
-    prompt = f"""
+    return f"""
 You are an expert data extractor for a volcanic tourism bureau.
 Extract EXACTLY and ONLY a valid JSON object with two keys:
 
@@ -82,25 +96,60 @@ Conversation:
 Return only the JSON object without any additional text, markdown, or comments.
 """.strip()
 
+
+def _parse_response(response_text: str) -> Dict[str, Any]:
+    cleaned = re.sub(r"^```(?:json)?|```$", "", response_text.strip(), flags=re.MULTILINE).strip()
+    return json.loads(cleaned)
+
+
+def get_structured_data(transcript_turns: List[str], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract structured visitor details and questionnaire completion status.
+
+    Returns keys:
+    - visitor_details
+    - questionnaire_completion
+    """
+    # Mock fallback
+    if USE_MOCK_LLM:
+        logger.info("[extractor] Mock extractor mode enabled; returning placeholder.")
+        return _mock_structured_data(metadata)
+
+    prompt = _build_prompt(transcript_turns, metadata)
+
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        cleaned = re.sub(r"^```(?:json)?|```$", "", response_text, flags=re.MULTILINE).strip()
-        return json.loads(cleaned)
+        response_text = generate_text(
+            model, prompt, "extractor", template_version=PROMPT_VERSION, validate=_parse_response
+        )
+        return _parse_response(response_text)
 
     except Exception as e:
         logger.error(f"[extractor] Gemini extraction failed: {e}")
+        LLM_FALLBACKS.inc(stage="extract", reason="error")
         # Graceful fallback
-        return {
-            "visitor_details": {
-                "ring_bearer": None,
-                "gear_prepared": None,
-                "hazard_knowledge": None,
-                "fitness_level": None,
-                "permit_status": metadata.get("mount_doom_permit_status", "pending")
-            },
-            "questionnaire_completion": metadata.get("questionnaire", {})
-        }
+        return fallback_structured_data(metadata)
+
+
+async def get_structured_data_async(transcript_turns: List[str], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async variant of get_structured_data that does not block the event loop.
+    """
+    if USE_MOCK_LLM:
+        logger.info("[extractor] Mock extractor mode enabled; returning placeholder.")
+        return _mock_structured_data(metadata)
+
+    prompt = _build_prompt(transcript_turns, metadata)
+
+    try:
+        response_text = await generate_text_async(
+            model, prompt, "extractor", template_version=PROMPT_VERSION, validate=_parse_response
+        )
+        return _parse_response(response_text)
+
+    except Exception as e:
+        logger.error(f"[extractor] Gemini extraction failed: {e}")
+        LLM_FALLBACKS.inc(stage="extract", reason="error")
+        return fallback_structured_data(metadata)
 
 # Example usage
 if __name__ == "__main__":
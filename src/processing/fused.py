@@ -0,0 +1,149 @@
+# Fused mode: summary, structured data and analysis from a single LLM call
+import os
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Attempt to import the Google Gemini SDK; allow running in mock mode without it
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+from src.processing.llm import generate_text_async
+from src.metrics import LLM_FALLBACKS
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger("fused")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Feature flags: mock mode as in the per-stage modules, and opt-in fused mode
+USE_MOCK_LLM = os.getenv("USE_MOCK_LLM", "false").lower() == "true"
+USE_FUSED_LLM = os.getenv("USE_FUSED_LLM", "false").lower() == "true"
+
+# Gemini setup only if mock is off
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+if not USE_MOCK_LLM:
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not set in .env file")
+    if not genai:
+        raise ImportError("google-generativeai SDK is required for fused processing")
+    genai.configure(api_key=GEMINI_API_KEY)
+    # Use Gemini 2.0 Flash Lite for higher rate limits
+    model = genai.GenerativeModel("gemini-2.0-flash-lite")
+else:
+    model = None
+
+LEVELS = ("low", "medium", "high")
+
+
+PROMPT_VERSION = "1"
+
+
+def _build_prompt(transcript_turns: List[str], metadata: Dict[str, Any]) -> str:
+    full_text = "\n".join(transcript_turns)
+    questionnaire_json = json.dumps(metadata.get("questionnaire", {}), indent=2)
+
+    return f"""
+You are an assistant for a volcanic tourism bureau that summarizes, extracts and analyzes visitor conversations.
+Return EXACTLY and ONLY a valid JSON object with three keys:
+
+1. summary: a 3-4 sentence summary of the conversation, focusing on visitor intent, concerns, and suggested next steps.
+
+2. structured_data: {{
+     "visitor_details": {{
+       "ring_bearer": true or false,
+       "gear_prepared": true or false,
+       "hazard_knowledge": "none" or "limited" or "basic" or "advanced",
+       "fitness_level": "low" or "medium" or "high",
+       "permit_status": "pending" or "approved" or "denied"
+     }},
+     "questionnaire_completion": copy the JSON object below exactly as-is with boolean values:
+{questionnaire_json}
+   }}
+
+3. analysis: {{
+     "sentiment": a float between 0.0 (negative) and 1.0 (positive),
+     "interest_level": "low", "medium", or "high",
+     "preparedness_level": "low", "medium", or "high",
+     "action_items": an array of brief follow-up action items (strings)
+   }}
+
+Conversation:
+{full_text}
+
+Return only the JSON object without any additional text, markdown, or comments.
+""".strip()
+
+
+def validate_fused_response(data: Any) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """
+    Check a parsed fused response against the per-stage output shapes.
+
+    Returns:
+        (summary, structured_data, analysis)
+
+    Raises:
+        ValueError: if any part is missing or malformed.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("response is not a JSON object")
+
+    summary = data.get("summary")
+    if not isinstance(summary, str) or not summary.strip():
+        raise ValueError("summary missing or empty")
+
+    structured = data.get("structured_data")
+    if not isinstance(structured, dict):
+        raise ValueError("structured_data missing")
+    if not isinstance(structured.get("visitor_details"), dict):
+        raise ValueError("structured_data.visitor_details missing")
+    if not isinstance(structured.get("questionnaire_completion"), dict):
+        raise ValueError("structured_data.questionnaire_completion missing")
+
+    analysis = data.get("analysis")
+    if not isinstance(analysis, dict):
+        raise ValueError("analysis missing")
+    sentiment = analysis.get("sentiment")
+    if isinstance(sentiment, bool) or not isinstance(sentiment, (int, float)) or not 0.0 <= sentiment <= 1.0:
+        raise ValueError("analysis.sentiment must be a float between 0.0 and 1.0")
+    for key in ("interest_level", "preparedness_level"):
+        if analysis.get(key) not in LEVELS:
+            raise ValueError(f"analysis.{key} must be one of {LEVELS}")
+    action_items = analysis.get("action_items")
+    if not isinstance(action_items, list) or not all(isinstance(item, str) for item in action_items):
+        raise ValueError("analysis.action_items must be a list of strings")
+
+    return summary.strip(), structured, analysis
+
+
+def _parse_fused(response_text: str) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    cleaned = re.sub(r"^```(?:json)?|```$", "", response_text.strip(), flags=re.MULTILINE).strip()
+    return validate_fused_response(json.loads(cleaned))
+
+
+async def process_fused_async(
+    transcript_turns: List[str],
+    metadata: Dict[str, Any]
+) -> Optional[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """
+    Produce summary, structured data and analysis with one LLM call.
+    Returns None if the call fails or the response does not validate, so callers can fall back to per-stage calls.
+    """
+    prompt = _build_prompt(transcript_turns, metadata)
+
+    try:
+        response_text = await generate_text_async(
+            model, prompt, "fused", template_version=PROMPT_VERSION, validate=_parse_fused
+        )
+        return _parse_fused(response_text)
+
+    except Exception as e:
+        logger.error(f"[fused] Fused processing failed, falling back to per-stage calls: {e}")
+        LLM_FALLBACKS.inc(stage="fused", reason="error")
+        return None
@@ -0,0 +1,185 @@
+# Shared non-blocking, rate-limited Gemini call path
+import os
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.ratelimit import TokenBucketLimiter
+from src.processing.cache import LLMCache, cache_key
+from src.metrics import LIMITER_WAIT, LLM_CACHE_HITS, LLM_CACHE_MISSES, THROTTLED
+
+logger = logging.getLogger("llm")
+
+# Upper bound on blocking generate_content calls running at once in worker threads
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "10"))
+
+# Gemini quota shared by every processing stage (gemini-2.0-flash-lite: 30 req/min)
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "30"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))
+# Tokens reserved for the response on top of the prompt estimate
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "256"))
+# Retries after the API reports a quota error (HTTP 429 / ResourceExhausted)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+llm_limiter = TokenBucketLimiter(GEMINI_RPM, GEMINI_TPM)
+llm_cache = LLMCache()
+LLM_CACHE_HITS.set_function(lambda: llm_cache.memory_hits + llm_cache.disk_hits)
+LLM_CACHE_MISSES.set_function(lambda: llm_cache.misses)
+
+_executor = None
+# Async calls currently running per cache key, so concurrent identical prompts share one request
+_in_flight: dict = {}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+    return _executor
+
+
+def estimate_tokens(prompt: str) -> int:
+    """
+    Rough token count for quota accounting: ~4 characters per token plus the expected response.
+    """
+    return len(prompt) // 4 + LLM_OUTPUT_TOKEN_ESTIMATE
+
+
+def _is_quota_error(exc: Exception) -> bool:
+    return (
+        type(exc).__name__ in ("ResourceExhausted", "TooManyRequests")
+        or getattr(exc, "code", None) == 429
+        or "429" in str(exc)
+    )
+
+
+def _model_name(model) -> str:
+    # GenerativeModel exposes model_name; anything else is keyed by its own identity
+    return getattr(model, "model_name", None) or repr(model)
+
+
+def _cacheable(text: str, validate: Optional[Callable[[str], Any]], stage: str) -> bool:
+    # Responses the caller could not use are returned as usual but never cached
+    if validate is None:
+        return bool(text and text.strip())
+    try:
+        validate(text)
+        return True
+    except Exception as e:
+        logger.info(f"[{stage}] Not caching unusable LLM response: {e}")
+        return False
+
+
+def generate_text(
+    model,
+    prompt: str,
+    stage: str,
+    template_version: str = "1",
+    validate: Optional[Callable[[str], Any]] = None
+) -> str:
+    """
+    Blocking, rate-limited, cached LLM call for the synchronous processing functions.
+
+    Args:
+        template_version: version of the caller's prompt template, part of the cache key; bump on template changes.
+        validate: raises if a response is unusable, which keeps it out of the cache.
+    """
+    key = cache_key(_model_name(model), stage, template_version, prompt)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        logger.info(f"[{stage}] LLM cache hit")
+        return cached
+    text = _generate_blocking(model, prompt, stage)
+    if _cacheable(text, validate, stage):
+        llm_cache.set(key, text)
+    return text
+
+
+def _generate_blocking(model, prompt: str, stage: str) -> str:
+    tokens = estimate_tokens(prompt)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        waited = llm_limiter.acquire_blocking(tokens)
+        LIMITER_WAIT.observe(waited, limiter="gemini")
+        if waited > 0:
+            logger.info(f"[{stage}] Waited {waited:.2f}s for LLM quota")
+        try:
+            return model.generate_content(prompt).text
+        except Exception as e:
+            if _is_quota_error(e):
+                THROTTLED.inc(source="gemini")
+            if attempt == LLM_MAX_RETRIES or not _is_quota_error(e):
+                raise
+            logger.warning(f"[{stage}] LLM quota exceeded; backing off and retrying: {e}")
+            llm_limiter.drain()
+
+
+async def generate_text_async(
+    model,
+    prompt: str,
+    stage: str,
+    template_version: str = "1",
+    validate: Optional[Callable[[str], Any]] = None
+) -> str:
+    """
+    Run a single LLM call without blocking the event loop and return the response text.
+
+    Answers from the response cache when it can; concurrent callers with the same prompt share
+    one request, which keeps running (and gets cached) even if the caller that started it is
+    cancelled by a stage timeout.
+
+    Args:
+        template_version: version of the caller's prompt template, part of the cache key; bump on template changes.
+        validate: raises if a response is unusable, which keeps it out of the cache.
+    """
+    key = cache_key(_model_name(model), stage, template_version, prompt)
+    cached = await llm_cache.get_async(key)
+    if cached is not None:
+        logger.info(f"[{stage}] LLM cache hit")
+        return cached
+
+    task = _in_flight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_generate_and_cache(key, model, prompt, stage, validate))
+        _in_flight[key] = task
+        task.add_done_callback(lambda t: _in_flight.pop(key, None) if _in_flight.get(key) is t else None)
+        # Retrieve the outcome even if every caller has gone, so failures are not reported as unhandled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    else:
+        logger.info(f"[{stage}] Joining identical in-flight LLM request")
+    return await asyncio.shield(task)
+
+
+async def _generate_and_cache(key: str, model, prompt: str, stage: str, validate) -> str:
+    text = await _generate_async(model, prompt, stage)
+    if _cacheable(text, validate, stage):
+        await llm_cache.set_async(key, text)
+    return text
+
+
+async def _generate_async(model, prompt: str, stage: str) -> str:
+    tokens = estimate_tokens(prompt)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        waited = await llm_limiter.acquire(tokens)
+        LIMITER_WAIT.observe(waited, limiter="gemini")
+        if waited > 0:
+            logger.info(f"[{stage}] Waited {waited:.2f}s for LLM quota")
+        start = time.perf_counter()
+        try:
+            generate_async = getattr(model, "generate_content_async", None)
+            if generate_async is not None:
+                response = await generate_async(prompt)
+            else:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(_get_executor(), model.generate_content, prompt)
+            return response.text
+        except Exception as e:
+            if _is_quota_error(e):
+                THROTTLED.inc(source="gemini")
+            if attempt == LLM_MAX_RETRIES or not _is_quota_error(e):
+                raise
+            logger.warning(f"[{stage}] LLM quota exceeded; backing off and retrying: {e}")
+            llm_limiter.drain()
+        finally:
+            logger.info(f"[{stage}] LLM call took {time.perf_counter() - start:.3f}s")
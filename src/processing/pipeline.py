@@ -0,0 +1,140 @@
+# Per-transcript stage DAG: summarize runs alongside extract -> analyze
+import os
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.processing.summarizer import get_summary_from_transcript_async, FALLBACK_SUMMARY
+from src.processing.extractor import get_structured_data_async, fallback_structured_data
+from src.processing.analyzer import analyze_insights_async, fallback_insights
+from src.processing import fused
+from src.metrics import STAGE_LATENCY, LLM_FALLBACKS
+
+logger = logging.getLogger("pipeline")
+
+# Per-stage timeouts in seconds; a stage that overruns is cancelled and replaced by its fallback
+STAGE_TIMEOUT_SECONDS = float(os.getenv("STAGE_TIMEOUT_SECONDS", "60"))
+STAGE_TIMEOUTS = {
+    "summarize": float(os.getenv("SUMMARIZE_TIMEOUT_SECONDS", STAGE_TIMEOUT_SECONDS)),
+    "extract": float(os.getenv("EXTRACT_TIMEOUT_SECONDS", STAGE_TIMEOUT_SECONDS)),
+    "analyze": float(os.getenv("ANALYZE_TIMEOUT_SECONDS", STAGE_TIMEOUT_SECONDS)),
+    "fused": float(os.getenv("FUSED_TIMEOUT_SECONDS", STAGE_TIMEOUT_SECONDS)),
+}
+
+
+async def _run_stage(
+    stage: str,
+    coro: Awaitable[Any],
+    timeout: float,
+    fallback: Callable[[], Any],
+    timings: Dict[str, float]
+) -> Any:
+    """
+    Await one stage under its timeout, recording its latency and substituting the fallback on timeout.
+    """
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"[pipeline] Stage {stage} timed out after {timeout}s; using fallback.")
+        LLM_FALLBACKS.inc(stage=stage, reason="timeout")
+        return fallback()
+    finally:
+        timings[stage] = time.perf_counter() - start
+        STAGE_LATENCY.observe(timings[stage], stage=stage)
+
+
+async def run_stages(
+    transcript_turns: list[str],
+    metadata: Dict[str, Any],
+    timeouts: Optional[Dict[str, float]] = None
+) -> Tuple[str, Dict[str, Any], Dict[str, Any], Dict[str, float]]:
+    """
+    Run summarize concurrently with extract, starting analyze as soon as extract finishes.
+
+    Returns:
+        (summary, structured_data, analysis, timings) where timings maps stage name to seconds.
+    """
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+    timings: Dict[str, float] = {}
+
+    async def extract_then_analyze():
+        structured = await _run_stage(
+            "extract",
+            get_structured_data_async(transcript_turns, metadata),
+            timeouts["extract"],
+            lambda: fallback_structured_data(metadata),
+            timings
+        )
+        analysis = await _run_stage(
+            "analyze",
+            analyze_insights_async(transcript_turns, structured),
+            timeouts["analyze"],
+            fallback_insights,
+            timings
+        )
+        return structured, analysis
+
+    summary_task = asyncio.create_task(_run_stage(
+        "summarize",
+        get_summary_from_transcript_async(transcript_turns),
+        timeouts["summarize"],
+        lambda: FALLBACK_SUMMARY,
+        timings
+    ))
+    branch_task = asyncio.create_task(extract_then_analyze())
+    try:
+        summary, (structured, analysis) = await asyncio.gather(summary_task, branch_task)
+    finally:
+        # If we were cancelled or one branch raised, don't leave the sibling running
+        for task in (summary_task, branch_task):
+            if not task.done():
+                task.cancel()
+    return summary, structured, analysis, timings
+
+
+async def process_transcript(
+    transcript: Dict[str, Any],
+    timeouts: Optional[Dict[str, float]] = None
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run all LLM stages for a transcript and build the result payload submitted to the API.
+    In fused mode a single combined call is tried first, falling back to the per-stage DAG.
+
+    Returns:
+        (result, timings)
+    """
+    turns = [turn["text"] for turn in transcript.get("transcript_text", [])]
+    metadata = transcript.get("metadata", {})
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+
+    fused_output = None
+    fused_timings: Dict[str, float] = {}
+    if fused.USE_FUSED_LLM and not fused.USE_MOCK_LLM:
+        fused_output = await _run_stage(
+            "fused",
+            fused.process_fused_async(turns, metadata),
+            timeouts["fused"],
+            lambda: None,
+            fused_timings
+        )
+
+    if fused_output is not None:
+        summary, structured, analysis = fused_output
+        timings = fused_timings
+    else:
+        summary, structured, analysis, timings = await run_stages(turns, metadata, timeouts)
+        timings.update(fused_timings)
+
+    result = {
+        "transcript_id": transcript.get("transcript_id"),
+        "summary": summary,
+        "structured_data": structured,
+        "analysis": {
+            **analysis,
+            "processing_timestamp": datetime.utcnow().isoformat() + "Z"
+        }
+    }
+    return result, timings
@@ -8,6 +8,9 @@ try:
 except ImportError:
     genai = None
 
+from src.processing.llm import generate_text, generate_text_async
+from src.metrics import LLM_FALLBACKS
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -32,19 +35,18 @@ else:
     genai_model = None
 
 
-def get_summary_from_transcript(transcript_turns: list[str]) -> str:
-    """
-    Generate a concise summary of a customer-agent conversation.
-    Falls back to mock text or error message if LLM fails.
-    """
-    # Mock mode for rapid local development and to avoid API limits
-    if USE_MOCK_LLM:
-        logger.info("[summarizer] Mock summary mode enabled; returning placeholder.")
-        return "Customer expressed interest in Mount Doom hike and requested booking details."
+FALLBACK_SUMMARY = "Summary unavailable due to an error."
+MOCK_SUMMARY = "Customer expressed interest in Mount Doom hike and requested booking details."
 
+
+# Prompt template version, part of the LLM cache key: bump it whenever _build_prompt changes
+PROMPT_VERSION = "1"
+
+
+def _build_prompt(transcript_turns: list[str]) -> str:
     # Combine transcript lines into a single text block
     full_text = "\n".join(transcript_turns)
-    prompt = f"""
+    return f"""
 You are a helpful travel assistant for a volcanic tourism bureau.
 Summarize the following conversation in 3-4 sentences, focusing on visitor intent, concerns, and suggested next steps.
 
@@ -54,14 +56,47 @@ Conversation:
 Return only the summary text without additional formatting.
 """.strip()
 
+
+def get_summary_from_transcript(transcript_turns: list[str]) -> str:
+    """
+    Generate a concise summary of a customer-agent conversation.
+    Falls back to mock text or error message if LLM fails.
+    """
+    # Mock mode for rapid local development and to avoid API limits
+    if USE_MOCK_LLM:
+        logger.info("[summarizer] Mock summary mode enabled; returning placeholder.")
+        return MOCK_SUMMARY
+
+    prompt = _build_prompt(transcript_turns)
+
     try:
-        response = genai_model.generate_content(prompt)
-        summary = response.text.strip()
+        summary = generate_text(genai_model, prompt, "summarizer", template_version=PROMPT_VERSION).strip()
         return summary
 
     except Exception as e:
         logger.error(f"[summarizer] Summarization failed: {e}")
-        return "Summary unavailable due to an error."
+        LLM_FALLBACKS.inc(stage="summarize", reason="error")
+        return FALLBACK_SUMMARY
+
+
+async def get_summary_from_transcript_async(transcript_turns: list[str]) -> str:
+    """
+    Async variant of get_summary_from_transcript that does not block the event loop.
+    """
+    if USE_MOCK_LLM:
+        logger.info("[summarizer] Mock summary mode enabled; returning placeholder.")
+        return MOCK_SUMMARY
+
+    prompt = _build_prompt(transcript_turns)
+
+    try:
+        text = await generate_text_async(genai_model, prompt, "summarizer", template_version=PROMPT_VERSION)
+        return text.strip()
+
+    except Exception as e:
+        logger.error(f"[summarizer] Summarization failed: {e}")
+        LLM_FALLBACKS.inc(stage="summarize", reason="error")
+        return FALLBACK_SUMMARY
 
 
 # quick test
@@ -0,0 +1,312 @@
+# Autoscaling worker pool: AIMD on worker count, sized by Little's law
+import os
+import math
+import asyncio
+import logging
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from src.queue.queue import start_workers
+from src.metrics import (
+    API_RESPONSES, LIMITER_WAIT, SCALING_DECISIONS, THROTTLED, TRANSCRIPT_LATENCY, WORKERS, WORKERS_BUSY, WORKERS_TARGET
+)
+
+logger = logging.getLogger("queue")
+
+# AUTOSCALE=true lets the worker count move between AUTOSCALE_MIN_WORKERS and AUTOSCALE_MAX_WORKERS,
+# re-evaluated every AUTOSCALE_INTERVAL_SECONDS; otherwise a pipeline runs a fixed WORKER_COUNT
+AUTOSCALE = os.getenv("AUTOSCALE", "false").lower() == "true"
+AUTOSCALE_MIN_WORKERS = int(os.getenv("AUTOSCALE_MIN_WORKERS", "2"))
+AUTOSCALE_MAX_WORKERS = int(os.getenv("AUTOSCALE_MAX_WORKERS", "50"))
+AUTOSCALE_INTERVAL_SECONDS = float(os.getenv("AUTOSCALE_INTERVAL_SECONDS", "5"))
+# Additive step, multiplicative backoff on throttling, and the 429 share of requests that triggers it
+AUTOSCALE_STEP = int(os.getenv("AUTOSCALE_STEP", "2"))
+AUTOSCALE_BACKOFF = float(os.getenv("AUTOSCALE_BACKOFF", "0.5"))
+AUTOSCALE_MAX_THROTTLE_RATE = float(os.getenv("AUTOSCALE_MAX_THROTTLE_RATE", "0.02"))
+# Backlog should drain within this many seconds; latency above baseline x inflation counts as saturation
+AUTOSCALE_DRAIN_SECONDS = float(os.getenv("AUTOSCALE_DRAIN_SECONDS", "30"))
+AUTOSCALE_LATENCY_INFLATION = float(os.getenv("AUTOSCALE_LATENCY_INFLATION", "3"))
+
+
+class PoolSample(NamedTuple):
+    """
+    What the pool observed over one control interval.
+    """
+    interval: float
+    depth: int
+    busy: int
+    completed: int
+    latency: float
+    requests: int
+    throttled: int
+
+
+class AIMDController:
+    """
+    Chooses the next worker count from a PoolSample.
+
+    Throttling above the allowed rate cuts the count multiplicatively. Otherwise, while every
+    worker is busy and work is queued, the count grows by `step` as long as Little's law
+    (throughput plus backlog drain rate, times per-transcript latency) says more workers would
+    help and latency has not inflated past its baseline; inflated latency shrinks it by `step`.
+    Idle workers with an empty queue shrink it by `step`, never below what is busy.
+    """
+
+    def __init__(
+        self,
+        min_workers: int = AUTOSCALE_MIN_WORKERS,
+        max_workers: int = AUTOSCALE_MAX_WORKERS,
+        step: int = AUTOSCALE_STEP,
+        backoff: float = AUTOSCALE_BACKOFF,
+        max_throttle_rate: float = AUTOSCALE_MAX_THROTTLE_RATE,
+        drain_seconds: float = AUTOSCALE_DRAIN_SECONDS,
+        latency_inflation: float = AUTOSCALE_LATENCY_INFLATION
+    ):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.step = max(1, step)
+        self.backoff = backoff
+        self.max_throttle_rate = max_throttle_rate
+        self.drain_seconds = drain_seconds
+        self.latency_inflation = latency_inflation
+        self.baseline_latency: Optional[float] = None
+
+    def _clamp(self, n: int) -> int:
+        return min(self.max_workers, max(self.min_workers, n))
+
+    def decide(self, current: int, sample: PoolSample) -> Tuple[int, str]:
+        """
+        Returns:
+            (new worker count, reason); the reason is "hold" when the count does not change.
+        """
+        target, reason = self._decide(current, sample)
+        target = self._clamp(target)
+        return (target, reason) if target != current else (current, "hold")
+
+    def _decide(self, current: int, sample: PoolSample) -> Tuple[int, str]:
+        if sample.throttled:
+            rate = sample.throttled / sample.requests if sample.requests else 1.0
+            if rate > self.max_throttle_rate:
+                return int(current * self.backoff), "throttled"
+
+        congested = False
+        needed = None
+        if sample.completed and sample.latency > 0:
+            # The baseline creeps up 10% per interval so a slower period of the day becomes the new normal
+            if self.baseline_latency is None:
+                self.baseline_latency = sample.latency
+            else:
+                self.baseline_latency = min(sample.latency, self.baseline_latency * 1.1)
+            congested = sample.latency > self.baseline_latency * self.latency_inflation
+            arrival = sample.completed / sample.interval + sample.depth / self.drain_seconds
+            needed = math.ceil(arrival * sample.latency)
+
+        if sample.depth > 0 and sample.busy >= current:
+            if congested:
+                return current - self.step, "latency"
+            if needed is None or needed > current:
+                return current + self.step, "backlog"
+        elif sample.depth == 0 and sample.busy < current:
+            floor = max(sample.busy, needed or 0)
+            if floor < current:
+                return max(floor, current - self.step), "idle"
+        return current, "hold"
+
+
+# Returned by RetireSignal.get() to the worker that should exit
+RETIRED = object()
+
+
+class RetireSignal:
+    """
+    Retirements a WorkerPool has asked for, handed to every worker as its `retire` callable.
+
+    Calling it claims one pending retirement for the caller. get() is queue.get() that returns
+    RETIRED instead once a retirement is pending and this worker claims it, so workers waiting
+    on an empty queue retire as well, not only those finishing an item.
+    """
+
+    def __init__(self):
+        self.pending = 0
+        self._pending = asyncio.Event()
+
+    def __call__(self) -> bool:
+        if self.pending > 0:
+            self.add(-1)
+            return True
+        return False
+
+    def add(self, n: int) -> None:
+        """
+        Request `n` more retirements, or revoke -n pending ones.
+        """
+        self.pending = max(0, self.pending + n)
+        if self.pending:
+            self._pending.set()
+        else:
+            self._pending.clear()
+
+    async def get(self, queue: asyncio.Queue) -> Any:
+        """
+        Wait for the next item, or return RETIRED once this worker claims a retirement.
+        """
+        while True:
+            if self():
+                return RETIRED
+            getter = asyncio.ensure_future(queue.get())
+            retiring = asyncio.ensure_future(self._pending.wait())
+            try:
+                await asyncio.wait({getter, retiring}, return_when=asyncio.FIRST_COMPLETED)
+            except BaseException:
+                retiring.cancel()
+                if getter.done() and not getter.cancelled() and getter.exception() is None:
+                    # Taken in the same step the worker was cancelled: put it back for the others
+                    queue.put_nowait(getter.result())
+                    queue.task_done()
+                else:
+                    getter.cancel()
+                raise
+            retiring.cancel()
+            if getter.done():
+                return getter.result()
+            # Queue.get() passes its wake-up on to the next waiter when cancelled, so no item is lost
+            getter.cancel()
+
+
+class WorkerPool:
+    """
+    Runs worker tasks via start_workers() and, when min_workers < max_workers, periodically
+    resizes the pool with an AIMDController.
+
+    Growing starts new tasks; shrinking asks workers to retire through the RetireSignal they are
+    given: a worker in the middle of a transcript retires when it finishes, and one waiting in
+    retire.get() on an empty queue wakes up and retires at once, so in-flight work is never cut short.
+    """
+
+    def __init__(
+        self,
+        queue: asyncio.Queue,
+        worker_fn: Callable[[asyncio.Queue, RetireSignal], Any],
+        min_workers: int,
+        max_workers: int,
+        initial_workers: Optional[int] = None,
+        interval: float = AUTOSCALE_INTERVAL_SECONDS,
+        controller: Optional[AIMDController] = None
+    ):
+        """
+        Args:
+            queue: queue the workers consume.
+            worker_fn: coroutine function (queue, retire) run by each worker; it should take items
+                with retire.get(queue) and return on RETIRED (or once retire() is True between items).
+            min_workers, max_workers: bounds on the pool size; equal bounds mean a fixed pool.
+            initial_workers: starting size, clamped to the bounds (default: min_workers).
+            interval: seconds between scaling decisions.
+            controller: decision policy; an AIMDController over the same bounds by default.
+        """
+        self.queue = queue
+        self.worker_fn = worker_fn
+        self.min_workers = max(0, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.target = min(self.max_workers, max(self.min_workers, initial_workers or self.min_workers))
+        self.interval = interval
+        self.controller = controller or AIMDController(self.min_workers, self.max_workers)
+        self.tasks: List[asyncio.Task] = []
+        self.last_decision = "start"
+        self.retire = RetireSignal()
+        self._control: Optional[asyncio.Task] = None
+        self._last = None
+
+    @property
+    def autoscaling(self) -> bool:
+        return self.max_workers > self.min_workers
+
+    def _spawn(self, n: int) -> None:
+        tasks = start_workers(self.queue, self.worker_fn, self.retire, n)
+        for task in tasks:
+            WORKERS.inc()
+            task.add_done_callback(lambda t: WORKERS.dec())
+        self.tasks.extend(tasks)
+
+    def running(self) -> int:
+        self.tasks = [t for t in self.tasks if not t.done()]
+        return len(self.tasks)
+
+    def resize(self, target: int) -> None:
+        """
+        Steer the pool towards `target` workers (clamped to the bounds).
+        """
+        self.target = min(self.max_workers, max(self.min_workers, target))
+        WORKERS_TARGET.set(self.target)
+        surplus = self.running() - self.retire.pending - self.target
+        if surplus > 0:
+            self.retire.add(surplus)
+        elif surplus < 0:
+            # Cancel pending retirements before starting new tasks
+            revoked = min(self.retire.pending, -surplus)
+            self.retire.add(-revoked)
+            self._spawn(-surplus - revoked)
+
+    async def start(self) -> None:
+        self._spawn(self.target)
+        WORKERS_TARGET.set(self.target)
+        if self.autoscaling:
+            self._last = self._read_counters()
+            self._control = asyncio.create_task(self._control_loop())
+
+    def _read_counters(self) -> tuple:
+        latency = TRANSCRIPT_LATENCY.snapshot()
+        requests = LIMITER_WAIT.snapshot(limiter="gemini")["count"] + API_RESPONSES.total()
+        return latency["count"], latency["sum"], requests, THROTTLED.total()
+
+    def sample(self, interval: float) -> PoolSample:
+        """
+        Observations since the previous sample.
+        """
+        counters = self._read_counters()
+        completed, latency_sum, requests, throttled = (now - before for now, before in zip(counters, self._last))
+        self._last = counters
+        return PoolSample(
+            interval=interval,
+            depth=self.queue.qsize(),
+            busy=int(WORKERS_BUSY.value()),
+            completed=int(completed),
+            latency=latency_sum / completed if completed else 0.0,
+            requests=int(requests),
+            throttled=int(throttled)
+        )
+
+    async def _control_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            sample = self.sample(self.interval)
+            current = self.target
+            target, reason = self.controller.decide(current, sample)
+            direction = "up" if target > current else "down" if target < current else "hold"
+            SCALING_DECISIONS.inc(direction=direction, reason=reason)
+            self.last_decision = reason
+            if target != current:
+                logger.info(
+                    f"[autoscale] {current} -> {target} workers ({reason}): depth={sample.depth} busy={sample.busy} "
+                    f"completed={sample.completed} latency={sample.latency:.3f}s "
+                    f"throttled={sample.throttled}/{sample.requests}"
+                )
+                self.resize(target)
+
+    async def close(self) -> None:
+        """
+        Stop scaling and cancel every worker.
+        """
+        if self._control is not None:
+            self._control.cancel()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, *([self._control] if self._control else []), return_exceptions=True)
+        self.tasks = []
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.running(),
+            "target": self.target,
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "last_decision": self.last_decision,
+        }
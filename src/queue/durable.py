@@ -0,0 +1,274 @@
+# Durable work queue: a SQLite write-ahead log in front of the in-memory backpressure queue
+import os
+import json
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from src.queue.queue import (
+    BackpressureQueue, PriorityBackpressureQueue, load_score_fn,
+    QUEUE_MAXSIZE, QUEUE_HIGH_WATERMARK, QUEUE_LOW_WATERMARK, QUEUE_MODE
+)
+
+logger = logging.getLogger("queue")
+
+# Log file (empty disables the durable queue) and how often a replayed item may be retried
+DURABLE_QUEUE_PATH = os.getenv("DURABLE_QUEUE_PATH", "")
+DURABLE_MAX_ATTEMPTS = int(os.getenv("DURABLE_MAX_ATTEMPTS", "3"))
+
+
+class WorkLog:
+    """
+    Append-only log of received work items in SQLite. Items stay in the log until acked; acking
+    deletes the row, so the log only ever holds the unfinished window and needs no separate
+    compaction beyond reclaiming free pages on open.
+
+    All SQLite access runs on one dedicated thread, so the event loop never blocks on disk.
+    """
+
+    def __init__(self, path: str, max_attempts: int = DURABLE_MAX_ATTEMPTS):
+        """
+        Args:
+            path: SQLite database file.
+            max_attempts: times an item may be handed to a worker without being acked before
+                replay() drops it as poison.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worklog")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _open(self) -> None:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL + NORMAL survives process crashes (redeploys) with one cheap write per append
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS work ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, "
+            "enqueued_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.commit()
+        if conn.execute("SELECT COUNT(*) FROM work").fetchone()[0] == 0:
+            conn.execute("VACUUM")
+        self._conn = conn
+
+    async def open(self) -> None:
+        if self._conn is None:
+            await self._call(self._open)
+
+    def _append(self, payload: str) -> int:
+        cursor = self._conn.execute(
+            "INSERT INTO work (payload, enqueued_at) VALUES (?, ?)", (payload, time.time())
+        )
+        self._conn.commit()
+        return cursor.lastrowid
+
+    async def append(self, item: Any) -> int:
+        """
+        Persist an item and return its sequence number.
+        """
+        await self.open()
+        return await self._call(self._append, json.dumps(item))
+
+    def _ack(self, seq: int) -> None:
+        self._conn.execute("DELETE FROM work WHERE seq = ?", (seq,))
+        self._conn.commit()
+
+    async def ack(self, seq: int) -> None:
+        """
+        Remove a fully handled item from the log.
+        """
+        await self.open()
+        await self._call(self._ack, seq)
+
+    def _mark_started(self, seq: int) -> None:
+        try:
+            self._conn.execute("UPDATE work SET attempts = attempts + 1 WHERE seq = ?", (seq,))
+            self._conn.commit()
+        except Exception as e:
+            logger.error(f"[queue] Failed to record an attempt for work item {seq}: {e}")
+
+    def mark_started(self, seq: int) -> None:
+        """
+        Count one attempt for an item a worker has just taken. Queued on the log's thread without
+        waiting, so it can be called from the queue's synchronous get path; later log calls see it.
+        """
+        if self._conn is not None:
+            self._executor.submit(self._mark_started, seq)
+
+    def _replay(self) -> List[Tuple[int, Any]]:
+        rows = self._conn.execute("SELECT seq, payload, attempts FROM work ORDER BY seq").fetchall()
+        items = []
+        for seq, payload, attempts in rows:
+            if attempts >= self.max_attempts:
+                logger.error(f"[queue] Dropping work item {seq} after {attempts} attempts: {payload[:200]}")
+                self._conn.execute("DELETE FROM work WHERE seq = ?", (seq,))
+                continue
+            items.append((seq, json.loads(payload)))
+        self._conn.commit()
+        return items
+
+    async def replay(self) -> List[Tuple[int, Any]]:
+        """
+        Return every unacked item in arrival order, dropping those already started max_attempts times.
+        """
+        await self.open()
+        return await self._call(self._replay)
+
+    async def pending_count(self) -> int:
+        await self.open()
+        return await self._call(lambda: self._conn.execute("SELECT COUNT(*) FROM work").fetchone()[0])
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._call(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+
+class DurableQueue(BackpressureQueue):
+    """
+    BackpressureQueue that records every put() in a WorkLog and removes it on ack(), so items
+    received but not yet fully handled survive a crash and are replayed by recover().
+    """
+
+    def __init__(self, worklog: WorkLog, maxsize: int = QUEUE_MAXSIZE,
+                 high_watermark: Optional[int] = None, low_watermark: Optional[int] = None, **kwargs):
+        super().__init__(maxsize, high_watermark, low_watermark, **kwargs)
+        self.worklog = worklog
+        self._seqs: dict = {}
+        self.replayed = 0
+
+    async def put(self, item: Any) -> None:
+        seq = await self.worklog.append(item)
+        self._seqs[id(item)] = seq
+        await super().put(item)
+
+    def _get(self) -> Any:
+        item = super()._get()
+        # Only a hand-off to a worker counts as an attempt; restarts alone never age the backlog
+        seq = self._seqs.get(id(item))
+        if seq is not None:
+            self.worklog.mark_started(seq)
+        return item
+
+    async def recover(self) -> int:
+        """
+        Enqueue the items left unacked by a previous run. Call after the consumers have started,
+        since a backlog larger than the queue blocks until they drain it. Returns the count.
+        """
+        items = await self.worklog.replay()
+        if items:
+            logger.info(f"[queue] Replaying {len(items)} unacked work items")
+        for seq, item in items:
+            self._seqs[id(item)] = seq
+            await super().put(item)
+        self.replayed += len(items)
+        return len(items)
+
+    async def ack(self, item: Any) -> None:
+        seq = self._seqs.pop(id(item), None)
+        if seq is not None:
+            await self.worklog.ack(seq)
+        await super().ack(item)
+
+    def logged(self, item: Any) -> bool:
+        """
+        Whether the item has an unacked row in the work log (it was put, and not yet acked or released).
+        """
+        return id(item) in self._seqs
+
+    def release(self, item: Any) -> None:
+        # The row stays in the log for the next replay; only the in-memory mapping goes
+        self._seqs.pop(id(item), None)
+        super().release(item)
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), "replayed": self.replayed, "unacked": len(self._seqs)}
+
+    async def close(self) -> None:
+        await self.worklog.close()
+
+
+class DurablePriorityQueue(DurableQueue, PriorityBackpressureQueue):
+    """
+    DurableQueue served in priority order; replayed items are re-scored when recovered.
+    """
+
+
+def create_durable_queue(
+    path: str = DURABLE_QUEUE_PATH,
+    maxsize: int = QUEUE_MAXSIZE,
+    high_watermark: Optional[int] = QUEUE_HIGH_WATERMARK,
+    low_watermark: Optional[int] = None,
+    mode: str = QUEUE_MODE
+) -> DurableQueue:
+    """
+    Create a DurableQueue logging to the SQLite file at `path`.
+
+    Args:
+        path: SQLite file for the work log; created if missing.
+        maxsize, high_watermark, low_watermark, mode: as for create_queue().
+
+    Returns:
+        A DurableQueue instance. Call recover() once workers are running.
+    """
+    if low_watermark is None and QUEUE_LOW_WATERMARK >= 0:
+        low_watermark = QUEUE_LOW_WATERMARK
+    if mode == "priority":
+        return DurablePriorityQueue(WorkLog(path), maxsize, high_watermark, low_watermark, score_fn=load_score_fn())
+    return DurableQueue(WorkLog(path), maxsize, high_watermark, low_watermark)
+
+
+def save_checkpoint(path: str, items: List[Any]) -> None:
+    """
+    Replace the JSONL checkpoint file with the unfinished work items, to be re-queued by
+    load_checkpoint(); with no items the file is removed. The new file is written and fsynced
+    under a temporary name first, so a crash never leaves a partial checkpoint.
+    Blocking; run it off the event loop.
+    """
+    if not items:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(item) + "\n" for item in items))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.info(f"[queue] Checkpointed {len(items)} unfinished work items to {path}")
+
+
+def load_checkpoint(path: str) -> List[Any]:
+    """
+    Read a checkpoint file written by save_checkpoint(). The file is left in place until the next
+    save_checkpoint() replaces or removes it, so restored items are not lost if the process dies
+    before finishing them. Blocking; run it off the event loop.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+    items = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            logger.error(f"[queue] Skipping unreadable checkpoint line in {path}: {e}")
+    if items:
+        logger.info(f"[queue] Restored {len(items)} work items from checkpoint {path}")
+    return items
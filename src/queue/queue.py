@@ -1,18 +1,283 @@
+import os
+import time
 import asyncio
-from typing import Any, Callable
+import importlib
+import itertools
+from typing import Any, Callable, List, Optional
 
+# Hard bound on queued transcripts, and the depths at which producers pause and resume
+QUEUE_MAXSIZE = int(os.getenv("QUEUE_MAXSIZE", "100"))
+QUEUE_HIGH_WATERMARK = int(os.getenv("QUEUE_HIGH_WATERMARK", "0")) or None
+QUEUE_LOW_WATERMARK = int(os.getenv("QUEUE_LOW_WATERMARK", "-1"))
 
-def create_queue(maxsize: int = 0) -> asyncio.Queue[Any]:
+# "fifo" or "priority"; in priority mode each score point is worth PRIORITY_AGING_SECONDS of waiting,
+# and QUEUE_SCORE_FN ("module:function") may replace the default scoring of transcripts
+QUEUE_MODE = os.getenv("QUEUE_MODE", "fifo").lower()
+PRIORITY_AGING_SECONDS = float(os.getenv("PRIORITY_AGING_SECONDS", "60"))
+QUEUE_SCORE_FN = os.getenv("QUEUE_SCORE_FN", "")
+
+INTEREST_SCORES = {"high": 2.0, "medium": 1.0, "low": 0.0}
+
+
+class BackpressureQueue(asyncio.Queue):
+    """
+    Bounded asyncio.Queue whose put() pauses producers between two watermarks.
+
+    Once the depth reaches the high watermark, put() blocks until consumers drain the queue down
+    to the low watermark, so a slow consumer makes the producer stop reading instead of buffering
+    without bound, and the producer resumes in bursts rather than one item at a time.
+    put_nowait() ignores the watermarks but still respects maxsize.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = QUEUE_MAXSIZE,
+        high_watermark: Optional[int] = None,
+        low_watermark: Optional[int] = None
+    ):
+        """
+        Args:
+            maxsize: hard bound on queued items. 0 means infinite.
+            high_watermark: depth at which put() starts blocking. Defaults to maxsize.
+            low_watermark: depth at which blocked put() calls resume. Defaults to half the high watermark.
+        """
+        super().__init__(maxsize=maxsize)
+        self.high_watermark = high_watermark or maxsize or None
+        if self.high_watermark is not None and maxsize:
+            self.high_watermark = min(self.high_watermark, maxsize)
+        if low_watermark is None:
+            low_watermark = (self.high_watermark or 0) // 2
+        self.low_watermark = min(low_watermark, (self.high_watermark or 1) - 1)
+        self._paused = False
+        self._resume = asyncio.Event()
+        self._resume.set()
+        self.max_depth = 0
+        self.blocked_puts = 0
+        self.blocked_put_seconds = 0.0
+        self.max_blocked_put_seconds = 0.0
+
+    async def put(self, item: Any) -> None:
+        """
+        Put an item, waiting while the queue is above its watermarks or full.
+        """
+        start = None
+        if self.high_watermark is not None and (self._paused or self.qsize() >= self.high_watermark):
+            start = time.monotonic()
+            self._paused = True
+            self._resume.clear()
+            while self._paused:
+                await self._resume.wait()
+        if self.full():
+            start = start or time.monotonic()
+        await super().put(item)
+        if start is not None:
+            waited = time.monotonic() - start
+            self.blocked_puts += 1
+            self.blocked_put_seconds += waited
+            self.max_blocked_put_seconds = max(self.max_blocked_put_seconds, waited)
+
+    def _put(self, item: Any) -> None:
+        super()._put(item)
+        self.max_depth = max(self.max_depth, self.qsize())
+
+    def _get(self) -> Any:
+        item = super()._get()
+        if self._paused and self.qsize() <= self.low_watermark:
+            self._paused = False
+            self._resume.set()
+        return item
+
+    async def ack(self, item: Any) -> None:
+        """
+        Mark an item as fully handled. A no-op here; the durable queue removes it from its log.
+        """
+
+    def release(self, item: Any) -> None:
+        """
+        Forget an item handed out by get() that will not be acked (it failed, or shutdown cut it
+        short), so per-item bookkeeping never outlives it. A no-op here.
+        """
+
+    def metrics(self) -> dict:
+        """
+        Current depth and producer-blocking statistics.
+        """
+        return {
+            "depth": self.qsize(),
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "high_watermark": self.high_watermark,
+            "low_watermark": self.low_watermark,
+            "paused": self._paused,
+            "blocked_puts": self.blocked_puts,
+            "blocked_put_seconds": self.blocked_put_seconds,
+            "max_blocked_put_seconds": self.max_blocked_put_seconds,
+        }
+
+
+def score_transcript(transcript: dict) -> float:
+    """
+    Default business-value score of a transcript: higher is served sooner.
+
+    High visitor interest, a pending permit and a flagged potential issue each raise the score;
+    longer calls add a little, up to half a point at ten minutes.
     """
-    Create and return an asyncio.Queue with optional maxsize.
+    metadata = transcript.get("metadata") or {}
+    score = INTEREST_SCORES.get(str(metadata.get("visitor_interest_level", "")).lower(), 0.5)
+    if str(metadata.get("mount_doom_permit_status", "")).lower() == "pending":
+        score += 1.5
+    if str(metadata.get("potential_issue") or "none").lower() not in ("none", ""):
+        score += 1.0
+    try:
+        score += min(float(transcript.get("duration_seconds") or 0) / 600.0, 1.0) * 0.5
+    except (TypeError, ValueError):
+        pass
+    return score
+
+
+def priority_band(score: float) -> str:
+    """
+    Name the latency-reporting band a score falls in.
+    """
+    if score >= 3.0:
+        return "high"
+    if score >= 1.5:
+        return "medium"
+    return "low"
+
+
+def load_score_fn(spec: str = QUEUE_SCORE_FN) -> Callable[[Any], float]:
+    """
+    Resolve a "module:function" scoring function, or the default scorer when spec is empty.
+    """
+    if not spec:
+        return score_transcript
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class PriorityBackpressureQueue(BackpressureQueue, asyncio.PriorityQueue):
+    """
+    BackpressureQueue that serves the highest-scoring items first, with aging.
+
+    Items are ordered by enqueue time minus score * aging_seconds, so an item's priority is a head
+    start in seconds: a low-scoring item that has waited long enough overtakes newer high-scoring
+    ones and nothing starves. Queue wait is recorded per priority band on get() and end-to-end
+    latency on ack(); items handed out are tracked until ack() or release().
+    """
+
+    def __init__(
+        self,
+        maxsize: int = QUEUE_MAXSIZE,
+        high_watermark: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        score_fn: Optional[Callable[[Any], float]] = None,
+        aging_seconds: float = PRIORITY_AGING_SECONDS,
+        band_fn: Callable[[float], str] = priority_band
+    ):
+        """
+        Args:
+            maxsize, high_watermark, low_watermark: as for BackpressureQueue.
+            score_fn: maps an item to its priority score. Defaults to score_transcript.
+            aging_seconds: waiting time one score point is worth.
+            band_fn: maps a score to the band its latency is reported under.
+        """
+        self._score_fn = score_fn or score_transcript
+        self._aging = aging_seconds
+        self._band_fn = band_fn
+        self._order = itertools.count()
+        self._started: dict = {}
+        self.bands: dict = {}
+        super().__init__(maxsize, high_watermark, low_watermark)
+
+    def _put(self, item: Any) -> None:
+        try:
+            score = float(self._score_fn(item))
+        except Exception:
+            score = 0.0
+        now = time.monotonic()
+        super()._put((now - score * self._aging, next(self._order), now, self._band_fn(score), item))
+
+    def _get(self) -> Any:
+        _, _, enqueued, band, item = super()._get()
+        now = time.monotonic()
+        # Holding the item keeps its id() from being reused while the entry exists
+        self._started[id(item)] = (item, band, enqueued)
+        stats = self._band(band)
+        stats["dequeued"] += 1
+        stats["wait_seconds"] += now - enqueued
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], now - enqueued)
+        return item
+
+    def _band(self, band: str) -> dict:
+        if band not in self.bands:
+            self.bands[band] = {
+                "dequeued": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+                "completed": 0, "latency_seconds": 0.0, "max_latency_seconds": 0.0,
+            }
+        return self.bands[band]
+
+    async def ack(self, item: Any) -> None:
+        started = self._started.pop(id(item), None)
+        if started is not None:
+            _, band, enqueued = started
+            latency = time.monotonic() - enqueued
+            stats = self._band(band)
+            stats["completed"] += 1
+            stats["latency_seconds"] += latency
+            stats["max_latency_seconds"] = max(stats["max_latency_seconds"], latency)
+        await super().ack(item)
+
+    def release(self, item: Any) -> None:
+        self._started.pop(id(item), None)
+        super().release(item)
+
+    def band_metrics(self) -> dict:
+        """
+        Per-band counts with average and maximum queue wait and end-to-end latency.
+        """
+        report = {}
+        for band, stats in self.bands.items():
+            report[band] = {
+                "dequeued": stats["dequeued"],
+                "avg_wait_seconds": stats["wait_seconds"] / max(stats["dequeued"], 1),
+                "max_wait_seconds": stats["max_wait_seconds"],
+                "completed": stats["completed"],
+                "avg_latency_seconds": stats["latency_seconds"] / max(stats["completed"], 1),
+                "max_latency_seconds": stats["max_latency_seconds"],
+            }
+        return report
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), "bands": self.band_metrics()}
+
+
+def create_queue(
+    maxsize: int = QUEUE_MAXSIZE,
+    high_watermark: Optional[int] = QUEUE_HIGH_WATERMARK,
+    low_watermark: Optional[int] = None,
+    mode: str = QUEUE_MODE,
+    score_fn: Optional[Callable[[Any], float]] = None
+) -> BackpressureQueue:
+    """
+    Create and return a bounded queue that applies backpressure to its producers.
 
     Args:
         maxsize: maximum number of items that can be queued before put() blocks. 0 means infinite.
+        high_watermark: depth at which put() starts blocking. Defaults to maxsize.
+        low_watermark: depth at which blocked producers resume. Defaults to QUEUE_LOW_WATERMARK,
+            or half the high watermark when that is unset.
+        mode: "fifo" for arrival order, "priority" to serve by score with aging.
+        score_fn: priority scoring function. Defaults to QUEUE_SCORE_FN or score_transcript.
 
     Returns:
-        An asyncio.Queue instance.
+        A BackpressureQueue (or PriorityBackpressureQueue) instance.
     """
-    return asyncio.Queue(maxsize=maxsize)
+    if low_watermark is None and QUEUE_LOW_WATERMARK >= 0:
+        low_watermark = QUEUE_LOW_WATERMARK
+    if mode == "priority":
+        return PriorityBackpressureQueue(maxsize, high_watermark, low_watermark, score_fn or load_score_fn())
+    return BackpressureQueue(maxsize, high_watermark, low_watermark)
 
 
 def start_workers(
@@ -20,7 +285,7 @@ def start_workers(
     worker_fn: Callable[[asyncio.Queue[Any], Any], Any],
     client: Any,
     worker_count: int = 5
-) -> None:
+) -> List[asyncio.Task]:
     """
     Spawn multiple worker tasks consuming from the queue.
 
@@ -29,9 +294,11 @@ def start_workers(
         worker_fn: A coroutine function with signature (queue, client) to process items.
         client: The API client or context object to pass to each worker.
         worker_count: The number of concurrent worker tasks to launch.
+
+    Returns:
+        The worker tasks.
     """
-    for _ in range(worker_count):
-        asyncio.create_task(worker_fn(queue, client))
+    return [asyncio.create_task(worker_fn(queue, client)) for _ in range(worker_count)]
 
 
 def enqueue_item(queue: asyncio.Queue[Any], item: Any) -> None:
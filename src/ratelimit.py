@@ -0,0 +1,200 @@
+# Reusable rate limiters
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucketLimiter:
+    """
+    Token-bucket limiter enforcing a requests-per-minute budget and an optional tokens-per-minute budget.
+
+    Callers reserve capacity up front and then wait out their own delay, so when the budget is
+    exhausted work queues up in arrival order instead of failing. Safe to share between the event
+    loop and worker threads.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            requests_per_minute: sustained request rate.
+            tokens_per_minute: sustained token rate, or None to only limit requests.
+            burst: requests allowed back-to-back from a full bucket; defaults to requests_per_minute.
+            clock: monotonic time source in seconds, injectable for tests.
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._request_rate = requests_per_minute / 60.0
+        self._request_capacity = float(burst if burst is not None else requests_per_minute)
+        self._requests = self._request_capacity
+        self._token_rate = tokens_per_minute / 60.0 if tokens_per_minute else None
+        self._token_capacity = float(tokens_per_minute) if tokens_per_minute else None
+        self._tokens = self._token_capacity
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        self._requests = min(self._request_capacity, self._requests + elapsed * self._request_rate)
+        if self._token_rate is not None:
+            self._tokens = min(self._token_capacity, self._tokens + elapsed * self._token_rate)
+
+    def _delay(self, requests: float, tokens: float) -> float:
+        delay = max(0.0, -requests / self._request_rate)
+        if self._token_rate is not None:
+            delay = max(delay, -tokens / self._token_rate)
+        return delay
+
+    def _clamp_tokens(self, tokens: int) -> int:
+        # A single call larger than the whole budget would otherwise wait forever
+        if self._token_capacity is not None:
+            return min(tokens, int(self._token_capacity))
+        return tokens
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Reserve one request (and `tokens` tokens) and return how long the caller must wait before using it.
+        """
+        tokens = self._clamp_tokens(tokens)
+        with self._lock:
+            self._refill(self._clock())
+            self._requests -= 1
+            if self._token_rate is not None:
+                self._tokens -= tokens
+            return self._delay(self._requests, self._tokens if self._token_rate is not None else 0.0)
+
+    def wait_time(self, tokens: int = 0) -> float:
+        """
+        Seconds a new request of `tokens` tokens would currently have to wait, without reserving anything.
+        """
+        tokens = self._clamp_tokens(tokens)
+        with self._lock:
+            self._refill(self._clock())
+            pending_tokens = self._tokens - tokens if self._token_rate is not None else 0.0
+            return self._delay(self._requests - 1, pending_tokens)
+
+    def drain(self) -> None:
+        """
+        Empty the request bucket, e.g. after the upstream reports a quota error, so callers back off.
+        """
+        with self._lock:
+            self._refill(self._clock())
+            self._requests = min(self._requests, 0.0)
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait until one request of `tokens` tokens fits the budget. Returns the time spent waiting.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def acquire_blocking(self, tokens: int = 0) -> float:
+        """
+        Blocking variant of acquire() for synchronous callers.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class GCRALimiter:
+    """
+    Generic cell rate algorithm limiter: `rate` permits per `period` seconds, spaced evenly.
+
+    Up to `burst` permits may be taken back-to-back; after that each permit is released one
+    emission interval (period / rate) after the previous one, so there is no periodic refill
+    stall. State is a single theoretical arrival time, so there is no background task.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        period: float = 60.0,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            rate: permits allowed per period.
+            period: window length in seconds.
+            burst: permits that may be taken without spacing from an idle limiter.
+            clock: monotonic time source in seconds, injectable for tests.
+        """
+        if rate <= 0 or period <= 0 or burst < 1:
+            raise ValueError("rate and period must be positive and burst at least 1")
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._interval = period / rate
+        self._burst_offset = self._interval * burst
+        self._tat = clock()
+        self._acquired = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _schedule(self, n: int, now: float):
+        new_tat = max(self._tat, now) + n * self._interval
+        allow_at = new_tat - self._burst_offset
+        return new_tat, max(0.0, allow_at - now)
+
+    def reserve(self, n: int = 1) -> float:
+        """
+        Take `n` permits and return how long the caller must wait before using them.
+        """
+        with self._lock:
+            self._tat, delay = self._schedule(n, self._clock())
+            self._acquired += n
+            self._total_wait += delay
+            self._max_wait = max(self._max_wait, delay)
+            return delay
+
+    def try_acquire(self, n: int = 1) -> bool:
+        """
+        Take `n` permits only if they are available right now.
+        """
+        with self._lock:
+            new_tat, delay = self._schedule(n, self._clock())
+            if delay > 0:
+                self._rejected += n
+                return False
+            self._tat = new_tat
+            self._acquired += n
+            return True
+
+    def wait_time(self, n: int = 1) -> float:
+        """
+        Seconds a caller asking for `n` permits would currently have to wait.
+        """
+        with self._lock:
+            return self._schedule(n, self._clock())[1]
+
+    async def acquire(self, n: int = 1) -> float:
+        """
+        Wait until `n` permits are available. Returns the time spent waiting.
+        """
+        delay = self.reserve(n)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def metrics(self) -> dict:
+        """
+        Counters for monitoring: permits granted and rejected, and wait times in seconds.
+        """
+        with self._lock:
+            return {
+                "acquired": self._acquired,
+                "rejected": self._rejected,
+                "total_wait_seconds": self._total_wait,
+                "max_wait_seconds": self._max_wait,
+                "current_wait_seconds": self._schedule(1, self._clock())[1],
+            }
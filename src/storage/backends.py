@@ -0,0 +1,342 @@
+# Storage backends: JSON files, MongoDB (with JSON fallback) and in-memory
+import os
+import asyncio
+import logging
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from src.storage.writer import JSONLWriter, get_loop_writer
+from src.storage.mongo_sink import MongoBatchSink
+from src.storage.seen import SeenSet
+from src.storage.counter import LineCounter
+
+logger = logging.getLogger("db")
+
+# JSON file paths for the JSON backend and the Mongo fallback
+RAW_JSON_FILE = "raw_transcripts.json"
+PROCESSED_JSON_FILE = "processed_results.json"
+ERRORS_FILE = "errors.json"
+
+# Mongo connection: bounded server selection on each attempt, retried in the background while down.
+# Timeouts given as options in MONGODB_URI take precedence over MONGO_CONNECT_TIMEOUT_MS.
+MONGO_URI = os.getenv("MONGODB_URI")
+MONGO_DATABASE = os.getenv("MONGODB_DATABASE", "calllive")
+MONGO_TLS = os.getenv("MONGODB_TLS", "true").lower() == "true"
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "3000"))
+MONGO_RETRY_SECONDS = float(os.getenv("MONGO_RETRY_SECONDS", "30"))
+# How long a Mongo document count is reused before asking the server again
+MONGO_COUNT_CACHE_SECONDS = float(os.getenv("MONGO_COUNT_CACHE_SECONDS", "5"))
+
+
+class StorageBackend:
+    """
+    Interface every storage backend implements. Saves may be buffered; flush() waits for them.
+    """
+
+    name = "base"
+
+    async def save_raw(self, transcript: dict) -> None:
+        raise NotImplementedError
+
+    async def save_processed(self, result: dict) -> None:
+        raise NotImplementedError
+
+    async def save_error(self, error_entry: dict) -> None:
+        raise NotImplementedError
+
+    async def count(self, kind: str) -> int:
+        """
+        Number of stored records of `kind` ("raw", "processed" or "errors"), cheap enough to poll.
+        """
+        raise NotImplementedError
+
+    async def flush(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class JSONBackend(StorageBackend):
+    """
+    Appends JSONL records through one group-commit writer per file, skipping transcript ids
+    already present in the raw and processed files.
+    """
+
+    name = "json"
+
+    def __init__(
+        self,
+        raw_path: str = RAW_JSON_FILE,
+        processed_path: str = PROCESSED_JSON_FILE,
+        errors_path: str = ERRORS_FILE
+    ):
+        self.raw_path = raw_path
+        self.processed_path = processed_path
+        self.errors_path = errors_path
+        self._writers: dict = {}
+        self._indexes = {raw_path: SeenSet(raw_path), processed_path: SeenSet(processed_path)}
+        self._counters = {
+            "raw": LineCounter(raw_path),
+            "processed": LineCounter(processed_path),
+            "errors": LineCounter(errors_path),
+        }
+
+    def _writer(self, path: str) -> JSONLWriter:
+        return get_loop_writer(self._writers, path, lambda: JSONLWriter(path))
+
+    async def _first_write(self, path: str, transcript_id) -> bool:
+        # True if no record for transcript_id is in the file yet (and remember it from now on)
+        if transcript_id is None:
+            return True
+        index = self._indexes[path]
+        if not index.loaded:
+            await asyncio.to_thread(index.load)
+        return index.add(transcript_id)
+
+    async def save_raw(self, transcript: dict) -> None:
+        if not await self._first_write(self.raw_path, transcript.get("transcript_id")):
+            logger.info(f"Raw transcript {transcript.get('transcript_id')} already stored; skipping.")
+            return
+        entry = {
+            **transcript,
+            "saved_timestamp": datetime.now(timezone.utc).isoformat() + "Z"
+        }
+        try:
+            await self._writer(self.raw_path).write(entry)
+            logger.info(f"Queued raw transcript {transcript.get('transcript_id')} for JSON file.")
+        except Exception as e:
+            logger.error(f"Failed to save raw transcript to JSON file: {e}")
+
+    async def save_processed(self, result: dict) -> None:
+        if not await self._first_write(self.processed_path, result.get("transcript_id")):
+            logger.info(f"Processed result {result.get('transcript_id')} already stored; skipping.")
+            return
+        try:
+            await self._writer(self.processed_path).write(result)
+            logger.info(f"Queued processed result {result.get('transcript_id')} for JSON file.")
+        except Exception as e:
+            logger.error(f"Failed to save processed result to JSON file: {e}")
+
+    async def save_error(self, error_entry: dict) -> None:
+        try:
+            await self._writer(self.errors_path).write(error_entry)
+            logger.error(f"Logged pipeline error: {error_entry}")
+        except Exception as e:
+            logger.error(f"Failed to save error to JSON file: {e}")
+
+    async def count(self, kind: str) -> int:
+        return await asyncio.to_thread(self._counters[kind].count)
+
+    async def flush(self) -> None:
+        for writer in list(self._writers.values()):
+            if writer.loop is asyncio.get_running_loop():
+                await writer.flush()
+
+    async def close(self) -> None:
+        for path, writer in list(self._writers.items()):
+            if writer.loop is None or writer.loop is asyncio.get_running_loop():
+                await writer.close()
+            self._writers.pop(path, None)
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Keeps everything in process memory; for tests, benchmarks and throwaway runs.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self.raw: dict = {}
+        self.processed: dict = {}
+        self.errors: list = []
+
+    async def save_raw(self, transcript: dict) -> None:
+        self.raw.setdefault(transcript.get("transcript_id"), transcript)
+
+    async def save_processed(self, result: dict) -> None:
+        self.processed.setdefault(result.get("transcript_id"), result)
+
+    async def save_error(self, error_entry: dict) -> None:
+        self.errors.append(error_entry)
+
+    async def count(self, kind: str) -> int:
+        return len({"raw": self.raw, "processed": self.processed, "errors": self.errors}[kind])
+
+
+class MongoBackend(StorageBackend):
+    """
+    MongoDB storage that connects lazily on first use and never blocks the event loop.
+
+    Each connection attempt is bounded by MONGO_CONNECT_TIMEOUT_MS. Until a connection succeeds,
+    records go to the JSON fallback while a background task retries every MONGO_RETRY_SECONDS;
+    once connected, new records go to Mongo as idempotent bulk upserts. Errors always go to JSON.
+    """
+
+    name = "mongo"
+
+    def __init__(self, uri: Optional[str] = MONGO_URI, fallback: Optional[StorageBackend] = None):
+        self.uri = uri
+        self.fallback = fallback or JSONBackend()
+        self.connected = False
+        self._client = None
+        self._collections: dict = {}
+        self._sinks: dict = {}
+        self._connector: Optional[asyncio.Task] = None
+        self._counts: dict = {}
+        # close() bumps the generation, so a connect thread still running from before discards its client
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _timeouts(self) -> dict:
+        options = {name.lower() for name in parse_qs(urlsplit(self.uri).query)}
+        return {
+            name: MONGO_CONNECT_TIMEOUT_MS
+            for name in ("serverSelectionTimeoutMS", "connectTimeoutMS")
+            if name.lower() not in options
+        }
+
+    def _connect_blocking(self, generation: int) -> bool:
+        from pymongo import MongoClient
+        client = MongoClient(self.uri, tls=MONGO_TLS, tlsAllowInvalidCertificates=MONGO_TLS, **self._timeouts())
+        try:
+            client.admin.command("ping")
+        except Exception:
+            client.close()
+            raise
+        db = client.get_database(MONGO_DATABASE)
+        with self._lock:
+            current = generation == self._generation
+            if current:
+                self._client = client
+                self._collections = {
+                    "raw": db.get_collection("raw_transcripts"),
+                    "processed": db.get_collection("processed_results"),
+                }
+        if not current:
+            client.close()
+        return current
+
+    async def _connect_loop(self) -> None:
+        generation = self._generation
+        while not self.connected:
+            try:
+                if not await asyncio.to_thread(self._connect_blocking, generation):
+                    return
+                self.connected = True
+                logger.info("Connected to MongoDB successfully.")
+            except Exception as e:
+                logger.error(
+                    f"MongoDB connection failed: {e}. Using JSON storage; retrying in {MONGO_RETRY_SECONDS}s."
+                )
+                await asyncio.sleep(MONGO_RETRY_SECONDS)
+
+    def ensure_connecting(self) -> None:
+        """
+        Start the background connect task if it is not already running.
+        """
+        if self.connected or not self.uri:
+            return
+        loop = asyncio.get_running_loop()
+        if self._connector is None or self._connector.done() or self._connector.get_loop() is not loop:
+            self._connector = loop.create_task(self._connect_loop())
+
+    async def connect(self, timeout: Optional[float] = None) -> bool:
+        """
+        Start connecting if needed and wait up to `timeout` seconds for it. Returns whether connected.
+        """
+        self.ensure_connecting()
+        if not self.connected and self._connector is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._connector), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.connected
+
+    def _sink(self, kind: str) -> MongoBatchSink:
+        collection = self._collections[kind]
+        return get_loop_writer(self._sinks, kind, lambda: MongoBatchSink(collection, key="transcript_id"))
+
+    async def _save(self, kind: str, record: dict, fallback_save) -> None:
+        self.ensure_connecting()
+        if not self.connected:
+            await fallback_save(record)
+            return
+        label = "raw transcript" if kind == "raw" else "processed result"
+        try:
+            await self._sink(kind).write(record)
+            logger.info(f"Queued {label} {record.get('transcript_id')} for MongoDB.")
+        except Exception as e:
+            logger.error(f"Failed to save {label} to MongoDB: {e}")
+
+    async def save_raw(self, transcript: dict) -> None:
+        await self._save("raw", transcript, self.fallback.save_raw)
+
+    async def save_processed(self, result: dict) -> None:
+        await self._save("processed", result, self.fallback.save_processed)
+
+    async def save_error(self, error_entry: dict) -> None:
+        await self.fallback.save_error(error_entry)
+
+    async def count(self, kind: str) -> int:
+        """
+        Records in Mongo (estimated from collection metadata, cached for MONGO_COUNT_CACHE_SECONDS)
+        plus those written to the JSON fallback while Mongo was unreachable.
+        """
+        total = await self.fallback.count(kind)
+        self.ensure_connecting()
+        if kind not in ("raw", "processed") or not self.connected:
+            return total
+        cached = self._counts.get(kind)
+        now = time.monotonic()
+        if cached is None or now - cached[1] >= MONGO_COUNT_CACHE_SECONDS:
+            try:
+                count = await asyncio.to_thread(self._collections[kind].estimated_document_count)
+                cached = (count, now)
+                self._counts[kind] = cached
+            except Exception as e:
+                logger.error(f"Failed to count MongoDB {kind} documents: {e}")
+                if cached is None:
+                    return total
+        return total + cached[0]
+
+    async def flush(self) -> None:
+        for sink in list(self._sinks.values()):
+            if sink.loop is asyncio.get_running_loop():
+                await sink.flush()
+        await self.fallback.flush()
+
+    async def close(self) -> None:
+        if self._connector is not None and not self._connector.done():
+            self._connector.cancel()
+        with self._lock:
+            self._generation += 1
+        for kind, sink in list(self._sinks.items()):
+            if sink.loop is None or sink.loop is asyncio.get_running_loop():
+                await sink.close()
+            self._sinks.pop(kind, None)
+        await self.fallback.close()
+        with self._lock:
+            client, self._client = self._client, None
+        self.connected = False
+        if client is not None:
+            await asyncio.to_thread(client.close)
+
+
+def create_backend(kind: Optional[str] = None) -> StorageBackend:
+    """
+    Build the backend named by `kind` or the STORAGE_BACKEND env var ("json", "mongo" or "memory").
+    Defaults to mongo when MONGODB_URI is set, json otherwise. Nothing connects until first use.
+    """
+    kind = (kind or os.getenv("STORAGE_BACKEND") or ("mongo" if MONGO_URI else "json")).lower()
+    if kind == "json":
+        return JSONBackend()
+    if kind == "mongo":
+        return MongoBackend()
+    if kind == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown STORAGE_BACKEND {kind!r}; expected json, mongo or memory")
@@ -0,0 +1,54 @@
+# Incremental line counts for the append-only JSONL files
+import os
+import threading
+
+
+class LineCounter:
+    """
+    Counts the lines of an append-only file, reading only the bytes appended since the last call.
+
+    The byte offset and running count are kept between calls, so each call costs O(new data)
+    rather than O(file size). If the file is truncated or replaced, counting starts over.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1 << 20):
+        self.path = path
+        self._chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._inode = None
+        self._offset = 0
+        self._newlines = 0
+        self._partial = False
+
+    def _reset(self, inode=None) -> None:
+        self._inode = inode
+        self._offset = 0
+        self._newlines = 0
+        self._partial = False
+
+    def count(self) -> int:
+        """
+        Current number of lines, counting an unterminated last line. Blocking; reads new bytes only.
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return 0
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._reset(st.st_ino)
+            if st.st_size > self._offset:
+                with open(self.path, "rb") as f:
+                    f.seek(self._offset)
+                    last = b""
+                    while True:
+                        chunk = f.read(self._chunk_size)
+                        if not chunk:
+                            break
+                        self._newlines += chunk.count(b"\n")
+                        self._offset += len(chunk)
+                        last = chunk[-1:]
+                    if last:
+                        self._partial = last != b"\n"
+            return self._newlines + (1 if self._partial else 0)
@@ -1,98 +1,132 @@
 import os
 import asyncio
-import json
 import logging
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables before the backends read their configuration
 dotenv_loaded = load_dotenv()
 
+from src.storage.backends import (
+    StorageBackend, create_backend,
+    RAW_JSON_FILE, PROCESSED_JSON_FILE, ERRORS_FILE
+)
+from src.storage.writer import JSONLWriter, get_loop_writer
+from src.storage.seen import SeenSet
+
 # Configure logging
 logger = logging.getLogger("db")
 logging.basicConfig(level=logging.INFO)
 
-# Error tracking file
-ERRORS_FILE = "errors.json"
-
-# Determine storage mode: MongoDB or JSON fallback
-MONGO_URI = os.getenv("MONGODB_URI")
-USE_MONGO = False
-_raw_collection = None
-_processed_collection = None
-
-# Attempt MongoDB connection
-try:
-    from pymongo import MongoClient
-    client = MongoClient(
-        MONGO_URI,
-        tls=True,
-        tlsAllowInvalidCertificates=True
-    )
-    client.admin.command("ping")
-    db = client.get_database("calllive")
-    _raw_collection = db.get_collection("raw_transcripts")
-    _processed_collection = db.get_collection("processed_results")
-    USE_MONGO = True
-    logger.info("Connected to MongoDB successfully.")
-except Exception as e:
-    USE_MONGO = False
-    logger.error(f"MongoDB connection failed: {e}. Falling back to JSON storage.")
-
-# JSON file paths for fallback
-RAW_JSON_FILE = "raw_transcripts.json"
-PROCESSED_JSON_FILE = "processed_results.json"
+# Transcripts fully processed and submitted, used to drop replays before any LLM call
+# (supervisor shards each keep their own SEEN_FILE.<index>)
+SEEN_FILE = os.getenv("SEEN_FILE", "seen_transcripts.json")
+
+# Backend chosen by STORAGE_BACKEND; created on first use, and it connects lazily itself
+_backend = None
+_seen_transcripts = SeenSet(SEEN_FILE)
+_seen_writers: dict = {}
+
+
+def get_backend() -> StorageBackend:
+    """
+    Return the process-wide storage backend, creating it on first call.
+    """
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+        logger.info(f"Using {_backend.name} storage backend.")
+    return _backend
+
+
+def set_backend(backend: StorageBackend) -> None:
+    """
+    Replace the process-wide backend, e.g. with a MemoryBackend in tests and benchmarks.
+    """
+    global _backend
+    _backend = backend
+
+
+def set_seen_path(path: str) -> None:
+    """
+    Point the seen-set at another JSONL file: it is loaded from there on the next claim, and
+    completions recorded from then on are appended to it.
+    """
+    global _seen_transcripts
+    _seen_transcripts = SeenSet(path)
+
+
+def get_seen_path() -> str:
+    """
+    File the seen-set is loaded from and completions are appended to.
+    """
+    return _seen_transcripts.path
+
+
+async def claim_transcript(transcript_id: str) -> bool:
+    """
+    Reserve a transcript for processing. False if it was already completed or is in flight.
+    """
+    if not _seen_transcripts.loaded:
+        await asyncio.to_thread(_seen_transcripts.load)
+    return _seen_transcripts.claim(transcript_id)
+
+
+async def complete_transcript(transcript_id: str) -> None:
+    """
+    Record a claimed transcript as fully processed and submitted, in memory and on disk.
+    """
+    _seen_transcripts.complete(transcript_id)
+    path = _seen_transcripts.path
+    writer = get_loop_writer(_seen_writers, path, lambda: JSONLWriter(path))
+    await writer.write({
+        "transcript_id": transcript_id,
+        "completed_timestamp": datetime.now(timezone.utc).isoformat()
+    })
+
+
+def release_transcript(transcript_id: str) -> None:
+    """
+    Drop a claim after a failure so a replay of the transcript can be retried.
+    """
+    _seen_transcripts.release(transcript_id)
+
+
+async def flush_storage() -> None:
+    """
+    Wait until every record saved so far has been written by the backend.
+    """
+    await get_backend().flush()
+    for writer in list(_seen_writers.values()):
+        if writer.loop is asyncio.get_running_loop():
+            await writer.flush()
+
+
+async def close_storage() -> None:
+    """
+    Flush and close the backend and the seen-set writer. Call once on shutdown.
+    """
+    if _backend is not None:
+        await _backend.close()
+    for key, writer in list(_seen_writers.items()):
+        if writer.loop is None or writer.loop is asyncio.get_running_loop():
+            await writer.close()
+        _seen_writers.pop(key, None)
 
 async def save_raw_transcript(transcript: dict) -> None:
     """
-    Save raw transcript to MongoDB or append to JSON file.
-    """
-    if USE_MONGO and _raw_collection:
-        try:
-            await asyncio.to_thread(_raw_collection.insert_one, transcript)
-            logger.info(f"Saved raw transcript {transcript.get('transcript_id')} to MongoDB.")
-        except Exception as e:
-            logger.error(f"Failed to save raw transcript to MongoDB: {e}")
-    else:
-        entry = {
-            **transcript,
-            "saved_timestamp": datetime.now(timezone.utc).isoformat() + "Z"
-        }
-        try:
-            await asyncio.to_thread(
-                lambda: open(RAW_JSON_FILE, "a").write(json.dumps(entry) + "\n")
-            )
-            logger.info(f"Saved raw transcript {transcript.get('transcript_id')} to JSON file.")
-        except Exception as e:
-            logger.error(f"Failed to save raw transcript to JSON file: {e}")
+    Save raw transcript to the configured backend.
+    """
+    await get_backend().save_raw(transcript)
 
 async def save_processed_result(result: dict) -> None:
     """
-    Save processed result to MongoDB or append to JSON file.
-    """
-    if USE_MONGO and _processed_collection:
-        try:
-            await asyncio.to_thread(_processed_collection.insert_one, result)
-            logger.info(f"Saved processed result {result.get('transcript_id')} to MongoDB.")
-        except Exception as e:
-            logger.error(f"Failed to save processed result to MongoDB: {e}")
-    else:
-        try:
-            await asyncio.to_thread(
-                lambda: open(PROCESSED_JSON_FILE, "a").write(json.dumps(result) + "\n")
-            )
-            logger.info(f"Saved processed result {result.get('transcript_id')} to JSON file.")
-        except Exception as e:
-            logger.error(f"Failed to save processed result to JSON file: {e}")
+    Save processed result to the configured backend.
+    """
+    await get_backend().save_processed(result)
 
 async def save_error(error_entry: dict) -> None:
     """
-    Append an error record to the errors JSON file.
+    Record a pipeline error with the configured backend.
     """
-    try:
-        await asyncio.to_thread(
-            lambda: open(ERRORS_FILE, "a").write(json.dumps(error_entry) + "\n")
-        )
-        logger.error(f"Logged pipeline error: {error_entry}")
-    except Exception as e:
-        logger.error(f"Failed to save error to JSON file: {e}")
+    await get_backend().save_error(error_entry)
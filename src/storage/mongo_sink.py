@@ -0,0 +1,121 @@
+# Bulk MongoDB persistence
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from src.storage.writer import BatchWriter
+
+try:
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+except ImportError:
+    UpdateOne = None
+    BulkWriteError = None
+
+logger = logging.getLogger("mongo-sink")
+
+# Documents per insert_many, longest a document waits for its batch, and threads dedicated to Mongo writes
+MONGO_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", "500"))
+MONGO_FLUSH_MS = float(os.getenv("MONGO_FLUSH_MS", "200"))
+MONGO_WRITE_THREADS = int(os.getenv("MONGO_WRITE_THREADS", "2"))
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Dedicated pool so slow Atlas round trips don't starve asyncio.to_thread users
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MONGO_WRITE_THREADS, thread_name_prefix="mongo")
+    return _executor
+
+
+class MongoBatchSink(BatchWriter):
+    """
+    Coalesces documents for one collection into unordered bulk writes on a dedicated thread pool.
+
+    With a `key`, each document is an idempotent upsert ($setOnInsert) on that field, backed by a
+    unique index, so replays never create duplicates; without one, batches use insert_many.
+    Unordered batches keep going past individual failures; each batch's outcome is kept in
+    last_batch and accumulated in stats.
+    """
+
+    def __init__(
+        self,
+        collection,
+        key: str | None = None,
+        batch_size: int = MONGO_BATCH_SIZE,
+        flush_interval_ms: float = MONGO_FLUSH_MS
+    ):
+        super().__init__(f"mongo:{collection.name}", batch_size, flush_interval_ms)
+        self._collection = collection
+        self._key = key
+        self._index_ready = False
+        self.last_batch: dict = {}
+        self.stats = {"batches": 0, "inserted": 0, "duplicates": 0, "failed": 0}
+
+    async def _write_batch(self, records: list) -> None:
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(_get_executor(), self._insert, records)
+        self.last_batch = report
+        self.stats["batches"] += 1
+        self.stats["inserted"] += report["inserted"]
+        self.stats["duplicates"] += report["duplicates"]
+        self.stats["failed"] += report["failed"]
+        if report["failed"]:
+            logger.error(
+                f"[{self.name}] Batch of {report['submitted']}: {report['inserted']} inserted, "
+                f"{report['failed']} failed; first error: {report['errors'][0]}"
+            )
+        else:
+            logger.info(
+                f"[{self.name}] Wrote batch: {report['inserted']} inserted, {report['duplicates']} duplicates skipped."
+            )
+
+    def _ensure_index(self) -> None:
+        if self._index_ready:
+            return
+        try:
+            self._collection.create_index(self._key, unique=True)
+        except Exception as e:
+            # Pre-existing duplicates block the unique index; upserts still dedupe new writes
+            logger.error(f"[{self.name}] Could not create unique index on {self._key}: {e}")
+        self._index_ready = True
+
+    def _insert(self, records: list) -> dict:
+        # insert_many adds _id to the documents it is given; copy so callers' dicts stay JSON-serializable
+        documents = [dict(record) for record in records]
+        report = {"submitted": len(documents), "inserted": 0, "duplicates": 0, "failed": 0, "errors": []}
+        try:
+            if self._key is not None:
+                self._ensure_index()
+                operations = [
+                    UpdateOne({self._key: doc[self._key]}, {"$setOnInsert": doc}, upsert=True)
+                    for doc in documents if doc.get(self._key) is not None
+                ]
+                keyless = [doc for doc in documents if doc.get(self._key) is None]
+                if operations:
+                    result = self._collection.bulk_write(operations, ordered=False)
+                    report["inserted"] += result.upserted_count
+                    report["duplicates"] += result.matched_count
+                if keyless:
+                    report["inserted"] += len(self._collection.insert_many(keyless, ordered=False).inserted_ids)
+            else:
+                result = self._collection.insert_many(documents, ordered=False)
+                report["inserted"] = len(result.inserted_ids)
+        except Exception as e:
+            if BulkWriteError is not None and isinstance(e, BulkWriteError):
+                details = e.details or {}
+                write_errors = details.get("writeErrors", [])
+                report["inserted"] += details.get("nInserted", 0) + details.get("nUpserted", 0)
+                report["duplicates"] += details.get("nMatched", 0)
+                report["failed"] = len(write_errors) or len(documents) - report["inserted"] - report["duplicates"]
+                report["errors"] = [
+                    {"index": err.get("index"), "code": err.get("code"), "message": err.get("errmsg")}
+                    for err in write_errors
+                ]
+            else:
+                report["failed"] = len(documents) - report["inserted"] - report["duplicates"]
+                report["errors"] = [{"message": str(e)}]
+        return report
@@ -0,0 +1,93 @@
+# In-memory seen-set backed by a JSONL file on disk
+import json
+import logging
+import threading
+from typing import Optional, Set
+
+logger = logging.getLogger("seen")
+
+
+class SeenSet:
+    """
+    Set of keys (transcript ids by default) already handled, seeded once from a JSONL file.
+
+    Lookups are O(1) in memory. Besides completed keys it tracks keys currently in flight, so a
+    duplicate arriving while the original is still being processed is also suppressed. Persisting
+    new keys is left to the caller, which appends the record to the same file.
+    """
+
+    def __init__(self, path: str, key: str = "transcript_id"):
+        self.path = path
+        self.key = key
+        self._done: Set[str] = set()
+        self._in_flight: Set[str] = set()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    def load(self) -> None:
+        """
+        Read every key recorded in the backing file. Blocking; safe to call repeatedly.
+        """
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        value = self._key_of(line)
+                        if value is not None:
+                            self._done.add(value)
+            except FileNotFoundError:
+                pass
+            self._loaded = True
+            logger.info(f"Loaded {len(self._done)} seen keys from {self.path}")
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _key_of(self, line: str) -> Optional[str]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line).get(self.key)
+        except (ValueError, AttributeError):
+            return None
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._done or value in self._in_flight
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def add(self, value: str) -> bool:
+        """
+        Mark a key as done. Returns False if it was already seen.
+        """
+        if value in self:
+            return False
+        self._done.add(value)
+        return True
+
+    def claim(self, value: str) -> bool:
+        """
+        Start handling a key. Returns False if it is already done or in flight elsewhere.
+        """
+        if value in self:
+            return False
+        self._in_flight.add(value)
+        return True
+
+    def complete(self, value: str) -> None:
+        """
+        Move a claimed key to done.
+        """
+        self._in_flight.discard(value)
+        self._done.add(value)
+
+    def release(self, value: str) -> None:
+        """
+        Give up a claim without completing it, so a later replay may retry the key.
+        """
+        self._in_flight.discard(value)
@@ -0,0 +1,163 @@
+# Group-commit batching writers for the storage sinks
+import os
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("writer")
+
+# Records per batch, longest a record waits before its batch is written, and fsync policy ("never" or "batch")
+JSON_WRITER_BATCH_SIZE = int(os.getenv("JSON_WRITER_BATCH_SIZE", "256"))
+JSON_WRITER_FLUSH_MS = float(os.getenv("JSON_WRITER_FLUSH_MS", "100"))
+JSON_FSYNC = os.getenv("JSON_FSYNC", "never").lower()
+
+
+class BatchWriter:
+    """
+    Base for single-owner batching sinks. Callers enqueue records with write(); one background
+    task groups them by size or time and hands each batch to _write_batch().
+    """
+
+    def __init__(self, name: str, batch_size: int, flush_interval_ms: float):
+        self.name = name
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval_ms / 1000.0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+        self.records_written = 0
+        self.batches_written = 0
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def _ensure_started(self) -> None:
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run())
+
+    async def write(self, record: Any) -> None:
+        """
+        Enqueue a record. Returns immediately; use flush() to wait until it is written.
+        """
+        if self._task is not None and self._task.done():
+            raise RuntimeError(f"Writer for {self.name} is closed")
+        self._ensure_started()
+        self._queue.put_nowait(record)
+
+    async def flush(self) -> None:
+        """
+        Wait until every record enqueued before this call has been written.
+        """
+        if self._task is None or self._task.done():
+            return
+        marker = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(marker)
+        await marker
+
+    async def close(self) -> None:
+        """
+        Write everything still queued, then stop the writer task and release resources.
+        """
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self.flush()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._close_resources()
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self._flush_interval
+            while len(batch) < self._batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - self._loop.time()
+                # A flush marker means someone is waiting: don't hold the batch back
+                if remaining <= 0 or isinstance(batch[-1], asyncio.Future):
+                    break
+                # Sleep until the next record or the deadline, whichever comes first
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            records = [item for item in batch if not isinstance(item, asyncio.Future)]
+            if records:
+                try:
+                    await self._write_batch(records)
+                    self.records_written += len(records)
+                    self.batches_written += 1
+                except Exception as e:
+                    logger.error(f"Failed to write {len(records)} records to {self.name}: {e}")
+            for item in batch:
+                if isinstance(item, asyncio.Future) and not item.done():
+                    item.set_result(None)
+
+    async def _write_batch(self, records: list) -> None:
+        raise NotImplementedError
+
+    async def _close_resources(self) -> None:
+        pass
+
+
+class JSONLWriter(BatchWriter):
+    """
+    Single owner of one JSONL file. Batches are appended with a single write call on a file handle
+    that stays open, so concurrent workers never interleave partial lines.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = JSON_WRITER_BATCH_SIZE,
+        flush_interval_ms: float = JSON_WRITER_FLUSH_MS,
+        fsync: str = JSON_FSYNC
+    ):
+        """
+        Args:
+            path: file to append to.
+            batch_size: records written per batch at most.
+            flush_interval_ms: longest a record waits for its batch to fill.
+            fsync: "batch" to fsync after every batch, "never" to leave it to the OS.
+        """
+        super().__init__(path, batch_size, flush_interval_ms)
+        self.path = path
+        self._fsync = fsync == "batch"
+        self._file = None
+
+    async def _write_batch(self, records: list) -> None:
+        await asyncio.to_thread(self._append, records)
+
+    async def _close_resources(self) -> None:
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    def _append(self, records: list) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+
+def get_loop_writer(writers: dict, key: str, factory: Callable[[], BatchWriter]) -> BatchWriter:
+    """
+    Return the writer registered under `key` for the running event loop, creating it with `factory`
+    if there is none yet or the existing one belongs to another loop.
+    """
+    writer = writers.get(key)
+    if writer is None or (writer.loop is not None and writer.loop is not asyncio.get_running_loop()):
+        writer = factory()
+        writers[key] = writer
+    return writer
@@ -0,0 +1,351 @@
+# Multi-process supervisor: one stream reader fanning transcripts out to K pipeline processes
+import os
+import zlib
+import signal
+import asyncio
+import logging
+import threading
+import concurrent.futures
+import multiprocessing as mp
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from src.api.client import MordorAPIClient
+from src.api.ndjson import dumps, loads
+from src.queue.durable import save_checkpoint, load_checkpoint
+
+# Keep this module's imports light: shard processes import it before applying their environment,
+# and src.app (and the LLM modules under it) must only be imported after that.
+
+load_dotenv()
+logger = logging.getLogger("supervisor")
+
+# Number of pipeline processes (0 = one per core), worker tasks in each, and transcripts buffered per shard
+SUPERVISOR_PROCESSES = int(os.getenv("SUPERVISOR_PROCESSES", "0")) or os.cpu_count() or 1
+SHARD_WORKER_COUNT = int(os.getenv("SHARD_WORKER_COUNT", os.getenv("WORKER_COUNT", "10")))
+SHARD_BUFFER = int(os.getenv("SHARD_BUFFER", "64"))
+# Seconds between shard metric reports, and how long shutdown waits for a shard to finish
+SHARD_REPORT_SECONDS = float(os.getenv("SHARD_REPORT_SECONDS", "10"))
+SUPERVISOR_SHUTDOWN_TIMEOUT = float(os.getenv("SUPERVISOR_SHUTDOWN_TIMEOUT", "120"))
+# Divide the Gemini and submit quotas between processes, so together they stay within the account limits
+SUPERVISOR_SPLIT_QUOTAS = os.getenv("SUPERVISOR_SPLIT_QUOTAS", "true").lower() == "true"
+# Transcripts read but not yet handed to a shard when a signal arrives are checkpointed here
+SUPERVISOR_CHECKPOINT_FILE = os.getenv("CHECKPOINT_FILE", "checkpoint.jsonl") + ".supervisor"
+
+# End-of-input marker on a shard's work pipe
+_END = b""
+
+
+def shard_for(transcript: dict, shards: int) -> int:
+    """
+    Stable shard index for a transcript. All transcripts of a session (and every replay of a
+    transcript) land on the same shard, so per-process dedupe stays complete.
+    """
+    key = transcript.get("session_id") or transcript.get("transcript_id") or ""
+    return zlib.crc32(str(key).encode("utf-8")) % shards
+
+
+def shard_environment(processes: int) -> Dict[str, str]:
+    """
+    Environment overrides for each shard process: its share of the rate quotas.
+    """
+    if not SUPERVISOR_SPLIT_QUOTAS or processes <= 1:
+        return {}
+    from src.processing.llm import GEMINI_RPM, GEMINI_TPM
+    from src.app import SUBMIT_RATE_LIMIT, SUBMIT_BURST
+    return {
+        "GEMINI_RPM": str(max(GEMINI_RPM / processes, 1.0)),
+        "GEMINI_TPM": str(max(GEMINI_TPM / processes, 1.0)),
+        "SUBMIT_RATE_LIMIT": str(max(SUBMIT_RATE_LIMIT // processes, 1)),
+        "SUBMIT_BURST": str(max(SUBMIT_BURST // processes, 1)),
+    }
+
+
+def combine_metrics(reports: Dict[int, dict]) -> dict:
+    """
+    Fold the latest report of every shard into one summary.
+    """
+    total = {
+        "shards": len(reports), "alive": 0, "received": 0, "workers": 0,
+        "depth": 0, "max_depth": 0, "blocked_puts": 0, "blocked_put_seconds": 0.0,
+        "llm_cache_hits": 0, "llm_cache_misses": 0,
+    }
+    for report in reports.values():
+        queue = report.get("queue", {})
+        total["alive"] += 0 if report.get("done") else 1
+        total["received"] += report.get("received", 0)
+        total["workers"] += report.get("workers", 0)
+        total["depth"] += queue.get("depth", 0)
+        total["max_depth"] = max(total["max_depth"], queue.get("max_depth", 0))
+        total["blocked_puts"] += queue.get("blocked_puts", 0)
+        total["blocked_put_seconds"] += queue.get("blocked_put_seconds", 0.0)
+        total["llm_cache_hits"] += report.get("llm_cache", {}).get("hits", 0)
+        total["llm_cache_misses"] += report.get("llm_cache", {}).get("misses", 0)
+    return total
+
+
+def _shard_main(index: int, work_conn, reports, env: Dict[str, str]) -> None:
+    # Shutdown is driven by the supervisor (end marker, forwarded SIGTERM), not by the terminal's Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    os.environ.update(env)
+    asyncio.run(_run_shard(index, work_conn, reports))
+
+
+def _read_work(work_conn, pipeline, loop, stopping: threading.Event) -> None:
+    # Blocking pipe reads on a thread; put() is awaited so a full queue stops reading the pipe.
+    # Once stopping, transcripts are no longer queued but set aside for the shutdown checkpoint.
+    while True:
+        try:
+            data = work_conn.recv_bytes()
+        except EOFError:
+            break
+        if data == _END:
+            break
+        transcript = loads(data)
+        if stopping.is_set():
+            loop.call_soon_threadsafe(pipeline.interrupted.append, transcript)
+            continue
+        future = asyncio.run_coroutine_threadsafe(pipeline.put(transcript), loop)
+        while True:
+            try:
+                future.result(timeout=0.2)
+                break
+            except concurrent.futures.TimeoutError:
+                if stopping.is_set():
+                    future.cancel()
+                    loop.call_soon_threadsafe(pipeline.interrupted.append, transcript)
+                    break
+
+
+async def _run_shard(index: int, work_conn, reports) -> None:
+    from src.app import Pipeline, CALLLIVE_API_KEY, CALLLIVE_BASE_URL, CHECKPOINT_FILE, install_signal_handlers
+    from src.queue.durable import DURABLE_QUEUE_PATH
+    from src.metrics import METRICS_PORT, start_metrics_server
+    from src.storage.db import SEEN_FILE, set_seen_path
+
+    async with MordorAPIClient(CALLLIVE_API_KEY, CALLLIVE_BASE_URL) as client:
+        if not await client.authenticate():
+            logger.error(f"[shard {index}] Authentication failed. Exiting.")
+            reports.put({"shard": index, "done": True, "error": "authentication failed"})
+            return
+
+        # Per-shard state files: a session always lands on the same shard, so its dedupe history is local
+        durable_path = f"{DURABLE_QUEUE_PATH}.{index}" if DURABLE_QUEUE_PATH else ""
+        set_seen_path(f"{SEEN_FILE}.{index}")
+        pipeline = Pipeline(
+            client, worker_count=SHARD_WORKER_COUNT, durable_path=durable_path,
+            checkpoint_path=f"{CHECKPOINT_FILE}.{index}"
+        )
+        await pipeline.start()
+        # Each shard has its own registry; the supervisor's port is METRICS_PORT, shards follow it
+        metrics_server = await start_metrics_server(METRICS_PORT + 1 + index if METRICS_PORT else 0)
+        stop = asyncio.Event()
+        install_signal_handlers(stop, signals=(signal.SIGTERM,))
+        stopping = threading.Event()
+
+        async def report():
+            while True:
+                await asyncio.sleep(SHARD_REPORT_SECONDS)
+                reports.put({"shard": index, **pipeline.metrics()})
+
+        async def relay_stop():
+            await stop.wait()
+            stopping.set()
+
+        reporter = asyncio.create_task(report())
+        relay = asyncio.create_task(relay_stop())
+        loop = asyncio.get_running_loop()
+        # A daemon thread, so a reader stuck on a dead pipe never holds up process exit
+        read_done = loop.create_future()
+
+        def read():
+            try:
+                _read_work(work_conn, pipeline, loop, stopping)
+            finally:
+                loop.call_soon_threadsafe(read_done.set_result, None)
+
+        threading.Thread(target=read, name=f"shard-{index}-reader", daemon=True).start()
+        await read_done
+        await pipeline.finish(stop)
+        reporter.cancel()
+        relay.cancel()
+        reports.put({"shard": index, "done": True, **pipeline.metrics()})
+        if metrics_server is not None:
+            await metrics_server.cleanup()
+
+
+class Supervisor:
+    """
+    Reads the transcript stream once and hash-partitions it by session over K pipeline processes.
+
+    Each process runs its own Pipeline with its own API session, LLM limiter, submitter and
+    storage writers. Transcripts travel as JSON bytes over one-way pipes; each shard has a bounded
+    buffer and a sender task, so a slow shard backs up only its own sessions until the buffer
+    fills. Shards report metrics on a shared queue, which the supervisor combines.
+    """
+
+    def __init__(self, processes: int = SUPERVISOR_PROCESSES, buffer: int = SHARD_BUFFER):
+        self.processes = max(1, processes)
+        self.buffer = buffer
+        self.reports: Dict[int, dict] = {}
+        self._ctx = mp.get_context("spawn")
+        self._procs: List[Any] = []
+        self._conns: List[Any] = []
+        self._buffers: List[asyncio.Queue] = []
+        self._dead = set()
+        self._unrouted: List[dict] = []
+        self._report_queue = None
+
+    def start(self) -> None:
+        env = shard_environment(self.processes)
+        self._report_queue = self._ctx.Queue()
+        for index in range(self.processes):
+            recv_conn, send_conn = self._ctx.Pipe(duplex=False)
+            proc = self._ctx.Process(
+                target=_shard_main, args=(index, recv_conn, self._report_queue, env),
+                name=f"pipeline-shard-{index}", daemon=False
+            )
+            proc.start()
+            recv_conn.close()
+            self._procs.append(proc)
+            self._conns.append(send_conn)
+        logger.info(f"[supervisor] Started {self.processes} pipeline processes")
+
+    async def _send_loop(self, index: int) -> None:
+        # Runs until the end marker. Once the shard is gone, whatever reaches its buffer is
+        # rerouted to the live shards, so nothing is left in a buffer nobody reads.
+        buffer = self._buffers[index]
+        conn = self._conns[index]
+        while True:
+            data = await buffer.get()
+            if index not in self._dead:
+                try:
+                    await asyncio.to_thread(conn.send_bytes, data)
+                except (BrokenPipeError, OSError) as e:
+                    if data != _END:
+                        logger.error(f"[supervisor] Shard {index} is gone ({e}); rerouting its transcripts")
+                    self._dead.add(index)
+                else:
+                    if data == _END:
+                        return
+                    continue
+            if data == _END:
+                return
+            try:
+                await self._route(loads(data), data)
+            except RuntimeError:
+                # No shard left to take it: keep it for the checkpoint
+                self._unrouted.append(loads(data))
+
+    async def _route(self, transcript: dict, data: Optional[bytes] = None) -> None:
+        live = [i for i in range(self.processes) if i not in self._dead]
+        if not live:
+            raise RuntimeError("All pipeline processes have exited")
+        index = shard_for(transcript, self.processes)
+        if index in self._dead:
+            index = live[shard_for(transcript, len(live))]
+        await self._buffers[index].put(data if data is not None else dumps(transcript))
+
+    async def _collect_reports(self) -> None:
+        while True:
+            report = await asyncio.to_thread(self._report_queue.get)
+            if report is None:
+                return
+            self.reports[report["shard"]] = report
+            if report.get("error"):
+                self._dead.add(report["shard"])
+
+    async def _log_reports(self) -> None:
+        while True:
+            await asyncio.sleep(SHARD_REPORT_SECONDS)
+            logger.info(f"[supervisor] Combined metrics: {combine_metrics(self.reports)}")
+
+    async def _intake(self, client: MordorAPIClient) -> None:
+        for transcript in await asyncio.to_thread(load_checkpoint, SUPERVISOR_CHECKPOINT_FILE):
+            await self._route(transcript)
+        async for transcript in client.receive_transcripts():
+            await self._route(transcript)
+
+    async def run(self, client: MordorAPIClient, stop: Optional[asyncio.Event] = None) -> dict:
+        """
+        Start the shard processes, distribute the stream, then shut them down in order: end markers
+        after the last transcript, wait for every shard to finish its queue, join the processes.
+
+        If `stop` is set first, intake stops, SIGTERM is forwarded so every shard drains under its
+        deadline, and transcripts not yet handed to a shard are checkpointed for the next start.
+        Returns the combined final metrics.
+        """
+        self.start()
+        self._buffers = [asyncio.Queue(maxsize=self.buffer) for _ in range(self.processes)]
+        senders = [asyncio.create_task(self._send_loop(i)) for i in range(self.processes)]
+        collector = asyncio.create_task(self._collect_reports())
+        logger_task = asyncio.create_task(self._log_reports())
+        stop = stop or asyncio.Event()
+        reader = asyncio.create_task(self._intake(client))
+        stopper = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait({reader, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            reader.cancel()
+            stopper.cancel()
+            await asyncio.gather(reader, stopper, return_exceptions=True)
+            unsent = []
+            if stop.is_set():
+                for proc in self._procs:
+                    if proc.is_alive():
+                        proc.terminate()
+                for buffer in self._buffers:
+                    while not buffer.empty():
+                        unsent.append(loads(buffer.get_nowait()))
+            for buffer in self._buffers:
+                await buffer.put(_END)
+            await asyncio.gather(*senders, return_exceptions=True)
+            await asyncio.to_thread(save_checkpoint, SUPERVISOR_CHECKPOINT_FILE, unsent + self._unrouted)
+            for conn in self._conns:
+                conn.close()
+            await asyncio.to_thread(self._join)
+            self._report_queue.put(None)
+            await collector
+            logger_task.cancel()
+        if not reader.cancelled() and reader.exception() is not None:
+            logger.error(f"[supervisor] Transcript stream failed: {reader.exception()}")
+
+        summary = combine_metrics(self.reports)
+        logger.info(f"[supervisor] Final combined metrics: {summary}")
+        return summary
+
+    def _join(self) -> None:
+        for proc in self._procs:
+            proc.join(SUPERVISOR_SHUTDOWN_TIMEOUT)
+            if proc.is_alive():
+                logger.error(f"[supervisor] {proc.name} did not finish in time; terminating")
+                proc.terminate()
+                proc.join()
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s")
+    api_key = os.getenv("CALLLIVE_API_KEY")
+    base_url = os.getenv("CALLLIVE_BASE_URL")
+    if not api_key or not base_url:
+        logger.error("CALLLIVE_API_KEY or CALLLIVE_BASE_URL not set in .env")
+        raise SystemExit(1)
+
+    async with MordorAPIClient(api_key, base_url) as client:
+        if not await client.authenticate():
+            logger.error("Authentication failed. Exiting.")
+            return
+        from src.app import install_signal_handlers
+        from src.metrics import start_metrics_server
+        stop = asyncio.Event()
+        install_signal_handlers(stop)
+        metrics_server = await start_metrics_server()
+        try:
+            await Supervisor().run(client, stop)
+        finally:
+            if metrics_server is not None:
+                await metrics_server.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
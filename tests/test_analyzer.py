@@ -1,4 +1,5 @@
 import os
+import asyncio
 import importlib
 import pytest
 import json
@@ -75,3 +76,37 @@ def test_analysis_fallback(monkeypatch):
     assert result["interest_level"] == "medium"
     assert result["preparedness_level"] == "medium"
     assert result["action_items"] == []
+
+# --- Async variant tests ---
+def test_async_analysis(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "false")
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    from src.processing import analyzer
+    importlib.reload(analyzer)
+
+    fake_json = {
+        "sentiment": 0.9,
+        "interest_level": "high",
+        "preparedness_level": "high",
+        "action_items": []
+    }
+
+    async def fake_generate_async(prompt):
+        return SimpleNamespace(text=json.dumps(fake_json))
+    analyzer.model = SimpleNamespace(generate_content_async=fake_generate_async)
+
+    result = asyncio.run(analyzer.analyze_insights_async(["agent: Test"], {}))
+    assert result == fake_json
+
+def test_async_analysis_fallback(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "false")
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    from src.processing import analyzer
+    importlib.reload(analyzer)
+
+    async def raise_exc(prompt):
+        raise RuntimeError("LLM Error")
+    analyzer.model = SimpleNamespace(generate_content_async=raise_exc)
+
+    result = asyncio.run(analyzer.analyze_insights_async(["dummy"], {}))
+    assert result == analyzer.fallback_insights()
@@ -0,0 +1,70 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+from src.storage import db
+from src.storage.backends import MemoryBackend
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setenv("CALLLIVE_API_KEY", "key")
+    monkeypatch.setenv("CALLLIVE_BASE_URL", "http://127.0.0.1:1/api")
+    monkeypatch.setenv("USE_MOCK_LLM", "true")
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("src.app")
+    backend = MemoryBackend()
+    db.set_backend(backend)
+    monkeypatch.setattr(db, "_seen_transcripts", db.SeenSet(str(tmp_path / "seen.json")))
+    yield module, backend
+    db.set_backend(None)
+
+
+# --- A stop signal drains up to the deadline, then checkpoints unfinished work ---
+def test_stop_checkpoints_unfinished_transcripts(app, monkeypatch, tmp_path):
+    module, backend = app
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+
+    async def slow_process(transcript, timeouts=None):
+        await asyncio.sleep(30)
+
+    monkeypatch.setattr(module, "process_transcript", slow_process)
+
+    async def scenario():
+        pipeline = module.Pipeline(client=None, worker_count=2, checkpoint_path=checkpoint)
+        await pipeline.start()
+        for i in range(5):
+            await pipeline.put({"transcript_id": f"t-{i}"})
+        await asyncio.sleep(0.05)
+        stop = asyncio.Event()
+        stop.set()
+        await asyncio.wait_for(pipeline.finish(stop, deadline=0.1), 5)
+
+    asyncio.run(scenario())
+    with open(checkpoint) as f:
+        saved = sorted(json.loads(line)["transcript_id"] for line in f)
+    assert saved == [f"t-{i}" for i in range(5)]
+    # Cancellation is a shutdown, not a pipeline error
+    assert backend.errors == []
+
+    async def restart():
+        pipeline = module.Pipeline(client=None, worker_count=0, checkpoint_path=checkpoint)
+        await pipeline.start()
+        return pipeline.queue.qsize()
+
+    assert asyncio.run(restart()) == 5
+    # Restoring leaves the checkpoint in place until the next shutdown replaces it
+    assert asyncio.run(restart()) == 5
+
+    async def stop_again():
+        pipeline = module.Pipeline(client=None, worker_count=0, checkpoint_path=checkpoint)
+        await pipeline.start()
+        stop = asyncio.Event()
+        stop.set()
+        await asyncio.wait_for(pipeline.finish(stop, deadline=0.1), 5)
+
+    asyncio.run(stop_again())
+    with open(checkpoint) as f:
+        assert len(f.readlines()) == 5
@@ -0,0 +1,131 @@
+import asyncio
+
+from src.metrics import SCALING_DECISIONS
+from src.queue.autoscale import AIMDController, PoolSample, RETIRED, WorkerPool
+
+
+def _sample(**overrides):
+    values = dict(interval=5.0, depth=0, busy=0, completed=0, latency=0.0, requests=0, throttled=0)
+    values.update(overrides)
+    return PoolSample(**values)
+
+
+# --- AIMD decisions ---
+def test_throttling_backs_off_multiplicatively():
+    controller = AIMDController(min_workers=2, max_workers=40, max_throttle_rate=0.05)
+    assert controller.decide(20, _sample(depth=50, busy=20, requests=100, throttled=10)) == (10, "throttled")
+    # Under the allowed rate, throttling alone changes nothing
+    assert controller.decide(20, _sample(requests=100, throttled=1, busy=20))[1] != "throttled"
+    assert controller.decide(3, _sample(requests=10, throttled=10)) == (2, "throttled")
+
+
+def test_backlog_grows_additively_while_littles_law_wants_more():
+    controller = AIMDController(min_workers=1, max_workers=12, step=2, drain_seconds=10)
+    # 10 completed in 5s at 2s each, plus 50 queued to drain in 10s: (2 + 5) * 2 = 14 workers wanted
+    assert controller.decide(4, _sample(depth=50, busy=4, completed=10, latency=2.0)) == (6, "backlog")
+    assert controller.decide(12, _sample(depth=50, busy=12, completed=30, latency=2.0)) == (12, "hold")
+    # Enough workers for the load already
+    assert controller.decide(6, _sample(depth=1, busy=6, completed=10, latency=0.5)) == (6, "hold")
+
+
+def test_inflated_latency_shrinks_under_backlog():
+    controller = AIMDController(min_workers=1, max_workers=50, step=2, latency_inflation=3)
+    controller.decide(10, _sample(depth=5, busy=10, completed=20, latency=1.0))
+    assert controller.decide(10, _sample(depth=5, busy=10, completed=20, latency=5.0)) == (8, "latency")
+
+
+def test_idle_workers_shrink_towards_busy():
+    controller = AIMDController(min_workers=2, max_workers=50, step=4)
+    assert controller.decide(20, _sample(busy=3)) == (16, "idle")
+    assert controller.decide(5, _sample(busy=0)) == (2, "idle")
+    assert controller.decide(2, _sample(busy=0)) == (2, "hold")
+
+
+# --- Pool mechanics ---
+def test_pool_grows_and_retires_between_items():
+    processed = []
+
+    async def worker(queue, retire):
+        while not retire():
+            item = await queue.get()
+            await asyncio.sleep(0.01)
+            processed.append(item)
+            queue.task_done()
+
+    async def scenario():
+        queue = asyncio.Queue()
+        pool = WorkerPool(queue, worker, min_workers=1, max_workers=8, initial_workers=2, interval=3600)
+        await pool.start()
+        assert pool.running() == 2
+        pool.resize(6)
+        assert pool.running() == 6
+        pool.resize(3)
+        for i in range(20):
+            queue.put_nowait(i)
+        await queue.join()
+        await asyncio.sleep(0.05)
+        running = pool.running()
+        pool.resize(20)
+        grown = pool.running()
+        await pool.close()
+        return running, grown
+
+    running, grown = asyncio.run(scenario())
+    assert running == 3
+    assert grown == 8
+    assert sorted(processed) == list(range(20))
+
+
+def test_idle_workers_retire_without_new_items():
+    processed = []
+
+    async def worker(queue, retire):
+        while True:
+            item = await retire.get(queue)
+            if item is RETIRED:
+                return
+            processed.append(item)
+            queue.task_done()
+
+    async def scenario():
+        queue = asyncio.Queue()
+        pool = WorkerPool(queue, worker, min_workers=1, max_workers=8, initial_workers=6, interval=3600)
+        await pool.start()
+        await asyncio.sleep(0.01)
+        # Every worker is blocked on the empty queue when the pool shrinks
+        pool.resize(2)
+        await asyncio.sleep(0.01)
+        idle = pool.running()
+        for i in range(10):
+            queue.put_nowait(i)
+        await asyncio.wait_for(queue.join(), 1)
+        result = (idle, pool.running(), pool.retire.pending)
+        await pool.close()
+        return result
+
+    idle, running, pending = asyncio.run(scenario())
+    assert (idle, running, pending) == (2, 2, 0)
+    assert sorted(processed) == list(range(10))
+
+
+def test_control_loop_applies_decisions():
+    class Up:
+        def decide(self, current, sample):
+            return current + 1, "backlog"
+
+    async def worker(queue, retire):
+        while not retire():
+            await queue.get()
+
+    async def scenario():
+        pool = WorkerPool(asyncio.Queue(), worker, min_workers=1, max_workers=3, interval=0.01, controller=Up())
+        before = SCALING_DECISIONS.value(direction="up", reason="backlog")
+        await pool.start()
+        await asyncio.sleep(0.1)
+        result = (pool.target, pool.running(), SCALING_DECISIONS.value(direction="up", reason="backlog") - before)
+        await pool.close()
+        return result
+
+    target, running, decisions = asyncio.run(scenario())
+    assert target == 3 and running == 3
+    assert decisions >= 2
@@ -0,0 +1,129 @@
+import asyncio
+from fastapi.testclient import TestClient
+
+from scripts.mock_api import app as mock_app
+from src.api.batcher import BatchSubmitter
+
+
+class FakeClient:
+    def __init__(self, batch_supported=True, batch_error=False, delay=0.0):
+        self.batch_supported = batch_supported
+        self.batch_error = batch_error
+        self.delay = delay
+        self.batch_calls = []
+        self.single_calls = []
+
+    async def submit_processed_results_batch(self, results):
+        self.batch_calls.append([r["transcript_id"] for r in results])
+        await asyncio.sleep(self.delay)
+        if not self.batch_supported:
+            return None
+        if self.batch_error:
+            return [{"error": "boom"} for _ in results]
+        return [{"status": "ok", "transcript_id": r["transcript_id"]} for r in results]
+
+    async def submit_processed_result(self, result):
+        self.single_calls.append(result["transcript_id"])
+        return {"status": "ok", "transcript_id": result["transcript_id"], "single": True}
+
+
+async def _submit_all(submitter, count):
+    responses = await asyncio.gather(
+        *(submitter.submit({"transcript_id": f"t-{i}"}) for i in range(count))
+    )
+    await submitter.close()
+    return responses
+
+
+# --- Concurrent submits share one request and get their own responses ---
+def test_batches_concurrent_submits():
+    client = FakeClient()
+    submitter = BatchSubmitter(client, max_batch_size=10, max_delay_ms=20)
+    responses = asyncio.run(_submit_all(submitter, 5))
+    assert [r["transcript_id"] for r in responses] == [f"t-{i}" for i in range(5)]
+    assert client.batch_calls == [[f"t-{i}" for i in range(5)]]
+    assert client.single_calls == []
+
+
+def test_batch_size_caps_requests():
+    client = FakeClient()
+    submitter = BatchSubmitter(client, max_batch_size=3, max_delay_ms=20)
+    asyncio.run(_submit_all(submitter, 7))
+    assert [len(call) for call in client.batch_calls] == [3, 3]
+    # A lone leftover result is posted on its own
+    assert client.single_calls == ["t-6"]
+
+
+# --- Missing batch endpoint falls back to pipelined single POSTs ---
+def test_falls_back_to_single_submits():
+    client = FakeClient(batch_supported=False)
+    submitter = BatchSubmitter(client, max_batch_size=10, max_delay_ms=20)
+    responses = asyncio.run(_submit_all(submitter, 4))
+    assert all(r["single"] for r in responses)
+    assert submitter.batch_supported is False
+    assert sorted(client.single_calls) == [f"t-{i}" for i in range(4)]
+    # The batch endpoint is only probed once
+    asyncio.run(_submit_all(submitter, 4))
+    assert len(client.batch_calls) == 1
+
+
+# --- Failed batches shrink the adaptive batch size ---
+def test_failed_batch_halves_batch_size():
+    client = FakeClient(batch_error=True)
+    submitter = BatchSubmitter(client, max_batch_size=8, max_delay_ms=20)
+    responses = asyncio.run(_submit_all(submitter, 8))
+    assert all("error" in r for r in responses)
+    assert submitter.batch_size == 4
+
+
+# --- Cancelled callers: dropped before dispatch, reported after ---
+def test_cancelled_before_dispatch_is_not_sent():
+    client = FakeClient()
+    submitter = BatchSubmitter(client, max_batch_size=10, max_delay_ms=50)
+
+    async def run():
+        doomed = asyncio.create_task(submitter.submit({"transcript_id": "t-cancelled"}))
+        kept = asyncio.create_task(submitter.submit({"transcript_id": "t-kept"}))
+        await asyncio.sleep(0.01)
+        doomed.cancel()
+        response = await kept
+        await submitter.close()
+        return response
+
+    assert asyncio.run(run())["transcript_id"] == "t-kept"
+    assert client.batch_calls == [] and client.single_calls == ["t-kept"]
+
+
+def test_cancelled_in_flight_goes_to_on_abandoned():
+    client = FakeClient(delay=0.05)
+    abandoned = []
+
+    async def on_abandoned(result, response):
+        abandoned.append((result["transcript_id"], response["status"]))
+
+    submitter = BatchSubmitter(client, max_batch_size=2, max_delay_ms=10, on_abandoned=on_abandoned)
+
+    async def run():
+        tasks = [asyncio.create_task(submitter.submit({"transcript_id": f"t-{i}"})) for i in range(2)]
+        await asyncio.sleep(0.02)
+        tasks[0].cancel()
+        response = await tasks[1]
+        await submitter.close()
+        return response
+
+    assert asyncio.run(run())["transcript_id"] == "t-1"
+    assert client.batch_calls == [["t-0", "t-1"]]
+    assert abandoned == [("t-0", "ok")]
+
+
+# --- Mock API batch route ---
+def test_mock_api_batch_route():
+    http = TestClient(mock_app)
+    before = http.get("/api/v1/stats").json()["processed_count"]
+    resp = http.post(
+        "/api/v1/transcripts/process/batch",
+        json={"results": [{"transcript_id": "a"}, {"transcript_id": "b"}]}
+    )
+    assert resp.status_code == 200
+    assert [r["transcript_id"] for r in resp.json()["results"]] == ["a", "b"]
+    assert http.get("/api/v1/stats").json()["processed_count"] == before + 2
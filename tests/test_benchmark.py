@@ -0,0 +1,50 @@
+import asyncio
+import random
+
+import pytest
+
+from scripts import benchmark
+
+
+def test_distributions_are_seeded_and_non_negative():
+    sample = benchmark.parse_distribution("normal:0.1,1")
+    a = [sample(random.Random(3)) for _ in range(5)]
+    b = [sample(random.Random(3)) for _ in range(5)]
+    assert a == b
+    assert all(x >= 0 for x in a)
+    assert benchmark.parse_distribution("const:2")(random.Random()) == 2
+    with pytest.raises(ValueError):
+        benchmark.parse_distribution("zipf:1")
+    with pytest.raises(ValueError):
+        benchmark.parse_distribution("uniform:1")
+
+
+def test_percentiles_nearest_rank():
+    stats = benchmark.summarize_samples([float(i) for i in range(1, 101)])
+    assert (stats["p50"], stats["p95"], stats["p99"], stats["max"]) == (50.0, 95.0, 99.0, 100.0)
+    assert benchmark.summarize_samples([])["p99"] == 0.0
+
+
+def test_benchmark_runs_full_worker_path(monkeypatch, tmp_path):
+    monkeypatch.setenv("CALLLIVE_API_KEY", "key")
+    monkeypatch.setenv("CALLLIVE_BASE_URL", "http://127.0.0.1:1/api")
+    monkeypatch.setenv("USE_MOCK_LLM", "true")
+    monkeypatch.chdir(tmp_path)
+
+    with benchmark.mock_api_server() as base_url:
+        report = asyncio.run(benchmark.run_benchmark(
+            base_url, transcripts=12, workers=[1, 4], storages=["memory", "json"],
+            llm_latency="const:0.001", turns="uniform:1,6", quota_rate=0.1, seed=7,
+            workdir=str(tmp_path / "bench")
+        ))
+
+    assert [(run["storage"], run["workers"]) for run in report["runs"]] == [
+        ("memory", 1), ("memory", 4), ("json", 1), ("json", 4)
+    ]
+    for run in report["runs"]:
+        assert run["succeeded"] == 12 and run["failed"] == 0
+        assert run["latency_seconds"]["count"] == 12
+        assert {"summarize", "extract", "analyze", "store", "submit"} <= set(run["stages"])
+        assert run["llm"]["calls"] >= 36
+    with open(tmp_path / "bench" / "json-w4" / "processed.jsonl") as f:
+        assert len(f.readlines()) == 12
@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.processing import llm
+from src.processing.cache import LLMCache, cache_key
+
+
+def test_key_ignores_whitespace_but_not_template_version():
+    a = cache_key("gemini", "summarizer", "1", "Conversation:\n agent: hi")
+    assert a == cache_key("gemini", "summarizer", "1", "Conversation: agent:   hi")
+    assert a != cache_key("gemini", "summarizer", "2", "Conversation: agent: hi")
+    assert a != cache_key("gemini", "extractor", "1", "Conversation: agent: hi")
+
+
+def test_lru_eviction_and_ttl():
+    now = [1000.0]
+    cache = LLMCache(max_entries=2, ttl_seconds=10, path="", clock=lambda: now[0])
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    # "b" was least recently used
+    assert cache.get("b") is None
+    now[0] += 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    LLMCache(path=path).set("k", "cached text")
+    cache = LLMCache(path=path)
+    assert cache.get("k") == "cached text"
+    assert cache.get("k") == "cached text"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+# --- Identical concurrent prompts share one request; unusable responses are not cached ---
+def test_generate_text_async_single_flight_and_validation(monkeypatch):
+    monkeypatch.setattr(llm, "llm_cache", LLMCache(path=""))
+    calls = []
+
+    async def generate_content_async(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(text="not json" if "bad" in prompt else "ok")
+
+    model = SimpleNamespace(model_name="fake", generate_content_async=generate_content_async)
+
+    async def scenario():
+        results = await asyncio.gather(*(llm.generate_text_async(model, "good prompt", "test") for _ in range(3)))
+        again = await llm.generate_text_async(model, "good prompt", "test")
+        for _ in range(2):
+            await llm.generate_text_async(model, "bad prompt", "test", validate=lambda t: int(t))
+        return results, again
+
+    results, again = asyncio.run(scenario())
+    assert results == ["ok", "ok", "ok"] and again == "ok"
+    assert calls == ["good prompt", "bad prompt", "bad prompt"]
@@ -0,0 +1,265 @@
+import asyncio
+import json
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.api.client import MordorAPIClient
+
+
+def _make_app(state):
+    async def auth(request):
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        return web.json_response({"token": "mock-token"})
+
+    async def process(request):
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        body = await request.json()
+        return web.json_response({"status": "ok", "transcript_id": body.get("transcript_id")})
+
+    async def stats(request):
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        return web.json_response({"processed_count": 3})
+
+    async def stream(request):
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        for i in range(2):
+            await resp.write(json.dumps({"transcript_id": f"t-{i}"}).encode() + b"\n")
+        await resp.write_eof()
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/api/auth", auth)
+    app.router.add_post("/api/v1/transcripts/process", process)
+    app.router.add_get("/api/v1/stats", stats)
+    app.router.add_get("/api/v1/transcripts/stream", stream)
+    return app
+
+
+async def _with_server(state, fn):
+    server = TestServer(_make_app(state))
+    await server.start_server()
+    try:
+        return await fn(str(server.make_url("/api")))
+    finally:
+        await server.close()
+
+
+# --- One pooled session reused across calls ---
+def test_client_reuses_one_connection():
+    state = {"peers": set()}
+
+    async def scenario(base_url):
+        async with MordorAPIClient("key", base_url) as client:
+            assert await client.authenticate()
+            session = client._session
+            for i in range(5):
+                response = await client.submit_processed_result({"transcript_id": f"t-{i}"})
+                assert response["transcript_id"] == f"t-{i}"
+            assert (await client.get_stats())["processed_count"] == 3
+            assert client._session is session
+            streamed = [t async for t in client.receive_transcripts()]
+            assert [t["transcript_id"] for t in streamed] == ["t-0", "t-1"]
+        # Leaving the context closes the session
+        assert client._session is None
+        return session
+
+    session = asyncio.run(_with_server(state, scenario))
+    assert session.closed
+    # Sequential requests all travelled over a single kept-alive connection
+    assert len(state["peers"]) == 1
+
+
+def _make_flaky_stream_app(state):
+    transcripts = [{"transcript_id": f"t-{i}", "timestamp": f"2025-01-01T00:00:0{i}Z"} for i in range(4)]
+
+    async def stream(request):
+        state["requests"].append(dict(request.query))
+        attempt = len(state["requests"])
+        if attempt == 2:
+            return web.Response(status=503, text="busy")
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        if attempt == 1:
+            # Send two transcripts, then drop the connection mid-stream
+            for t in transcripts[:2]:
+                await resp.write(json.dumps(t).encode() + b"\n")
+            request.transport.close()
+            return resp
+        # Resumed stream replays the last transcript before continuing
+        start = [t["transcript_id"] for t in transcripts].index(request.query["after"])
+        for t in transcripts[start:]:
+            await resp.write(json.dumps(t).encode() + b"\n")
+        await resp.write_eof()
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/api/v1/transcripts/stream", stream)
+    return app
+
+
+# --- Stream reconnects, resumes from the cursor and drops replays ---
+def test_stream_reconnects_and_resumes():
+    state = {"requests": []}
+
+    async def scenario():
+        server = TestServer(_make_flaky_stream_app(state))
+        await server.start_server()
+        try:
+            async with MordorAPIClient("key", str(server.make_url("/api"))) as client:
+                client.token = "mock-token"
+                ids = [t["transcript_id"] async for t in client.receive_transcripts(backoff_base=0.01)]
+                return ids, client.stream_cursor
+        finally:
+            await server.close()
+
+    ids, cursor = asyncio.run(scenario())
+    assert ids == ["t-0", "t-1", "t-2", "t-3"]
+    assert cursor == {"transcript_id": "t-3", "timestamp": "2025-01-01T00:00:03Z"}
+    assert state["requests"][0] == {}
+    assert state["requests"][2]["after"] == "t-1"
+
+
+def test_stream_gives_up_after_max_retries():
+    calls = []
+
+    async def stream(request):
+        calls.append(1)
+        return web.Response(status=502, text="bad gateway")
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/api/v1/transcripts/stream", stream)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with MordorAPIClient("key", str(server.make_url("/api"))) as client:
+                client.token = "mock-token"
+                return [t async for t in client.receive_transcripts(max_retries=2, backoff_base=0.01)]
+        finally:
+            await server.close()
+
+    assert asyncio.run(scenario()) == []
+    assert len(calls) == 3
+
+
+# --- Connections that deliver nothing count as failures, including silent stalls ---
+def _run_stream_app(stream, **kwargs):
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/api/v1/transcripts/stream", stream)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with MordorAPIClient("key", str(server.make_url("/api"))) as client:
+                client.token = "mock-token"
+                return [t async for t in client.receive_transcripts(backoff_base=0.01, **kwargs)]
+        finally:
+            await server.close()
+
+    return asyncio.run(scenario())
+
+
+def test_stream_accept_then_drop_exhausts_retries():
+    calls = []
+
+    async def stream(request):
+        calls.append(1)
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        # Replays the same transcript, then drops the connection
+        await resp.write(json.dumps({"transcript_id": "t-0"}).encode() + b"\n")
+        request.transport.close()
+        return resp
+
+    assert [t["transcript_id"] for t in _run_stream_app(stream, max_retries=2)] == ["t-0"]
+    # Only the first connection delivered anything new; the drop after it and the two
+    # replay-only reconnects are three failures in a row
+    assert len(calls) == 3
+
+
+def test_stream_read_timeout_reconnects_stalled_stream():
+    calls = []
+
+    async def stream(request):
+        calls.append(1)
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        await asyncio.sleep(5)
+        return resp
+
+    assert _run_stream_app(stream, max_retries=1, read_timeout=0.1) == []
+    assert len(calls) == 2
+
+
+def _make_expiring_token_app(state):
+    async def auth(request):
+        state["auth_calls"] += 1
+        await asyncio.sleep(0.05)
+        return web.json_response({"token": f"token-{state['auth_calls']}"})
+
+    async def process(request):
+        if request.headers.get("Authorization") != f"Bearer token-{state['auth_calls']}":
+            return web.Response(status=401, text="token expired")
+        state["throttle"] -= 1
+        if state["throttle"] >= 0:
+            return web.Response(status=429, text="slow down", headers={"Retry-After": "0"})
+        body = await request.json()
+        return web.json_response({"status": "ok", "transcript_id": body["transcript_id"]})
+
+    app = web.Application()
+    app.router.add_post("/api/auth", auth)
+    app.router.add_post("/api/v1/transcripts/process", process)
+    return app
+
+
+# --- Expired tokens are refreshed once and requests replayed ---
+def test_concurrent_401s_refresh_token_once():
+    state = {"auth_calls": 0, "throttle": 0}
+
+    async def scenario():
+        server = TestServer(_make_expiring_token_app(state))
+        await server.start_server()
+        try:
+            async with MordorAPIClient("key", str(server.make_url("/api"))) as client:
+                assert await client.authenticate()
+                # Server rotates the token behind the client's back
+                state["auth_calls"] += 1
+                return await asyncio.gather(
+                    *(client.submit_processed_result({"transcript_id": f"t-{i}"}) for i in range(5))
+                )
+        finally:
+            await server.close()
+
+    responses = asyncio.run(scenario())
+    assert [r.get("transcript_id") for r in responses] == [f"t-{i}" for i in range(5)]
+    # One initial auth, one simulated rotation, one refresh
+    assert state["auth_calls"] == 3
+
+
+def test_retries_429_with_retry_after():
+    state = {"auth_calls": 0, "throttle": 2}
+
+    async def scenario():
+        server = TestServer(_make_expiring_token_app(state))
+        await server.start_server()
+        try:
+            async with MordorAPIClient("key", str(server.make_url("/api"))) as client:
+                assert await client.authenticate()
+                return await client.submit_processed_result({"transcript_id": "t-1"})
+        finally:
+            await server.close()
+
+    assert asyncio.run(scenario()) == {"status": "ok", "transcript_id": "t-1"}
+    assert state["throttle"] == -1
+
+
+def test_client_close_is_idempotent():
+    async def scenario():
+        client = MordorAPIClient("key", "http://127.0.0.1:1/api")
+        await client.close()
+        client._get_session()
+        await client.close()
+        await client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+import asyncio
+
+from src.queue.durable import WorkLog, create_durable_queue
+
+
+# --- Unacked items survive a restart and are replayed in order ---
+def test_unacked_items_are_replayed(tmp_path):
+    path = str(tmp_path / "work.db")
+
+    async def first_run():
+        queue = create_durable_queue(path, maxsize=10)
+        for i in range(3):
+            await queue.put({"transcript_id": f"t-{i}"})
+        done = await queue.get()
+        await queue.ack(done)
+        # Simulated crash: t-1 and t-2 were received but never acked
+        await queue.close()
+
+    async def second_run():
+        queue = create_durable_queue(path, maxsize=10)
+        replayed = await queue.recover()
+        items = [queue.get_nowait() for _ in range(replayed)]
+        for item in items:
+            await queue.ack(item)
+        remaining = await queue.worklog.pending_count()
+        await queue.close()
+        return items, remaining
+
+    asyncio.run(first_run())
+    items, remaining = asyncio.run(second_run())
+    assert [t["transcript_id"] for t in items] == ["t-1", "t-2"]
+    assert remaining == 0
+
+
+def test_poison_items_dropped_after_max_attempts(tmp_path):
+    path = str(tmp_path / "work.db")
+
+    async def run():
+        # One restart: replay the log and hand the item to a worker that never acks it
+        queue = create_durable_queue(path, maxsize=10)
+        queue.worklog.max_attempts = 2
+        replayed = await queue.recover()
+        if replayed:
+            queue.get_nowait()
+        await queue.close()
+        return replayed
+
+    async def seed():
+        log = WorkLog(path)
+        await log.append({"transcript_id": "bad"})
+        await log.close()
+
+    asyncio.run(seed())
+    assert [asyncio.run(run()) for _ in range(3)] == [1, 1, 0]
+
+
+# --- Restarts alone never age the backlog ---
+def test_reopening_without_processing_keeps_items(tmp_path):
+    path = str(tmp_path / "work.db")
+
+    async def seed():
+        queue = create_durable_queue(path, maxsize=10)
+        for i in range(3):
+            await queue.put({"transcript_id": f"t-{i}"})
+        await queue.close()
+
+    async def restart():
+        queue = create_durable_queue(path, maxsize=10)
+        replayed = await queue.recover()
+        await queue.close()
+        return replayed
+
+    asyncio.run(seed())
+    assert [asyncio.run(restart()) for _ in range(5)] == [3] * 5
+
+
+def test_durable_priority_queue_replays_by_score(tmp_path):
+    path = str(tmp_path / "work.db")
+
+    async def scenario():
+        queue = create_durable_queue(path, maxsize=10, mode="priority")
+        await queue.put({"transcript_id": "cold", "metadata": {"visitor_interest_level": "low"}})
+        await queue.put({"transcript_id": "hot", "metadata": {"visitor_interest_level": "high"}})
+        await queue.close()
+
+        queue = create_durable_queue(path, maxsize=10, mode="priority")
+        await queue.recover()
+        first = queue.get_nowait()
+        await queue.ack(first)
+        await queue.close()
+        return first["transcript_id"], queue.metrics()
+
+    first, metrics = asyncio.run(scenario())
+    assert first == "hot"
+    assert metrics["bands"]["medium"]["completed"] == 1
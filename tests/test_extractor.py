@@ -1,4 +1,5 @@
 import os
+import asyncio
 import importlib
 import pytest
 import json
@@ -89,3 +90,33 @@ def test_extraction_fallback(monkeypatch):
     assert vd["fitness_level"] is None
     assert vd["permit_status"] == "denied"
     assert result["questionnaire_completion"] == {}
+
+# --- Async variant tests ---
+def test_async_extraction(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "false")
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    from src.processing import extractor
+    importlib.reload(extractor)
+
+    fake_json = {
+        "visitor_details": {"ring_bearer": False, "permit_status": "approved"},
+        "questionnaire_completion": {}
+    }
+    extractor.model = SimpleNamespace(
+        generate_content=lambda prompt: SimpleNamespace(text="```json\n" + json.dumps(fake_json) + "\n```")
+    )
+
+    result = asyncio.run(extractor.get_structured_data_async(["agent: hi"], {"questionnaire": {}}))
+    assert result == fake_json
+
+def test_async_extraction_fallback(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "false")
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    from src.processing import extractor
+    importlib.reload(extractor)
+
+    extractor.model = SimpleNamespace(generate_content=lambda prompt: SimpleNamespace(text="not json"))
+
+    metadata = {"questionnaire": {}, "mount_doom_permit_status": "approved"}
+    result = asyncio.run(extractor.get_structured_data_async(["dummy"], metadata))
+    assert result == extractor.fallback_structured_data(metadata)
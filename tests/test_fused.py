@@ -0,0 +1,114 @@
+import asyncio
+import importlib
+import json
+import pytest
+from types import SimpleNamespace
+
+VALID_RESPONSE = {
+    "summary": "Visitor wants to hike Mount Doom.",
+    "structured_data": {
+        "visitor_details": {
+            "ring_bearer": False,
+            "gear_prepared": True,
+            "hazard_knowledge": "basic",
+            "fitness_level": "high",
+            "permit_status": "pending"
+        },
+        "questionnaire_completion": {"gear_discussed": True}
+    },
+    "analysis": {
+        "sentiment": 0.7,
+        "interest_level": "high",
+        "preparedness_level": "medium",
+        "action_items": ["Send permit form"]
+    }
+}
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "false")
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    monkeypatch.setenv("USE_FUSED_LLM", "true")
+    from src.processing import summarizer, extractor, analyzer, fused, pipeline
+    for module in (summarizer, extractor, analyzer, fused, pipeline):
+        importlib.reload(module)
+    return fused, pipeline
+
+
+def _transcript():
+    return {
+        "transcript_id": "t-1",
+        "transcript_text": [{"text": "agent: Hello"}],
+        "metadata": {"questionnaire": {"gear_discussed": True}}
+    }
+
+
+def _stub_stages(pipeline, monkeypatch, calls):
+    async def summary(turns):
+        calls.append("summarize")
+        return "per-stage summary"
+
+    async def extract(turns, metadata):
+        calls.append("extract")
+        return {"visitor_details": {}, "questionnaire_completion": {}}
+
+    async def analyze(turns, structured):
+        calls.append("analyze")
+        return {"sentiment": 0.5}
+
+    monkeypatch.setattr(pipeline, "get_summary_from_transcript_async", summary)
+    monkeypatch.setattr(pipeline, "get_structured_data_async", extract)
+    monkeypatch.setattr(pipeline, "analyze_insights_async", analyze)
+
+
+# --- Valid fused response is used directly, with one LLM call ---
+def test_fused_response_used(modules, monkeypatch):
+    fused, pipeline = modules
+    prompts = []
+
+    def generate(prompt):
+        prompts.append(prompt)
+        return SimpleNamespace(text="```json\n" + json.dumps(VALID_RESPONSE) + "\n```")
+    fused.model = SimpleNamespace(generate_content=generate)
+    calls = []
+    _stub_stages(pipeline, monkeypatch, calls)
+
+    result, timings = asyncio.run(pipeline.process_transcript(_transcript()))
+
+    assert len(prompts) == 1
+    assert calls == []
+    assert result["summary"] == VALID_RESPONSE["summary"]
+    assert result["structured_data"] == VALID_RESPONSE["structured_data"]
+    assert result["analysis"]["action_items"] == ["Send permit form"]
+    assert "processing_timestamp" in result["analysis"]
+    assert set(timings) == {"fused"}
+
+
+# --- Invalid fused response falls back to per-stage calls ---
+def test_fused_invalid_falls_back(modules, monkeypatch):
+    fused, pipeline = modules
+    bad = {**VALID_RESPONSE, "analysis": {**VALID_RESPONSE["analysis"], "sentiment": 7}}
+    fused.model = SimpleNamespace(generate_content=lambda prompt: SimpleNamespace(text=json.dumps(bad)))
+    calls = []
+    _stub_stages(pipeline, monkeypatch, calls)
+
+    result, timings = asyncio.run(pipeline.process_transcript(_transcript()))
+
+    assert sorted(calls) == ["analyze", "extract", "summarize"]
+    assert result["summary"] == "per-stage summary"
+    assert {"fused", "summarize", "extract", "analyze"} <= set(timings)
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda d: d.pop("summary"),
+    lambda d: d["structured_data"].pop("visitor_details"),
+    lambda d: d["analysis"].update(interest_level="extreme"),
+    lambda d: d["analysis"].update(action_items="call back"),
+])
+def test_validate_rejects_malformed(modules, mutate):
+    fused, _ = modules
+    data = json.loads(json.dumps(VALID_RESPONSE))
+    mutate(data)
+    with pytest.raises(ValueError):
+        fused.validate_fused_response(data)
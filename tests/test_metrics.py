@@ -0,0 +1,79 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from src.metrics import Counter, Histogram, Registry, STAGE_LATENCY, start_metrics_server
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+    h.observe(0.05, stage="submit")
+    h.observe(0.5, stage="submit")
+    h.observe(5.0, stage="submit")
+    snap = h.snapshot(stage="submit")
+    assert snap["count"] == 3
+    assert snap["buckets"] == {0.1: 1, 1.0: 2, float("inf"): 3}
+    assert snap["sum"] == pytest.approx(5.55)
+
+
+def test_labels_must_match():
+    c = Counter("calls_total", "Calls.", ["status"])
+    with pytest.raises(ValueError):
+        c.inc(code=200)
+
+
+def test_render_text_format():
+    registry = Registry()
+    c = registry.counter("api_responses_total", "Responses.", ["path", "status"])
+    c.inc(path="/v1/x", status=429)
+    c.inc(path="/v1/x", status=429)
+    g = registry.gauge("depth", "Depth.")
+    g.set_function(lambda: 7)
+    registry.histogram("wait_seconds", "Wait.", buckets=(1.0,)).observe(0.5)
+
+    text = registry.render()
+    assert "# TYPE api_responses_total counter" in text
+    assert 'api_responses_total{path="/v1/x",status="429"} 2' in text
+    assert "depth 7" in text
+    assert 'wait_seconds_bucket{le="1"} 1' in text
+    assert 'wait_seconds_bucket{le="+Inf"} 1' in text
+    assert "wait_seconds_count 1" in text
+    # Registering the same name again returns the existing metric
+    assert registry.counter("api_responses_total", "Responses.", ["path", "status"]) is c
+
+
+def test_stage_timeout_is_observed(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "true")
+    from src.processing import pipeline
+
+    before = STAGE_LATENCY.snapshot(stage="summarize")["count"]
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def run():
+        return await pipeline._run_stage("summarize", slow(), 0.01, lambda: "fallback", {})
+
+    assert asyncio.run(run()) == "fallback"
+    assert STAGE_LATENCY.snapshot(stage="summarize")["count"] == before + 1
+
+
+def test_metrics_endpoint():
+    registry = Registry()
+    registry.gauge("workers_busy", "Busy.").set(3)
+
+    async def scrape():
+        runner = await start_metrics_server(0, registry)
+        assert runner is None  # port 0 disables the endpoint
+        runner = await start_metrics_server(19177, registry, host="127.0.0.1")
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get("http://127.0.0.1:19177/metrics") as resp:
+                    return resp.status, await resp.text()
+        finally:
+            await runner.cleanup()
+
+    status, text = asyncio.run(scrape())
+    assert status == 200
+    assert "workers_busy 3" in text
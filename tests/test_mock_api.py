@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from scripts import mock_api
+
+
+@pytest.fixture
+def http():
+    yield TestClient(mock_api.app)
+    mock_api.configure()
+
+
+def _stream(http, **params):
+    resp = http.get("/api/v1/transcripts/stream", params=params)
+    assert resp.status_code == 200
+    return [json.loads(line) for line in resp.text.splitlines() if line]
+
+
+# --- Defaults keep the two quota-safe sample transcripts ---
+def test_default_stream_is_two_samples(http):
+    assert [t["transcript_id"] for t in _stream(http)] == ["t-mock-1", "t-mock-2"]
+    assert [t["transcript_id"] for t in _stream(http, after="t-mock-1")] == ["t-mock-2"]
+
+
+# --- Load mode: synthetic, reproducible transcripts with duplicates mixed in ---
+def test_load_mode_generates_transcripts_with_duplicates(http):
+    mock_api.configure(transcripts=30, rate=0, turns="3,5", duplicate_ratio=0.3, seed=3, interest_mix="high:1")
+    first = _stream(http)
+    ids = [t["transcript_id"] for t in first]
+    assert len(set(ids)) == 30
+    assert len(ids) > 30
+    assert all(3 <= len(t["transcript_text"]) <= 5 for t in first)
+    assert {t["metadata"]["visitor_interest_level"] for t in first} == {"high"}
+
+    mock_api.configure(transcripts=30, rate=0, turns="3,5", duplicate_ratio=0.3, seed=3, interest_mix="high:1")
+    again = _stream(http)
+    assert [t["transcript_id"] for t in again] == ids
+    assert [t["transcript_text"][0]["text"] for t in again] == [t["transcript_text"][0]["text"] for t in first]
+    # Reconnecting resumes after the cursor
+    assert [t["transcript_id"] for t in _stream(http, after="t-load-9")] == ids[ids.index("t-load-9") + 1:]
+
+
+def test_stats_record_duplicates_and_latency(http):
+    mock_api.configure(transcripts=3, rate=0)
+    _stream(http)
+    http.post("/api/v1/transcripts/process", json={"transcript_id": "t-load-0"})
+    http.post(
+        "/api/v1/transcripts/process/batch",
+        json={"results": [{"transcript_id": "t-load-0"}, {"transcript_id": "t-load-1"}]}
+    )
+    stats = http.get("/api/v1/stats").json()
+    assert stats["processed_count"] == 3
+    assert stats["unique_processed"] == 2
+    assert stats["duplicate_submissions"] == 1
+    assert stats["streamed"] == 3
+    assert stats["stream_to_submit_seconds"]["count"] == 2
+    assert stats["submit_request_seconds"]["count"] == 2
+
+
+def test_fault_injection(http):
+    mock_api.configure(**{"429_rate": 1.0, "retry_after": 0.5})
+    resp = http.post("/api/v1/transcripts/process", json={"transcript_id": "a"})
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "0.5"
+
+    mock_api.configure(**{"401_rate": 1.0})
+    assert http.get("/api/v1/transcripts/stream").status_code == 401
+
+    mock_api.configure(disconnect_rate=1.0)
+    with pytest.raises(mock_api.InjectedDisconnect):
+        http.get("/api/v1/transcripts/stream")
+    assert http.get("/api/v1/stats").json()["injected"] == {"disconnect": 1, "401": 0, "429": 0, "slow": 0}
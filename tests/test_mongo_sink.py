@@ -0,0 +1,92 @@
+import asyncio
+from types import SimpleNamespace
+from pymongo.errors import BulkWriteError
+
+from src.storage.mongo_sink import MongoBatchSink
+
+
+class FakeCollection:
+    name = "raw_transcripts"
+
+    def __init__(self, fail_indexes=()):
+        self.calls = []
+        self.indexes = []
+        self.docs = {}
+        self.fail_indexes = set(fail_indexes)
+
+    def create_index(self, key, unique=False):
+        self.indexes.append((key, unique))
+
+    def bulk_write(self, operations, ordered=True):
+        upserted = matched = 0
+        for op in operations:
+            key, value = next(iter(op._filter.items()))
+            if value in self.docs:
+                matched += 1
+            else:
+                self.docs[value] = op._doc["$setOnInsert"]
+                upserted += 1
+        self.calls.append((len(operations), ordered))
+        return SimpleNamespace(upserted_count=upserted, matched_count=matched)
+
+    def insert_many(self, documents, ordered=True):
+        self.calls.append((len(documents), ordered))
+        for doc in documents:
+            doc["_id"] = object()
+        if self.fail_indexes:
+            errors = [{"index": i, "code": 11000, "errmsg": "duplicate key"} for i in sorted(self.fail_indexes)]
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(documents) - len(errors)})
+        return SimpleNamespace(inserted_ids=[doc["_id"] for doc in documents])
+
+
+# --- Records are coalesced into unordered insert_many batches ---
+def test_coalesces_into_unordered_batches():
+    collection = FakeCollection()
+    sink = MongoBatchSink(collection, batch_size=100, flush_interval_ms=20)
+    records = [{"transcript_id": f"t-{i}"} for i in range(250)]
+
+    async def run():
+        for record in records:
+            await sink.write(record)
+        await sink.close()
+
+    asyncio.run(run())
+    assert collection.calls == [(100, False), (100, False), (50, False)]
+    assert sink.stats == {"batches": 3, "inserted": 250, "duplicates": 0, "failed": 0}
+    # Callers' dicts are not mutated with ObjectIds
+    assert all("_id" not in r for r in records)
+
+
+# --- Partial failures are reported per batch ---
+def test_reports_partial_failures():
+    collection = FakeCollection(fail_indexes=[1, 3])
+    sink = MongoBatchSink(collection, batch_size=10, flush_interval_ms=10)
+
+    async def run():
+        for i in range(5):
+            await sink.write({"transcript_id": f"t-{i}"})
+        await sink.flush()
+        await sink.close()
+
+    asyncio.run(run())
+    assert sink.last_batch["inserted"] == 3
+    assert sink.last_batch["failed"] == 2
+    assert [e["index"] for e in sink.last_batch["errors"]] == [1, 3]
+    assert sink.stats["failed"] == 2
+
+
+# --- Keyed sinks upsert idempotently behind a unique index ---
+def test_keyed_sink_upserts_and_skips_duplicates():
+    collection = FakeCollection()
+    sink = MongoBatchSink(collection, key="transcript_id", batch_size=10, flush_interval_ms=10)
+
+    async def run():
+        for tid in ["t-mock-1", "t-mock-2", "t-mock-1", "t-mock-1"]:
+            await sink.write({"transcript_id": tid})
+        await sink.close()
+
+    asyncio.run(run())
+    assert collection.indexes == [("transcript_id", True)]
+    assert sorted(collection.docs) == ["t-mock-1", "t-mock-2"]
+    assert sink.stats["inserted"] == 2
+    assert sink.stats["duplicates"] == 2
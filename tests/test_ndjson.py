@@ -0,0 +1,70 @@
+import asyncio
+import json
+import pytest
+
+from src.api import ndjson
+from src.api.ndjson import NDJSONDecoder, iter_ndjson
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        if ndjson.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(ndjson, "orjson", None)
+    return request.param
+
+
+def _encode(records):
+    return b"".join(json.dumps(r).encode() + b"\n" for r in records)
+
+
+# --- Records split at arbitrary chunk boundaries ---
+def test_records_spanning_chunks(backend):
+    records = [{"transcript_id": f"t-{i}", "text": "é" * i} for i in range(20)]
+    data = _encode(records)
+    decoder = NDJSONDecoder()
+    out = []
+    for i in range(0, len(data), 7):
+        out.extend(decoder.feed(data[i:i + 7]))
+    out.extend(decoder.flush())
+    assert out == records
+
+
+# --- Blank lines, CRLF and malformed records ---
+def test_blank_and_malformed_lines(backend):
+    decoder = NDJSONDecoder()
+    out = decoder.feed(b'\n{"a": 1}\r\n\r\nnot json\n{"b": 2}')
+    assert out == [{"a": 1}]
+    assert decoder.flush() == [{"b": 2}]
+
+
+# --- Records larger than aiohttp's default line limit, and the hard cap ---
+def test_long_records_and_size_cap(backend):
+    big = {"transcript_text": [{"text": "x" * 1000} for _ in range(500)]}
+    decoder = NDJSONDecoder(max_record_bytes=1024)
+    data = json.dumps(big).encode()
+    # Over-cap record is dropped up to its newline; the next record still parses
+    out = decoder.feed(data[:2000]) + decoder.feed(data[2000:] + b"\n") + decoder.feed(b'{"ok": true}\n')
+    assert out == [{"ok": True}]
+
+    decoder = NDJSONDecoder()
+    assert decoder.feed(data + b"\n") == [big]
+
+
+def test_iter_ndjson_reads_chunks(backend):
+    class FakeContent:
+        def __init__(self, data):
+            self.data = data
+
+        async def iter_chunked(self, size):
+            for i in range(0, len(self.data), size):
+                yield self.data[i:i + size]
+
+    records = [{"n": i} for i in range(10)]
+
+    async def collect():
+        return [r async for r in iter_ndjson(FakeContent(_encode(records)), chunk_size=5)]
+
+    assert asyncio.run(collect()) == records
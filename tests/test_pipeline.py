@@ -0,0 +1,108 @@
+import asyncio
+import importlib
+import time
+import pytest
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "true")
+    monkeypatch.delenv("USE_FUSED_LLM", raising=False)
+    from src.processing import summarizer, extractor, analyzer, fused, pipeline
+    # Reload stage modules too so they pick up mock mode regardless of test order
+    for module in (summarizer, extractor, analyzer, fused, pipeline):
+        importlib.reload(module)
+    return pipeline
+
+
+def _transcript():
+    return {
+        "transcript_id": "t-1",
+        "transcript_text": [{"text": "agent: Hello"}, {"text": "customer: Hi"}],
+        "metadata": {"questionnaire": {}, "mount_doom_permit_status": "pending"}
+    }
+
+
+# --- Mock mode builds the same result shape the worker submits ---
+def test_process_transcript_result_shape(pipeline):
+    result, timings = asyncio.run(pipeline.process_transcript(_transcript()))
+    assert result["transcript_id"] == "t-1"
+    assert isinstance(result["summary"], str)
+    assert set(result["structured_data"]) == {"visitor_details", "questionnaire_completion"}
+    assert "processing_timestamp" in result["analysis"]
+    assert set(timings) == {"summarize", "extract", "analyze"}
+
+
+# --- Summarize overlaps extract; analyze waits only on extract ---
+def test_summary_runs_concurrently_with_extraction(pipeline, monkeypatch):
+    events = []
+
+    async def slow_summary(turns):
+        events.append("summary-start")
+        await asyncio.sleep(0.2)
+        events.append("summary-end")
+        return "summary"
+
+    async def fast_extract(turns, metadata):
+        events.append("extract-start")
+        await asyncio.sleep(0.05)
+        return {"visitor_details": {}, "questionnaire_completion": {}}
+
+    async def analyze(turns, structured):
+        events.append("analyze-start")
+        await asyncio.sleep(0.05)
+        return {"sentiment": 1.0}
+
+    monkeypatch.setattr(pipeline, "get_summary_from_transcript_async", slow_summary)
+    monkeypatch.setattr(pipeline, "get_structured_data_async", fast_extract)
+    monkeypatch.setattr(pipeline, "analyze_insights_async", analyze)
+
+    start = time.perf_counter()
+    summary, structured, analysis, _ = asyncio.run(pipeline.run_stages(["x"], {}))
+    elapsed = time.perf_counter() - start
+
+    assert summary == "summary"
+    assert analysis == {"sentiment": 1.0}
+    # Analyzer started before the slow summary finished
+    assert events.index("analyze-start") < events.index("summary-end")
+    assert elapsed < 0.3
+
+
+# --- A stage that overruns its timeout is replaced by its fallback ---
+def test_stage_timeout_uses_fallback(pipeline, monkeypatch):
+    async def hang(turns):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(pipeline, "get_summary_from_transcript_async", hang)
+
+    summary, _, _, timings = asyncio.run(
+        pipeline.run_stages(["x"], {}, timeouts={"summarize": 0.05})
+    )
+    assert summary == pipeline.FALLBACK_SUMMARY
+    assert timings["summarize"] < 1
+
+
+# --- A failing branch cancels its sibling ---
+def test_failure_cancels_sibling_stage(pipeline, monkeypatch):
+    state = {"cancelled": False}
+
+    async def hang(turns):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def boom(turns, metadata):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(pipeline, "get_summary_from_transcript_async", hang)
+    monkeypatch.setattr(pipeline, "get_structured_data_async", boom)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await pipeline.run_stages(["x"], {})
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert state["cancelled"]
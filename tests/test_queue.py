@@ -0,0 +1,102 @@
+import asyncio
+
+from src.queue.queue import BackpressureQueue, create_queue
+
+
+# --- Producer pauses at the high watermark and resumes at the low one ---
+def test_put_blocks_between_watermarks():
+    async def scenario():
+        queue = BackpressureQueue(maxsize=10, high_watermark=4, low_watermark=1)
+        produced = []
+
+        async def producer():
+            for i in range(8):
+                await queue.put(i)
+                produced.append(i)
+
+        task = asyncio.create_task(producer())
+        await asyncio.sleep(0.01)
+        assert produced == [0, 1, 2, 3]
+        assert queue.metrics()["paused"]
+
+        # Draining to depth 2 is not enough to resume
+        queue.get_nowait()
+        queue.get_nowait()
+        await asyncio.sleep(0.01)
+        assert len(produced) == 4
+
+        # Reaching the low watermark releases the producer
+        queue.get_nowait()
+        await asyncio.sleep(0.01)
+        assert len(produced) == 7
+        while not task.done():
+            queue.get_nowait()
+            await asyncio.sleep(0.01)
+        return queue.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["max_depth"] == 4
+    assert metrics["blocked_puts"] >= 1
+    assert metrics["blocked_put_seconds"] > 0
+
+
+def test_create_queue_defaults():
+    async def scenario():
+        queue = create_queue(maxsize=6)
+        assert (queue.high_watermark, queue.low_watermark) == (6, 3)
+        unbounded = create_queue(maxsize=0)
+        for i in range(1000):
+            await unbounded.put(i)
+        assert unbounded.metrics()["blocked_puts"] == 0
+
+    asyncio.run(scenario())
+
+
+# --- Priority mode serves high scores first but ages low scores in ---
+def test_priority_queue_orders_by_score_with_aging():
+    async def scenario():
+        queue = create_queue(maxsize=10, mode="priority", score_fn=lambda t: t["score"])
+        queue._aging = 1.0
+        await queue.put({"id": "low", "score": 0})
+        await queue.put({"id": "high", "score": 2})
+        await queue.put({"id": "mid", "score": 1})
+        order = [queue.get_nowait()["id"] for _ in range(3)]
+
+        # A low-score item that has waited longer than the score gap wins
+        await queue.put({"id": "old-low", "score": 0})
+        queue._queue[0] = (queue._queue[0][0] - 5,) + queue._queue[0][1:]
+        await queue.put({"id": "new-high", "score": 2})
+        aged = queue.get_nowait()
+        await queue.ack(aged)
+        return order, aged["id"], queue.metrics()["bands"]
+
+    order, aged, bands = asyncio.run(scenario())
+    assert order == ["high", "mid", "low"]
+    assert aged == "old-low"
+    assert bands["low"]["completed"] == 1
+
+
+# --- Released items leave no bookkeeping behind ---
+def test_priority_queue_release_forgets_unacked_items():
+    async def scenario():
+        queue = create_queue(maxsize=10, mode="priority", score_fn=lambda t: 0)
+        for i in range(3):
+            await queue.put({"id": i})
+        items = [queue.get_nowait() for _ in range(3)]
+        await queue.ack(items[0])
+        for item in items[1:]:
+            queue.release(item)
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert queue._started == {}
+    assert queue.metrics()["bands"]["low"]["completed"] == 1
+
+
+def test_default_score_prefers_pending_high_interest():
+    from src.queue.queue import score_transcript, priority_band
+    hot = {"metadata": {"visitor_interest_level": "high", "mount_doom_permit_status": "pending"}}
+    cold = {"metadata": {"visitor_interest_level": "low", "mount_doom_permit_status": "approved"}}
+    assert score_transcript(hot) > score_transcript(cold)
+    assert priority_band(score_transcript(hot)) == "high"
+    assert priority_band(score_transcript(cold)) == "low"
@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from src.ratelimit import TokenBucketLimiter, GCRALimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+# --- Token bucket ---
+def test_token_bucket_burst_then_paced():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(60, burst=3, clock=clock)
+    # Burst capacity is available immediately
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Then requests queue one second apart at 60/min
+    assert limiter.reserve() == pytest.approx(1.0)
+    assert limiter.reserve() == pytest.approx(2.0)
+    clock.advance(2.0)
+    assert limiter.wait_time() == pytest.approx(1.0)
+
+
+def test_token_bucket_token_budget():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(1000, tokens_per_minute=600, clock=clock)
+    assert limiter.reserve(600) == 0.0
+    # 300 more tokens at 10 tokens/s
+    assert limiter.reserve(300) == pytest.approx(30.0)
+    # Oversized requests are clamped to the budget instead of waiting forever
+    assert limiter.wait_time(10_000) == pytest.approx(90.0)
+
+
+def test_token_bucket_drain_forces_backoff():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(30, clock=clock)
+    assert limiter.wait_time() == 0.0
+    limiter.drain()
+    assert limiter.wait_time() == pytest.approx(2.0)
+
+
+# --- GCRA ---
+def test_gcra_spaces_permits_evenly():
+    clock = FakeClock()
+    limiter = GCRALimiter(60, 60, burst=1, clock=clock)
+    delays = [limiter.reserve() for _ in range(4)]
+    assert delays == pytest.approx([0.0, 1.0, 2.0, 3.0])
+
+
+def test_gcra_burst_and_try_acquire():
+    clock = FakeClock()
+    limiter = GCRALimiter(10, 10, burst=3, clock=clock)
+    assert all(limiter.try_acquire() for _ in range(3))
+    assert not limiter.try_acquire()
+    assert limiter.wait_time() == pytest.approx(1.0)
+    clock.advance(1.0)
+    assert limiter.try_acquire()
+    # Multi-permit requests consume several emission intervals
+    clock.advance(10.0)
+    assert limiter.try_acquire(3)
+    assert not limiter.try_acquire(1)
+
+    metrics = limiter.metrics()
+    assert metrics["acquired"] == 7
+    assert metrics["rejected"] == 2
+    assert metrics["current_wait_seconds"] == pytest.approx(1.0)
+
+
+def test_gcra_no_burst_after_idle_beyond_allowance():
+    clock = FakeClock()
+    limiter = GCRALimiter(100, 60, burst=5, clock=clock)
+    clock.advance(3600)
+    delays = [limiter.reserve() for _ in range(6)]
+    assert delays[:5] == [0.0] * 5
+    assert delays[5] == pytest.approx(0.6)
+
+
+def test_gcra_acquire_waits():
+    limiter = GCRALimiter(20, 1, burst=1)
+
+    async def run():
+        await limiter.acquire()
+        return await limiter.acquire()
+
+    assert asyncio.run(run()) == pytest.approx(0.05, abs=0.02)
+
+
+# --- Shared LLM call path retries quota errors through the limiter ---
+def test_llm_retries_quota_error(monkeypatch):
+    from src.processing import llm
+    monkeypatch.setattr(llm, "llm_limiter", TokenBucketLimiter(6000))
+    attempts = []
+
+    def generate(prompt):
+        attempts.append(prompt)
+        if len(attempts) == 1:
+            raise RuntimeError("429 Resource has been exhausted")
+        return SimpleNamespace(text="ok")
+
+    model = SimpleNamespace(generate_content=generate)
+    assert asyncio.run(llm.generate_text_async(model, "prompt", "test")) == "ok"
+    assert len(attempts) == 2
+
+
+def test_llm_does_not_retry_other_errors(monkeypatch):
+    from src.processing import llm
+    monkeypatch.setattr(llm, "llm_limiter", TokenBucketLimiter(6000))
+    attempts = []
+
+    def generate(prompt):
+        attempts.append(prompt)
+        raise RuntimeError("bad request")
+
+    with pytest.raises(RuntimeError):
+        llm.generate_text(SimpleNamespace(generate_content=generate), "prompt", "test")
+    assert len(attempts) == 1
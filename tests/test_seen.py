@@ -0,0 +1,36 @@
+import json
+
+from src.storage.seen import SeenSet
+
+
+# --- Seeded from disk, including files with duplicate records ---
+def test_loads_keys_from_jsonl(tmp_path):
+    path = tmp_path / "raw.json"
+    lines = [{"transcript_id": "t-mock-1"}, {"transcript_id": "t-mock-2"}, {"transcript_id": "t-mock-1"}]
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines) + "garbage\n\n")
+    seen = SeenSet(str(path))
+    seen.load()
+    assert len(seen) == 2
+    assert "t-mock-1" in seen
+    assert not seen.add("t-mock-2")
+    assert seen.add("t-new")
+
+
+def test_missing_file_is_empty(tmp_path):
+    seen = SeenSet(str(tmp_path / "absent.json"))
+    seen.load()
+    assert seen.loaded
+    assert len(seen) == 0
+
+
+# --- In-flight claims suppress concurrent duplicates ---
+def test_claim_complete_release(tmp_path):
+    seen = SeenSet(str(tmp_path / "seen.json"))
+    seen.load()
+    assert seen.claim("t-1")
+    assert not seen.claim("t-1")
+    seen.release("t-1")
+    assert seen.claim("t-1")
+    seen.complete("t-1")
+    assert not seen.claim("t-1")
+    assert len(seen) == 1
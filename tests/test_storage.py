@@ -0,0 +1,172 @@
+import asyncio
+import json
+import time
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from src.storage import db
+from src.storage.backends import JSONBackend, MemoryBackend, MongoBackend, create_backend
+
+
+def test_create_backend_by_name(monkeypatch):
+    monkeypatch.delenv("STORAGE_BACKEND", raising=False)
+    assert isinstance(create_backend("memory"), MemoryBackend)
+    assert isinstance(create_backend("json"), JSONBackend)
+    monkeypatch.setenv("STORAGE_BACKEND", "memory")
+    assert isinstance(create_backend(), MemoryBackend)
+
+
+def test_json_backend_dedupes_and_flushes(tmp_path):
+    backend = JSONBackend(
+        raw_path=str(tmp_path / "raw.json"),
+        processed_path=str(tmp_path / "processed.json"),
+        errors_path=str(tmp_path / "errors.json")
+    )
+
+    async def scenario():
+        await backend.save_raw({"transcript_id": "t-1"})
+        await backend.save_raw({"transcript_id": "t-1"})
+        await backend.save_processed({"transcript_id": "t-1", "summary": "s"})
+        await backend.save_error({"transcript_id": "t-2", "error": "boom"})
+        await backend.flush()
+        await backend.close()
+
+    asyncio.run(scenario())
+    raw = [json.loads(line) for line in (tmp_path / "raw.json").read_text().splitlines()]
+    assert [r["transcript_id"] for r in raw] == ["t-1"]
+    assert "saved_timestamp" in raw[0]
+    assert (tmp_path / "processed.json").read_text().count("t-1") == 1
+    assert "boom" in (tmp_path / "errors.json").read_text()
+
+
+# --- Unreachable Mongo never blocks: records go to the fallback while it retries ---
+def test_mongo_backend_falls_back_without_blocking():
+    fallback = MemoryBackend()
+    backend = MongoBackend(uri="mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=100", fallback=fallback)
+
+    async def scenario():
+        start = time.monotonic()
+        await backend.save_raw({"transcript_id": "t-1"})
+        await backend.save_processed({"transcript_id": "t-1"})
+        elapsed = time.monotonic() - start
+        assert not await backend.connect(timeout=0.01)
+        await backend.close()
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+    assert elapsed < 0.5
+    assert list(fallback.raw) == ["t-1"]
+    assert list(fallback.processed) == ["t-1"]
+
+
+# --- A connect attempt still running when the backend closes discards its client ---
+def test_mongo_backend_close_discards_in_flight_connect():
+    pinging = threading.Event()
+    release = threading.Event()
+    clients = []
+
+    class FakeClient:
+        def __init__(self, uri, **kwargs):
+            self.kwargs = kwargs
+            self.closed = False
+            self.admin = SimpleNamespace(command=self.ping)
+            clients.append(self)
+
+        def ping(self, name):
+            pinging.set()
+            release.wait(5)
+
+        def get_database(self, name):
+            return SimpleNamespace(get_collection=lambda collection: collection)
+
+        def close(self):
+            self.closed = True
+
+    backend = MongoBackend(uri="mongodb://db.example/?serverSelectionTimeoutMS=100", fallback=MemoryBackend())
+
+    async def scenario():
+        backend.ensure_connecting()
+        await asyncio.to_thread(pinging.wait, 5)
+        await backend.close()
+        # asyncio.run() waits for the connect thread once it is released
+        release.set()
+
+    with mock.patch("pymongo.MongoClient", FakeClient):
+        asyncio.run(scenario())
+
+    assert [client.closed for client in clients] == [True]
+    assert backend._client is None and not backend.connected
+    # The URI's own server selection timeout is kept
+    assert "serverSelectionTimeoutMS" not in clients[0].kwargs
+    assert "connectTimeoutMS" in clients[0].kwargs
+
+
+def test_db_facade_delegates_to_backend():
+    backend = MemoryBackend()
+    db.set_backend(backend)
+    try:
+        asyncio.run(db.save_raw_transcript({"transcript_id": "t-9"}))
+        asyncio.run(db.save_error({"error": "x"}))
+        assert "t-9" in backend.raw
+        assert backend.errors == [{"error": "x"}]
+    finally:
+        db.set_backend(None)
+
+
+# --- Completions go to the seen-set's own file, not the default one ---
+def test_completions_follow_seen_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    original = db.get_seen_path()
+    db.set_seen_path(str(tmp_path / "shard.json"))
+
+    async def scenario():
+        assert await db.claim_transcript("t-1")
+        await db.complete_transcript("t-1")
+        await db.close_storage()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        db.set_seen_path(original)
+    assert [json.loads(line)["transcript_id"] for line in (tmp_path / "shard.json").read_text().splitlines()] == ["t-1"]
+    assert not (tmp_path / db.SEEN_FILE).exists()
+
+
+# --- Line counts only read what was appended since the last call ---
+def test_line_counter_is_incremental(tmp_path):
+    from src.storage.counter import LineCounter
+    path = tmp_path / "raw.json"
+    counter = LineCounter(str(path))
+    assert counter.count() == 0
+    path.write_text('{"a": 1}\n{"a": 2}\n')
+    assert counter.count() == 2
+    with open(path, "a") as f:
+        f.write('{"a": 3}\n{"a": 4}')
+    assert counter.count() == 4
+    assert counter._offset == path.stat().st_size
+    # Truncation starts the count over
+    path.write_text('{"a": 5}\n')
+    assert counter.count() == 1
+
+
+def test_backend_counts(tmp_path):
+    backend = JSONBackend(
+        raw_path=str(tmp_path / "raw.json"),
+        processed_path=str(tmp_path / "processed.json"),
+        errors_path=str(tmp_path / "errors.json")
+    )
+
+    async def scenario():
+        for i in range(3):
+            await backend.save_raw({"transcript_id": f"t-{i}"})
+        await backend.save_processed({"transcript_id": "t-0"})
+        await backend.flush()
+        counts = [await backend.count(kind) for kind in ("raw", "processed", "errors")]
+        await backend.close()
+        return counts
+
+    assert asyncio.run(scenario()) == [3, 1, 0]
+    memory = MemoryBackend()
+    asyncio.run(memory.save_error({"error": "x"}))
+    assert asyncio.run(memory.count("errors")) == 1
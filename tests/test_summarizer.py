@@ -1,4 +1,6 @@
 import os
+import time
+import asyncio
 import importlib
 import pytest
 from types import SimpleNamespace
@@ -49,3 +51,60 @@ def test_summary_fallback_on_error(monkeypatch):
 
     result = summarizer.get_summary_from_transcript(["oops"])
     assert result == "Summary unavailable due to an error."
+
+# --- Async variant tests ---
+def test_async_summary_uses_native_async_api(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "false")
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    from src.processing import summarizer
+    importlib.reload(summarizer)
+
+    async def fake_generate_async(prompt):
+        return SimpleNamespace(text="  Async summary.  ")
+    summarizer.genai_model = SimpleNamespace(generate_content_async=fake_generate_async)
+
+    result = asyncio.run(summarizer.get_summary_from_transcript_async(["line1"]))
+    assert result == "Async summary."
+
+def test_async_summary_runs_blocking_calls_concurrently(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "false")
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    from src.processing import summarizer
+    importlib.reload(summarizer)
+
+    from src.processing import llm
+    monkeypatch.setattr(llm.llm_cache, "enabled", False)
+
+    # A blocking SDK call should be pushed off the event loop
+    calls = []
+
+    def slow_generate(prompt):
+        calls.append(prompt)
+        time.sleep(0.2)
+        return SimpleNamespace(text="done")
+    summarizer.genai_model = SimpleNamespace(generate_content=slow_generate)
+
+    async def run_many():
+        # Distinct transcripts, so neither the cache nor in-flight dedupe can collapse the calls
+        return await asyncio.gather(
+            *(summarizer.get_summary_from_transcript_async([f"line {i}"]) for i in range(5))
+        )
+
+    start = time.perf_counter()
+    results = asyncio.run(run_many())
+    assert results == ["done"] * 5
+    assert len(calls) == 5
+    assert time.perf_counter() - start < 0.8
+
+def test_async_summary_fallback_on_error(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_LLM", "false")
+    monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+    from src.processing import summarizer
+    importlib.reload(summarizer)
+
+    summarizer.genai_model = SimpleNamespace(
+        generate_content=lambda prompt: (_ for _ in ()).throw(RuntimeError("LLM down"))
+    )
+
+    result = asyncio.run(summarizer.get_summary_from_transcript_async(["oops"]))
+    assert result == "Summary unavailable due to an error."
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import threading
+import urllib.request
+import multiprocessing as mp
+from unittest import mock
+
+from src.api.ndjson import dumps
+from src.supervisor import shard_for, combine_metrics, _read_work, _END
+
+
+def test_shard_for_is_stable_per_session():
+    first = {"transcript_id": "t-1", "session_id": "sess-9"}
+    replay = {"transcript_id": "t-2", "session_id": "sess-9"}
+    assert shard_for(first, 4) == shard_for(replay, 4)
+    assert 0 <= shard_for({"transcript_id": "t-3"}, 4) < 4
+    # Sessions spread across shards
+    assert len({shard_for({"session_id": f"s-{i}"}, 4) for i in range(100)}) == 4
+
+
+def test_combine_metrics_sums_shards():
+    reports = {
+        0: {"shard": 0, "received": 3, "workers": 10, "queue": {"depth": 2, "max_depth": 5, "blocked_puts": 1,
+                                                                  "blocked_put_seconds": 0.5}},
+        1: {"shard": 1, "done": True, "received": 4, "workers": 10, "queue": {"depth": 0, "max_depth": 7,
+                                                                               "blocked_puts": 0,
+                                                                               "blocked_put_seconds": 0.0}},
+    }
+    total = combine_metrics(reports)
+    assert total["received"] == 7
+    assert total["alive"] == 1
+    assert total["depth"] == 2
+    assert total["max_depth"] == 7
+    assert total["blocked_put_seconds"] == 0.5
+
+
+def _supervisor_env(monkeypatch, tmp_path, transcripts):
+    for name, value in {
+        "CALLLIVE_API_KEY": "key", "CALLLIVE_BASE_URL": "http://127.0.0.1:1/api", "USE_MOCK_LLM": "true",
+        "STORAGE_BACKEND": "memory", "METRICS_PORT": "0", "SEEN_FILE": str(tmp_path / "seen.json"),
+        "MOCK_TRANSCRIPTS": str(transcripts), "MOCK_RATE": "0", "MOCK_DUPLICATE_RATIO": "0.2", "MOCK_SEED": "5",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.chdir(tmp_path)
+
+
+async def _run_supervisor(base_url, checkpoint):
+    from src.api.client import MordorAPIClient
+    from src.supervisor import Supervisor
+
+    async with MordorAPIClient("key", base_url) as client:
+        assert await client.authenticate()
+        supervisor = Supervisor(processes=2, buffer=4)
+        with mock.patch("src.supervisor.SUPERVISOR_CHECKPOINT_FILE", checkpoint):
+            summary = await supervisor.run(client)
+        return supervisor, summary
+
+
+# --- Two shard processes against the mock API: partitioned, no duplicate submits, clean exit ---
+def test_supervisor_runs_two_shards_end_to_end(monkeypatch, tmp_path):
+    from scripts import benchmark, mock_api
+
+    transcripts = 40
+    _supervisor_env(monkeypatch, tmp_path, transcripts)
+    try:
+        mock_api.configure(transcripts=transcripts, seed=5)
+        sessions = {f"t-load-{i}": mock_api.make_transcript(i)["session_id"] for i in range(transcripts)}
+    finally:
+        mock_api.configure()
+
+    with benchmark.mock_api_server() as base_url:
+        # Shards read the API location from the environment they are spawned with
+        monkeypatch.setenv("CALLLIVE_BASE_URL", base_url)
+        supervisor, summary = asyncio.run(_run_supervisor(base_url, str(tmp_path / "checkpoint")))
+        with urllib.request.urlopen(f"{base_url}/v1/stats") as resp:
+            stats = json.load(resp)
+
+    assert [proc.exitcode for proc in supervisor._procs] == [0, 0]
+    assert summary["shards"] == 2 and summary["alive"] == 0
+    assert summary["received"] == transcripts
+    assert stats["unique_processed"] == transcripts
+    assert stats["duplicate_submissions"] == 0
+    assert not (tmp_path / "checkpoint").exists()
+    # Every shard completed exactly the sessions that hash to it
+    for index in range(2):
+        with open(tmp_path / f"seen.json.{index}") as f:
+            done = [json.loads(line)["transcript_id"] for line in f]
+        assert done
+        assert all(shard_for({"session_id": sessions[tid]}, 2) == index for tid in done)
+
+
+# --- Shards that die are routed around; with none left, intake stops and the rest is checkpointed ---
+def test_supervisor_exits_when_every_shard_fails(monkeypatch, tmp_path):
+    from scripts import benchmark
+
+    _supervisor_env(monkeypatch, tmp_path, 200)
+    checkpoint = tmp_path / "checkpoint"
+    with benchmark.mock_api_server() as base_url:
+        # Shards keep the unreachable CALLLIVE_BASE_URL, so each fails authentication and exits
+        supervisor, summary = asyncio.run(_run_supervisor(base_url, str(checkpoint)))
+
+    assert [proc.exitcode for proc in supervisor._procs] == [0, 0]
+    assert summary["received"] == 0
+    assert supervisor._dead == {0, 1}
+    with open(checkpoint) as f:
+        assert all(json.loads(line)["transcript_id"].startswith("t-load-") for line in f)
+
+
+# --- With a durable queue, transcripts a shard reads after SIGTERM are restored on the next start ---
+def test_durable_shard_keeps_transcripts_read_after_stop(monkeypatch, tmp_path):
+    from src.storage import db
+    from src.storage.backends import MemoryBackend
+
+    _supervisor_env(monkeypatch, tmp_path, 0)
+    from src.app import Pipeline
+
+    work_db = str(tmp_path / "work.db")
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    db.set_backend(MemoryBackend())
+
+    def pipeline():
+        return Pipeline(client=None, worker_count=0, durable_path=work_db, checkpoint_path=checkpoint)
+
+    async def first_run():
+        shard = pipeline()
+        await shard.start()
+        receiver, sender = mp.Pipe(duplex=False)
+        stopping = threading.Event()
+        for i in range(2):
+            sender.send_bytes(dumps({"transcript_id": f"t-{i}"}))
+        # Two arrive before the stop and are queued (logged); three arrive after it and are set aside
+        loop = asyncio.get_running_loop()
+        reader = asyncio.create_task(asyncio.to_thread(_read_work, receiver, shard, loop, stopping))
+        while shard.queue.qsize() < 2:
+            await asyncio.sleep(0.01)
+        stopping.set()
+        for i in range(2, 5):
+            sender.send_bytes(dumps({"transcript_id": f"t-{i}"}))
+        sender.send_bytes(_END)
+        await reader
+        stop = asyncio.Event()
+        stop.set()
+        await asyncio.wait_for(shard.finish(stop, deadline=0.1), 5)
+
+    async def restart():
+        shard = pipeline()
+        await shard.start()
+        ids = sorted(shard.queue.get_nowait()["transcript_id"] for _ in range(shard.queue.qsize()))
+        await shard.queue.close()
+        return ids
+
+    try:
+        asyncio.run(first_run())
+        assert asyncio.run(restart()) == [f"t-{i}" for i in range(5)]
+    finally:
+        db.set_backend(None)
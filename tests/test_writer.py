@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from src.storage.writer import JSONLWriter
+
+
+def _read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+# --- Concurrent writers produce whole lines, grouped into few batches ---
+def test_concurrent_writes_are_batched(tmp_path):
+    path = tmp_path / "out.json"
+    writer = JSONLWriter(str(path), batch_size=50, flush_interval_ms=20)
+
+    async def run():
+        await asyncio.gather(*(writer.write({"n": i, "pad": "x" * 100}) for i in range(200)))
+        await writer.close()
+
+    asyncio.run(run())
+    records = _read(path)
+    assert sorted(r["n"] for r in records) == list(range(200))
+    assert writer.records_written == 200
+    assert writer.batches_written <= 10
+
+
+# --- flush() waits for durability without closing ---
+def test_flush_makes_records_visible(tmp_path):
+    path = tmp_path / "out.json"
+    writer = JSONLWriter(str(path), flush_interval_ms=10_000, fsync="batch")
+
+    async def run():
+        await writer.write({"a": 1})
+        await writer.flush()
+        first = _read(path)
+        await writer.write({"b": 2})
+        await writer.close()
+        return first
+
+    assert asyncio.run(run()) == [{"a": 1}]
+    assert _read(path) == [{"a": 1}, {"b": 2}]
+
+
+# --- Close flushes pending records and rejects later writes ---
+def test_close_flushes_and_rejects_writes(tmp_path):
+    path = tmp_path / "out.json"
+    writer = JSONLWriter(str(path), flush_interval_ms=10_000)
+
+    async def run():
+        for i in range(3):
+            await writer.write({"n": i})
+        await writer.close()
+        try:
+            await writer.write({"n": 99})
+        except RuntimeError:
+            return True
+        return False
+
+    assert asyncio.run(run())
+    assert [r["n"] for r in _read(path)] == [0, 1, 2]
+
+
+# --- Records arriving inside the window join the open batch without polling ---
+def test_late_record_joins_open_batch(tmp_path):
+    path = tmp_path / "out.json"
+    writer = JSONLWriter(str(path), batch_size=10, flush_interval_ms=200)
+
+    async def run():
+        await writer.write({"n": 0})
+        await asyncio.sleep(0.05)
+        await writer.write({"n": 1})
+        await writer.close()
+
+    asyncio.run(run())
+    assert [r["n"] for r in _read(path)] == [0, 1]
+    assert writer.batches_written == 1